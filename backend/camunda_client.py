@@ -0,0 +1,236 @@
+"""
+Pooled Camunda 7 engine-rest client shared by the backend and the workers.
+
+CamundaClient (requests) is used by the outbox dispatcher thread, AsyncCamundaClient
+(httpx) by the async backend endpoints and the asyncio worker runtime. Both keep connections alive, retry connection
+errors and 5xx responses with exponential backoff, and put a timeout on every call.
+Calls that are not idempotent (starting an instance, completing or failing a task) are
+only retried when the connection could not be opened: after a dropped connection or a
+5xx the engine may already have applied them.
+Every call is timed in camunda_request_duration_seconds, runs in a client span and sends
+its traceparent header.
+"""
+import asyncio
+import os
+import random
+import time
+from contextlib import contextmanager
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from metrics import CAMUNDA_SECONDS, camunda_endpoint
+from tracing import CLIENT, start_span
+
+RETRY_STATUSES = (500, 502, 503, 504)
+# Errors raised before the request reached the engine
+CONNECT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout)
+RETRY_ERRORS = CONNECT_ERRORS + (httpx.RemoteProtocolError,)
+IDEMPOTENT_METHODS = ("GET", "HEAD", "PUT", "DELETE")
+
+
+def variable(value, type_name: str = None) -> dict:
+    """Camunda typed value {value, type}; type is inferred by the engine when omitted."""
+    v = {"value": value}
+    if type_name:
+        v["type"] = type_name
+    return v
+
+
+def _retry_delay(backoff_factor: float, attempt: int) -> float:
+    # Same curve as urllib3's Retry, plus jitter so parallel clients spread out
+    return backoff_factor * (2 ** attempt) * random.uniform(0.5, 1.0)
+
+
+@contextmanager
+def _instrumented(method: str, path: str, kwargs: dict):
+    """Client span + latency histogram around one logical call; set outcome["status"] on a response."""
+    endpoint = camunda_endpoint(path)
+    outcome = {"status": "error"}
+    t0 = time.perf_counter()
+    with start_span(f"camunda {method} {endpoint}", kind=CLIENT,
+                    attributes={"http.method": method, "http.route": endpoint}) as span:
+        kwargs["headers"] = {**kwargs.get("headers", {}), "traceparent": span.traceparent}
+        try:
+            yield outcome
+        finally:
+            span.set_attribute("http.status_code", outcome["status"])
+            CAMUNDA_SECONDS.labels(method, endpoint, outcome["status"]).observe(time.perf_counter() - t0)
+
+
+def _env_settings(prefix: str, default_url: str) -> dict:
+    user = os.getenv(f"{prefix}_USER")
+    password = os.getenv(f"{prefix}_PASS")
+    return {
+        "base_url": os.getenv(f"{prefix}_URL", default_url),
+        "auth": (user, password) if user else None,
+        "pool_size": int(os.getenv(f"{prefix}_POOL_SIZE", "10")),
+        "retries": int(os.getenv(f"{prefix}_RETRIES", "3")),
+        "timeout": float(os.getenv(f"{prefix}_TIMEOUT_SEC", "10")),
+    }
+
+
+def _session(auth, pool_size: int, retry: Retry) -> requests.Session:
+    session = requests.Session()
+    session.auth = auth
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+class CamundaClient:
+    def __init__(self, base_url: str, auth=None, pool_size: int = 10, retries: int = 3,
+                 backoff_factor: float = 0.3, timeout: float = 10.0):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.session = _session(auth, pool_size, Retry(
+            total=retries,
+            connect=retries,
+            read=0,  # a read timeout may mean the engine already applied the call
+            status=retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=None,  # engine-rest uses POST for reads (fetchAndLock, queries)
+            raise_on_status=False,
+        ))
+        # Non-idempotent calls: retried only when the connection could not be opened
+        self._connect_only = _session(auth, pool_size, Retry(
+            total=retries,
+            connect=retries,
+            read=0,
+            other=0,
+            status=0,
+            backoff_factor=backoff_factor,
+            allowed_methods=None,
+            respect_retry_after_header=False,
+            raise_on_status=False,
+        ))
+
+    @classmethod
+    def from_env(cls, prefix: str = "CAMUNDA", default_url: str = "http://camunda:8080/engine-rest"):
+        return cls(**_env_settings(prefix, default_url))
+
+    def request(self, method: str, path: str, timeout: float = None, idempotent: bool = None, **kwargs):
+        """idempotent defaults to the HTTP method's; engine-rest POSTs that are safe to repeat opt in."""
+        if idempotent is None:
+            idempotent = method in IDEMPOTENT_METHODS
+        session = self.session if idempotent else self._connect_only
+        with _instrumented(method, path, kwargs) as outcome:
+            r = session.request(method, f"{self.base_url}{path}", timeout=timeout or self.timeout, **kwargs)
+            outcome["status"] = str(r.status_code)
+            r.raise_for_status()
+            return r.json() if r.content else None
+
+    def start_process(self, key: str, variables: dict, business_key: str = None, timeout: float = None):
+        payload = {"variables": variables}
+        if business_key:
+            payload["businessKey"] = business_key
+        return self.request("POST", f"/process-definition/key/{key}/start", json=payload, timeout=timeout)
+
+    def variable_instances(self, name: str, value: str, timeout: float = None) -> list:
+        return self.request("GET", "/variable-instance",
+                            params={"variableName": name, "variableValue": value}, timeout=timeout)
+
+    def set_variables(self, process_instance_id: str, modifications: dict, timeout: float = None):
+        # Writing the same values again is harmless
+        return self.request("POST", f"/process-instance/{process_instance_id}/variables",
+                            json={"modifications": modifications}, timeout=timeout, idempotent=True)
+
+    def close(self):
+        self.session.close()
+        self._connect_only.close()
+
+
+class AsyncCamundaClient:
+    def __init__(self, base_url: str, auth=None, pool_size: int = 10, retries: int = 3,
+                 backoff_factor: float = 0.3, timeout: float = 10.0):
+        self.base_url = base_url.rstrip("/")
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+        limits = httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size)
+        self.client = httpx.AsyncClient(auth=auth, timeout=timeout, limits=limits)
+
+    @classmethod
+    def from_env(cls, prefix: str = "CAMUNDA", default_url: str = "http://camunda:8080/engine-rest"):
+        return cls(**_env_settings(prefix, default_url))
+
+    async def request(self, method: str, path: str, timeout: float = None, idempotent: bool = None, **kwargs):
+        """idempotent defaults to the HTTP method's; engine-rest POSTs that are safe to repeat opt in."""
+        if timeout is not None:
+            kwargs["timeout"] = timeout
+        if idempotent is None:
+            idempotent = method in IDEMPOTENT_METHODS
+        retry_errors = RETRY_ERRORS if idempotent else CONNECT_ERRORS
+        with _instrumented(method, path, kwargs) as outcome:
+            attempt = 0
+            while True:
+                try:
+                    r = await self.client.request(method, f"{self.base_url}{path}", **kwargs)
+                    outcome["status"] = str(r.status_code)
+                    if not idempotent or r.status_code not in RETRY_STATUSES or attempt >= self.retries:
+                        r.raise_for_status()
+                        return r.json() if r.content else None
+                except retry_errors:
+                    if attempt >= self.retries:
+                        raise
+                await asyncio.sleep(_retry_delay(self.backoff_factor, attempt))
+                attempt += 1
+
+    async def start_process(self, key: str, variables: dict, business_key: str = None, timeout: float = None):
+        payload = {"variables": variables}
+        if business_key:
+            payload["businessKey"] = business_key
+        return await self.request("POST", f"/process-definition/key/{key}/start", json=payload, timeout=timeout)
+
+    async def variable_instances(self, name: str, value: str, timeout: float = None) -> list:
+        return await self.request("GET", "/variable-instance",
+                                  params={"variableName": name, "variableValue": value}, timeout=timeout)
+
+    async def set_variables(self, process_instance_id: str, modifications: dict, timeout: float = None):
+        # Writing the same values again is harmless
+        return await self.request("POST", f"/process-instance/{process_instance_id}/variables",
+                                  json={"modifications": modifications}, timeout=timeout, idempotent=True)
+
+    async def fetch_and_lock(self, worker_id: str, topics: list, max_tasks: int,
+                             async_timeout_ms: int = 0, use_priority: bool = True) -> list:
+        payload = {
+            "workerId": worker_id,
+            "maxTasks": max_tasks,
+            "usePriority": use_priority,
+            # Long polling: Camunda holds the request open until a task arrives or the timeout elapses
+            "asyncResponseTimeout": async_timeout_ms,
+            "topics": topics,
+        }
+        # A lost response only leaves tasks locked until lock_ms lapses; nothing runs twice
+        return await self.request("POST", "/external-task/fetchAndLock", json=payload,
+                                  timeout=async_timeout_ms / 1000 + 30, idempotent=True)
+
+    async def complete(self, task_id: str, worker_id: str, variables: dict = None):
+        # Camunda expects variables in { varName: { value: x } }
+        payload = {"workerId": worker_id, "variables": {k: variable(v) for k, v in (variables or {}).items()}}
+        return await self.request("POST", f"/external-task/{task_id}/complete", json=payload)
+
+    async def failure(self, task_id: str, worker_id: str, msg: str, details: str,
+                      retries: int = 3, retry_timeout_ms: int = 60000):
+        payload = {
+            "workerId": worker_id,
+            "errorMessage": msg[:255],
+            "errorDetails": details[:4000],
+            "retries": retries,
+            "retryTimeout": retry_timeout_ms
+        }
+        return await self.request("POST", f"/external-task/{task_id}/failure", json=payload)
+
+    async def extend_lock(self, task_id: str, worker_id: str, new_duration_ms: int):
+        # The lock then expires new_duration_ms from now
+        payload = {"workerId": worker_id, "newDuration": new_duration_ms}
+        return await self.request("POST", f"/external-task/{task_id}/extendLock", json=payload, idempotent=True)
+
+    async def unlock(self, task_id: str):
+        return await self.request("POST", f"/external-task/{task_id}/unlock")
+
+    async def aclose(self):
+        await self.client.aclose()
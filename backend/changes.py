@@ -0,0 +1,92 @@
+"""
+Incremental change feed over Contracts.RowVer.
+
+SQL Server bumps RowVer on every insert and update (create worker, provider PATCH,
+approve / reject workers), so "rows with RowVer > token" are exactly the contracts that
+changed since a client last looked. A token is the hex RowVer of the last row returned;
+an empty token starts from the beginning (a full snapshot, paged).
+
+Rows are only read below MIN_ACTIVE_ROWVERSION(): a transaction that is still open may
+already hold a lower RowVer than a committed one, and handing out a token past it would
+skip that row for good once it commits.
+
+The feed covers every status, so clients also see contracts leave the provider listing
+(ContractStatus becomes Approved or Rejected).
+"""
+import asyncio
+import re
+
+from fastapi import HTTPException
+
+_TOKEN_RE = re.compile(r"^[0-9a-fA-F]{16}$")
+ZERO_TOKEN = bytes(8)
+
+
+def encode_token(rowver: bytes) -> str:
+    return bytes(rowver).hex()
+
+
+def decode_token(token) -> bytes:
+    if not token:
+        return ZERO_TOKEN
+    if not _TOKEN_RE.match(token):
+        raise HTTPException(status_code=400, detail="Invalid change token")
+    return bytes.fromhex(token)
+
+
+def read_changes(cursor, columns: list, since: bytes, limit: int) -> dict:
+    """
+    Up to limit rows changed after `since`, oldest change first, as
+    {"items": [...], "next": token, "has_more": bool}. `next` is the token to pass as
+    `since` on the following call (unchanged when nothing changed).
+    """
+    select_cols = list(columns)
+    if "RowVer" not in select_cols:
+        select_cols.append("RowVer")
+    cursor.execute(
+        f"SELECT TOP (?) {', '.join(select_cols)} FROM Contracts "
+        "WHERE RowVer > ? AND RowVer < MIN_ACTIVE_ROWVERSION() "
+        "ORDER BY RowVer",
+        limit + 1, since
+    )
+    names = [c[0] for c in cursor.description]
+    rows = cursor.fetchmany(limit + 1)
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    items = []
+    for row in rows:
+        record = dict(zip(names, row))
+        items.append({c: record[c] for c in columns})
+    last = dict(zip(names, rows[-1]))["RowVer"] if rows else since
+    return {"items": items, "next": encode_token(last), "has_more": has_more}
+
+
+class ChangeNotifier:
+    """
+    Wakes Server-Sent Events streams when this process wrote to Contracts (the PATCH
+    handlers call notify()); worker writes are picked up by the streams' periodic check.
+    """
+
+    def __init__(self):
+        self._event = asyncio.Event()
+
+    def notify(self):
+        self._event.set()
+        self._event = asyncio.Event()
+
+    async def wait(self, timeout: float):
+        try:
+            await asyncio.wait_for(self._event.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+
+def sse_event(data: bytes, event_id: str = None, event: str = None) -> bytes:
+    """One text/event-stream message; data must be a single line (compact JSON)."""
+    out = b""
+    if event_id:
+        out += f"id: {event_id}\n".encode()
+    if event:
+        out += f"event: {event}\n".encode()
+    return out + b"data: " + data + b"\n\n"
@@ -1,6 +1,10 @@
 import psycopg2
-import pyodbc 
+import pyodbc
 import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
 
 def get_connection():
     return psycopg2.connect(
@@ -22,12 +26,225 @@ def get_azure_connection():
 
     conn_str = (
         "Driver={ODBC Driver 18 for SQL Server};"
-        f"Server=tcp:{server},1433;"
+        f"Server=tcp:{server},{os.getenv('AZURE_SQL_PORT', '1433')};"
         f"Database={database};"
         f"Uid={user};"
         f"Pwd={password};"
         "Encrypt=yes;"
-        "TrustServerCertificate=no;"
+        # yes only for a local SQL Server container with a self-signed certificate
+        f"TrustServerCertificate={os.getenv('AZURE_SQL_TRUST_SERVER_CERTIFICATE', 'no')};"
         "Connection Timeout=30;"
     )
     return pyodbc.connect(conn_str)
+
+
+class PoolTimeout(Exception):
+    """Raised when no pooled connection became available within the checkout timeout."""
+
+
+class _PooledConnection:
+    __slots__ = ("conn", "created_at", "last_used")
+
+    def __init__(self, conn):
+        now = time.monotonic()
+        self.conn = conn
+        self.created_at = now
+        self.last_used = now
+
+
+class ConnectionPool:
+    """
+    Thread-safe pool of Azure SQL connections.
+
+    - keeps at least `min_size` and at most `max_size` physical connections
+    - validates connections that sat idle longer than `ping_after` with SELECT 1 on checkout
+    - closes idle connections above `min_size` after `idle_timeout` seconds
+    - recycles every connection once it is older than `max_lifetime` seconds
+    """
+
+    def __init__(self, factory, min_size=1, max_size=10, checkout_timeout=30.0,
+                 idle_timeout=300.0, max_lifetime=1800.0, ping_after=30.0):
+        if max_size < 1 or min_size < 0 or min_size > max_size:
+            raise ValueError("Invalid pool size configuration")
+        self._factory = factory
+        self.min_size = min_size
+        self.max_size = max_size
+        self.checkout_timeout = checkout_timeout
+        self.idle_timeout = idle_timeout
+        self.max_lifetime = max_lifetime
+        self.ping_after = ping_after
+
+        self._idle = deque()
+        self._size = 0  # idle + checked out (+ connections currently being opened)
+        self._cond = threading.Condition()
+        self._stats = {"created": 0, "recycled": 0, "evicted": 0, "failed_checks": 0, "waiting": 0, "checked_out": 0}
+
+    # --- internals ---
+
+    def _open(self):
+        try:
+            pc = _PooledConnection(self._factory())
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+        with self._cond:
+            self._stats["created"] += 1
+        return pc
+
+    def _discard(self, pc, reason):
+        try:
+            pc.conn.close()
+        except Exception:
+            pass
+        with self._cond:
+            self._size -= 1
+            self._stats[reason] += 1
+            self._cond.notify()
+
+    def _expired(self, pc, now):
+        return self.max_lifetime and now - pc.created_at > self.max_lifetime
+
+    def _healthy(self, pc, now):
+        if now - pc.last_used < self.ping_after:
+            return True
+        try:
+            pc.conn.cursor().execute("SELECT 1").fetchone()
+            return True
+        except Exception:
+            return False
+
+    def _evict_idle(self):
+        """Pops idle connections past idle_timeout (down to min_size). Caller holds the lock."""
+        now = time.monotonic()
+        stale = []
+        # Oldest-returned connections sit on the left of the deque
+        while self._idle and self._size - len(stale) > self.min_size:
+            pc = self._idle[0]
+            if now - pc.last_used <= self.idle_timeout:
+                break
+            stale.append(self._idle.popleft())
+        return stale
+
+    # --- public API ---
+
+    def warm(self):
+        """Opens connections until min_size is reached."""
+        while True:
+            with self._cond:
+                if self._size >= self.min_size:
+                    return
+                self._size += 1
+            pc = self._open()
+            with self._cond:
+                self._idle.append(pc)
+                self._cond.notify()
+
+    def acquire(self):
+        deadline = time.monotonic() + self.checkout_timeout
+        while True:
+            pc = None
+            with self._cond:
+                stale = self._evict_idle()
+                while not self._idle and self._size - len(stale) >= self.max_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._stats["waiting"] += 1
+                    try:
+                        self._cond.wait(remaining)
+                    finally:
+                        self._stats["waiting"] -= 1
+                if self._idle:
+                    # LIFO keeps a hot working set and lets the cold tail age out
+                    pc = self._idle.pop()
+                elif self._size - len(stale) < self.max_size:
+                    self._size += 1
+                else:
+                    pc = False
+            for s in stale:
+                self._discard(s, "evicted")
+
+            if pc is False:
+                raise PoolTimeout(f"No Azure SQL connection available within {self.checkout_timeout}s")
+            if pc is None:
+                pc = self._open()
+            else:
+                now = time.monotonic()
+                if self._expired(pc, now):
+                    self._discard(pc, "recycled")
+                    continue
+                if not self._healthy(pc, now):
+                    self._discard(pc, "failed_checks")
+                    continue
+
+            with self._cond:
+                self._stats["checked_out"] += 1
+            return pc
+
+    def release(self, pc, broken=False):
+        with self._cond:
+            self._stats["checked_out"] -= 1
+        if not broken:
+            try:
+                # Never hand out a connection with an open transaction
+                pc.conn.rollback()
+            except Exception:
+                broken = True
+        if broken:
+            self._discard(pc, "failed_checks")
+            return
+        if self._expired(pc, time.monotonic()):
+            self._discard(pc, "recycled")
+            return
+        pc.last_used = time.monotonic()
+        with self._cond:
+            self._idle.append(pc)
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self):
+        pc = self.acquire()
+        broken = False
+        try:
+            yield pc.conn
+        except pyodbc.Error:
+            # Driver-level errors may leave the session unusable
+            broken = True
+            raise
+        finally:
+            self.release(pc, broken=broken)
+
+    def close(self):
+        with self._cond:
+            idle = list(self._idle)
+            self._idle.clear()
+        for pc in idle:
+            try:
+                pc.conn.close()
+            except Exception:
+                pass
+            with self._cond:
+                self._size -= 1
+
+    def stats(self):
+        with self._cond:
+            return {
+                "size": self._size,
+                "idle": len(self._idle),
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+                **self._stats,
+            }
+
+
+azure_pool = ConnectionPool(
+    get_azure_connection,
+    min_size=int(os.getenv("AZURE_SQL_POOL_MIN", "1")),
+    max_size=int(os.getenv("AZURE_SQL_POOL_MAX", "10")),
+    checkout_timeout=float(os.getenv("AZURE_SQL_POOL_TIMEOUT_SEC", "30")),
+    idle_timeout=float(os.getenv("AZURE_SQL_POOL_IDLE_SEC", "300")),
+    max_lifetime=float(os.getenv("AZURE_SQL_POOL_MAX_LIFETIME_SEC", "1800")),
+    ping_after=float(os.getenv("AZURE_SQL_POOL_PING_AFTER_SEC", "30")),
+)
@@ -0,0 +1,208 @@
+"""
+Async bridges to the backend's blocking and rate-limited dependencies.
+
+pyodbc has no async API, so SQL work runs on a dedicated thread pool sized to the Azure SQL
+connection pool rather than on Starlette's shared threadpool. Each dependency (SQL, Camunda)
+has its own concurrency limit: a caller waits up to `queue_timeout` seconds for a slot and
+then gets a 503, so a slow Camunda cannot starve the SQL-only endpoints and an overloaded
+database sheds load instead of queueing requests without bound.
+"""
+import asyncio
+import contextvars
+import functools
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+
+import pyodbc
+from fastapi import HTTPException
+
+from metrics import SQL_SECONDS, operation_name
+from tracing import CLIENT, start_span
+
+
+class Limiter:
+    def __init__(self, name: str, limit: int, queue_timeout: float = 10.0):
+        self.name = name
+        self.limit = limit
+        self.queue_timeout = queue_timeout
+        self._sem = asyncio.Semaphore(limit)
+        self._stats = {"in_flight": 0, "waiting": 0, "rejected": 0, "completed": 0}
+
+    @asynccontextmanager
+    async def slot(self):
+        self._stats["waiting"] += 1
+        try:
+            await asyncio.wait_for(self._sem.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            self._stats["rejected"] += 1
+            raise HTTPException(status_code=503, detail=f"{self.name} is busy, retry later")
+        finally:
+            self._stats["waiting"] -= 1
+        self._stats["in_flight"] += 1
+        try:
+            yield
+        finally:
+            self._stats["in_flight"] -= 1
+            self._stats["completed"] += 1
+            self._sem.release()
+
+    def stats(self) -> dict:
+        return {"limit": self.limit, "queue_timeout": self.queue_timeout, **self._stats}
+
+
+class SqlExecutor:
+    """Runs fn(conn, *args) with a pooled connection on the SQL thread pool."""
+
+    def __init__(self, pool, threads: int, queue_timeout: float = 10.0):
+        self.pool = pool
+        self.limiter = Limiter("Azure SQL", threads, queue_timeout)
+        self._executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="sql")
+
+    def _with_connection(self, fn, *args):
+        with self.pool.connection() as conn:
+            return fn(conn, *args)
+
+    async def run(self, fn, *args):
+        """Timed in sql_duration_seconds and traced under fn's name, e.g. 'get_stats.<lambda>'."""
+        name = operation_name(fn)
+        async with self.limiter.slot():
+            loop = asyncio.get_running_loop()
+            with start_span(f"sql {name}", kind=CLIENT, attributes={"db.operation": name}):
+                # copy_context: fn sees the current span (e.g. to store its traceparent)
+                ctx = contextvars.copy_context()
+                t0 = time.perf_counter()
+                try:
+                    return await loop.run_in_executor(
+                        self._executor, functools.partial(ctx.run, self._with_connection, fn, *args)
+                    )
+                finally:
+                    SQL_SECONDS.labels(name).observe(time.perf_counter() - t0)
+
+    async def call(self, fn, *args):
+        """Runs any other blocking call (e.g. a psycopg2 connect) on the same threads."""
+        async with self.limiter.slot():
+            loop = asyncio.get_running_loop()
+            ctx = contextvars.copy_context()
+            return await loop.run_in_executor(self._executor, functools.partial(ctx.run, fn, *args))
+
+    async def stream(self, query: str, params: list, batch_size: int = 1000):
+        """
+        Async iterator over (column names, rows) batches of one query. Holds an executor slot
+        and one pooled connection until exhausted or closed; each fetchmany runs on the pool.
+        """
+        async with self.limiter.slot():
+            step = self._executor.submit(self.pool.acquire)  # the call on the SQL threads in flight
+            pc = cur = None
+            broken = False
+            try:
+                pc = await asyncio.wrap_future(step)
+                step = self._executor.submit(functools.partial(pc.conn.cursor().execute, query, *params))
+                cur = await asyncio.wrap_future(step)
+                names = [c[0] for c in cur.description]
+                while True:
+                    step = self._executor.submit(cur.fetchmany, batch_size)
+                    rows = await asyncio.wrap_future(step)
+                    if not rows:
+                        break
+                    yield names, rows
+            except Exception as e:
+                broken = isinstance(e, pyodbc.Error)
+                raise
+            finally:
+                # Not awaited: on a client disconnect StreamingResponse cancels this generator's
+                # scope, which would cancel an await here too and leak the connection. The
+                # cleanup goes to the SQL threads once the step still in flight (e.g. a
+                # cancelled fetchmany) is done, so the cursor is never used by two threads.
+                step.add_done_callback(
+                    lambda done: self._executor.submit(self._close_stream, pc, cur, broken, done))
+
+    def _close_stream(self, pc, cur, broken: bool, step):
+        error = None if step.cancelled() else step.exception()
+        if pc is None:
+            if step.cancelled() or error is not None:
+                return  # nothing was acquired
+            pc = step.result()  # the acquire finished after the stream was abandoned
+        broken = broken or step.cancelled() or isinstance(error, pyodbc.Error)
+        if cur is not None:
+            try:
+                cur.close()
+            except Exception:
+                broken = True
+        self.pool.release(pc, broken=broken)
+
+    def stats(self) -> dict:
+        return {"limit": self.limit, "queue_timeout": self.queue_timeout, **self._stats}
+
+
+class SqlExecutor:
+    """Runs fn(conn, *args) with a pooled connection on the SQL thread pool."""
+
+    def __init__(self, pool, threads: int, queue_timeout: float = 10.0):
+        self.pool = pool
+        self.limiter = Limiter("Azure SQL", threads, queue_timeout)
+        self._executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="sql")
+
+    def _with_connection(self, fn, *args):
+        with self.pool.connection() as conn:
+            return fn(conn, *args)
+
+    async def run(self, fn, *args):
+        """Timed in sql_duration_seconds and traced under fn's name, e.g. 'get_stats.<lambda>'."""
+        name = operation_name(fn)
+        async with self.limiter.slot():
+            loop = asyncio.get_running_loop()
+            with start_span(f"sql {name}", kind=CLIENT, attributes={"db.operation": name}):
+                # copy_context: fn sees the current span (e.g. to store its traceparent)
+                ctx = contextvars.copy_context()
+                t0 = time.perf_counter()
+                try:
+                    return await loop.run_in_executor(
+                        self._executor, functools.partial(ctx.run, self._with_connection, fn, *args)
+                    )
+                finally:
+                    SQL_SECONDS.labels(name).observe(time.perf_counter() - t0)
+
+    async def call(self, fn, *args):
+        """Runs any other blocking call (e.g. a psycopg2 connect) on the same threads."""
+        async with self.limiter.slot():
+            loop = asyncio.get_running_loop()
+            ctx = contextvars.copy_context()
+            return await loop.run_in_executor(self._executor, functools.partial(ctx.run, fn, *args))
+
+    async def stream(self, query: str, params: list, batch_size: int = 1000):
+        """
+        Async iterator over (column names, rows) batches of one query. Holds an executor slot
+        and one pooled connection until exhausted or closed; each fetchmany runs on the pool.
+        """
+        async with self.limiter.slot():
+            loop = asyncio.get_running_loop()
+            pc = await loop.run_in_executor(self._executor, self.pool.acquire)
+            cur, broken = None, False
+            try:
+                cur = await loop.run_in_executor(self._executor, functools.partial(pc.conn.cursor().execute, query, *params))
+                names = [c[0] for c in cur.description]
+                while True:
+                    rows = await loop.run_in_executor(self._executor, cur.fetchmany, batch_size)
+                    if not rows:
+                        break
+                    yield names, rows
+            except Exception as e:
+                broken = isinstance(e, pyodbc.Error)
+                raise
+            finally:
+                await loop.run_in_executor(self._executor, self._close_stream, pc, cur, broken)
+
+    def _close_stream(self, pc, cur, broken: bool):
+        if cur is not None:
+            try:
+                cur.close()
+            except Exception:
+                broken = True
+        self.pool.release(pc, broken=broken)
+
+    def stats(self) -> dict:
+        return self.limiter.stats()
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
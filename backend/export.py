@@ -0,0 +1,46 @@
+"""
+Streaming contract exports.
+
+Rows are read from SqlExecutor.stream in fetchmany batches and serialized batch by batch,
+so memory stays flat regardless of how many contracts match.
+"""
+import csv
+import io
+
+import anyio
+import orjson
+
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+
+def ndjson_chunk(names: list, rows: list) -> bytes:
+    return b"".join(orjson.dumps(dict(zip(names, row)), default=str) + b"\n" for row in rows)
+
+
+def csv_chunk(rows: list, header: list = None) -> bytes:
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    if header:
+        writer.writerow(header)
+    writer.writerows(rows)
+    return buf.getvalue().encode()
+
+
+async def export_stream(first, batches, fmt: str):
+    """Yields encoded bytes for the already-fetched first batch and then the remaining ones."""
+    try:
+        names, rows = first
+        if fmt == "csv":
+            yield csv_chunk(rows, header=names)
+        else:
+            yield ndjson_chunk(names, rows)
+        async for names, rows in batches:
+            yield csv_chunk(rows) if fmt == "csv" else ndjson_chunk(names, rows)
+    finally:
+        # Returns the SQL connection right away if the client disconnects mid-download. That
+        # disconnect cancels this generator's scope, so the close is shielded from it
+        with anyio.CancelScope(shield=True):
+            await batches.aclose()
@@ -0,0 +1,37 @@
+# Production serving: gunicorn -c gunicorn.conf.py main:app
+#
+# One uvicorn worker process per CPU (WEB_CONCURRENCY overrides). Each worker has its own
+# Azure SQL pool (AZURE_SQL_POOL_MAX connections), caches and outbox dispatcher; only one
+# dispatcher is active at a time (sp_getapplock), and CACHE_INVALIDATION=postgres keeps
+# the caches coherent across workers.
+#
+# kill -HUP <master pid> reloads gracefully: new workers start with the new code, old ones
+# finish their requests within GRACEFUL_TIMEOUT_SEC before they are stopped.
+import multiprocessing
+import os
+import shutil
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+workers = int(os.getenv("WEB_CONCURRENCY") or multiprocessing.cpu_count())
+worker_class = "uvicorn_worker.UvicornWorker"
+graceful_timeout = int(os.getenv("GRACEFUL_TIMEOUT_SEC", "30"))
+timeout = int(os.getenv("WORKER_TIMEOUT_SEC", "60"))
+keepalive = int(os.getenv("KEEPALIVE_SEC", "5"))
+# Workers import the app themselves: the SQL pool, executor threads and the outbox /
+# invalidation threads must not be created before the fork
+preload_app = False
+accesslog = None
+
+# Prometheus metrics summed over all workers (metrics.exposition)
+os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", "/tmp/backend-metrics")
+
+
+def on_starting(server):
+    path = os.environ["PROMETHEUS_MULTIPROC_DIR"]
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path, exist_ok=True)
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
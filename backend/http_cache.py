@@ -0,0 +1,98 @@
+"""
+Server-side cache of serialized GET responses with ETag / If-None-Match support.
+
+Entries are keyed by the request's query string and stamped with a data version token:
+MIN_ACTIVE_ROWVERSION() and @@DBTS of the database (every Contracts write bumps the RowVer
+column). MIN_ACTIVE_ROWVERSION() alone stays pinned while any transaction that wrote a
+row is open, so a write committed meanwhile would not change it; @@DBTS moves with it.
+A cached body is reused while the token is unchanged. The token itself is re-read at most
+every `version_ttl` seconds, and immediately after invalidate() (called by the PATCH
+handler), so changes made by the store workers show up within `version_ttl`.
+
+ETags are a hash of the body, so a client that already holds the current representation
+gets a 304 even when the server had to rebuild it.
+"""
+import hashlib
+import threading
+import time
+
+from fastapi import Response
+
+from cache import TTLCache
+
+VERSION_SQL = "SELECT MIN_ACTIVE_ROWVERSION(), @@DBTS"
+
+
+def etag_of(body: bytes) -> str:
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    tags = [t.strip() for t in if_none_match.split(",")]
+    return etag in [t[2:] if t.startswith("W/") else t for t in tags]
+
+
+class ResponseCache:
+    def __init__(self, maxsize: int = 1000, ttl: float = 300.0, version_ttl: float = 1.0):
+        self._entries = TTLCache(maxsize=maxsize, ttl=ttl)  # key -> (version, etag, body)
+        self.version_ttl = version_ttl
+        self._version = None
+        self._version_at = 0.0
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "not_modified": 0, "bytes_sent": 0, "bytes_saved": 0}
+
+    def invalidate(self):
+        """Forces the next request to re-read the version token."""
+        with self._lock:
+            self._version_at = 0.0
+
+    async def version(self, read_version):
+        with self._lock:
+            if time.monotonic() - self._version_at < self.version_ttl:
+                return self._version
+        version = await read_version()
+        with self._lock:
+            self._version, self._version_at = version, time.monotonic()
+        return version
+
+    async def respond(self, key: str, if_none_match: str, read_version, build_body) -> Response:
+        """
+        Returns a 304 or the cached / freshly built JSON body for key.
+        read_version and build_body are coroutine functions; build_body returns the JSON bytes.
+        """
+        version = await self.version(read_version)
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] == version:
+            etag, body = entry[1], entry[2]
+            self._count("hits")
+        else:
+            body = await build_body()
+            etag = etag_of(body)
+            self._entries.set(key, (version, etag, body))
+            self._count("misses")
+
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        if etag_matches(if_none_match, etag):
+            self._count("not_modified")
+            self._count("bytes_saved", len(body))
+            return Response(status_code=304, headers=headers)
+        self._count("bytes_sent", len(body))
+        return Response(body, media_type="application/json", headers=headers)
+
+    def _count(self, name: str, n: int = 1):
+        with self._lock:
+            self._stats[name] += n
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return {
+                **self._stats,
+                "hit_rate": round(self._stats["hits"] / lookups, 4) if lookups else 0.0,
+                "entries": self._entries.stats()["size"],
+                "version_ttl": self.version_ttl,
+            }
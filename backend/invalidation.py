@@ -0,0 +1,145 @@
+"""
+Cache invalidation across backend processes over Postgres LISTEN / NOTIFY.
+
+Under gunicorn every worker process has its own listing cache, provider snapshot, /stats
+cache, SSE notifier and outbox dispatcher. A PATCH invalidates them in the process that
+served it and publish()es the same invalidation kinds; the other processes receive them
+on channel `INVALIDATION_CHANNEL` and apply them as if they had served the write. Without
+the broadcast the other processes would still catch up, but only after their version /
+TTL checks (LISTING_VERSION_TTL_SEC, STATS_CACHE_TTL_SEC, OUTBOX_POLL_SEC).
+
+One thread per process owns one Postgres connection (db.get_connection, the Camunda
+database): it LISTENs, and sends queued kinds coalesced into one NOTIFY. When the
+connection drops it reconnects with backoff; everything is invalidated after a
+reconnect, since notifications sent in between are lost.
+"""
+import select
+import socket
+import threading
+
+from psycopg2 import sql as pgsql
+
+from logs import get_logger
+
+log = get_logger("invalidation")
+
+
+class Invalidator:
+    def __init__(self, connect, channel: str = "backend_invalidation", keepalive: float = 30.0,
+                 max_backoff: float = 30.0):
+        self.connect = connect  # db.get_connection
+        self.channel = channel
+        self.keepalive = keepalive
+        self.max_backoff = max_backoff
+        self._pending = set()
+        self._lock = threading.Lock()
+        self._wake_r, self._wake_w = socket.socketpair()
+        self._wake_r.setblocking(False)
+        self._stop = threading.Event()
+        self._thread = None
+        self._loop = self._handler = None
+        self._all_kinds = ()
+        self._stats = {"published": 0, "notifies_sent": 0, "received": 0, "reconnects": 0, "errors": 0,
+                       "connected": False}
+
+    def start(self, loop, handler, all_kinds):
+        """handler(kinds) runs on loop for every notification from another process."""
+        self._loop, self._handler, self._all_kinds = loop, handler, tuple(all_kinds)
+        self._thread = threading.Thread(target=self._run, name="cache-invalidation", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake()
+        if self._thread:
+            self._thread.join(timeout=5)
+
+    def publish(self, kinds):
+        """Queues kinds for the other processes; never blocks the caller."""
+        if self._thread is None:
+            return
+        with self._lock:
+            self._pending.update(kinds)
+            self._stats["published"] += 1
+        self._wake()
+
+    def _wake(self):
+        try:
+            self._wake_w.send(b"\0")
+        except (BlockingIOError, OSError):
+            pass
+
+    def _deliver(self, kinds):
+        self._loop.call_soon_threadsafe(self._handler, kinds)
+
+    def _run(self):
+        backoff = 1.0
+        while not self._stop.is_set():
+            conn = None
+            try:
+                conn = self.connect()
+                conn.autocommit = True
+                conn.cursor().execute(pgsql.SQL("LISTEN {}").format(pgsql.Identifier(self.channel)))
+                if self._stats["reconnects"] or self._stats["errors"]:
+                    # Notifications sent while disconnected are lost
+                    self._deliver(self._all_kinds)
+                self._stats["connected"] = True
+                backoff = 1.0
+                self._listen(conn)
+            except Exception as e:
+                self._stats["errors"] += 1
+                if not self._stop.is_set():
+                    log.warning("Cache invalidation channel down, retrying in %.0fs: %s", backoff, e)
+                    self._stop.wait(backoff)
+                    backoff = min(backoff * 2, self.max_backoff)
+                    self._stats["reconnects"] += 1
+            finally:
+                self._stats["connected"] = False
+                if conn is not None:
+                    try:
+                        conn.close()
+                    except Exception:
+                        pass
+
+    def _listen(self, conn):
+        own_pid = conn.get_backend_pid()
+        cur = conn.cursor()
+        while not self._stop.is_set():
+            self._send(cur)
+            ready, _, _ = select.select([conn, self._wake_r], [], [], self.keepalive)
+            if self._wake_r in ready:
+                try:
+                    while self._wake_r.recv(4096):
+                        pass
+                except BlockingIOError:
+                    pass
+            if conn in ready:
+                conn.poll()
+            elif not ready:
+                cur.execute("SELECT 1")  # detects a dead connection while idle
+            kinds = set()
+            while conn.notifies:
+                note = conn.notifies.pop(0)
+                if note.pid != own_pid:
+                    kinds.update(k for k in note.payload.split(",") if k)
+                    self._stats["received"] += 1
+            if kinds:
+                self._deliver(kinds)
+
+    def _send(self, cur):
+        with self._lock:
+            kinds, self._pending = self._pending, set()
+        if not kinds:
+            return
+        try:
+            cur.execute("SELECT pg_notify(%s, %s)", (self.channel, ",".join(sorted(kinds))))
+        except Exception:
+            with self._lock:
+                self._pending |= kinds
+            raise
+        self._stats["notifies_sent"] += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"channel": self.channel, "pending": len(self._pending), **self._stats}
+
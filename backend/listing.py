@@ -0,0 +1,162 @@
+"""
+Keyset-paginated contract listings.
+
+Pages are ordered newest first by (timestamp column, Id). The cursor is an opaque
+base64url token holding the (timestamp, Id) of the last row of the previous page, so
+every page is an index seek instead of an OFFSET scan and stays stable while rows are
+inserted.
+
+The timestamps are DATETIME2(7) (100ns ticks) but reach Python with microseconds, so
+the seek compares against the stored timestamp of the cursor's row (looked up by Id)
+rather than the truncated copy in the cursor; otherwise rows sharing the last row's
+timestamp, such as a batch approved by one UPDATE, would be skipped at page boundaries.
+"""
+import base64
+import json
+from datetime import datetime
+from typing import Optional
+
+import orjson
+from fastapi import HTTPException
+
+CONTRACT_COLUMNS = [
+    "Id", "ContractId", "ProcessInstanceId", "BusinessKey",
+    "ContractTitle", "ContractType", "Roles", "Skills", "RequestType",
+    "Budget", "ContractStartDate", "ContractEndDate", "Description",
+    "ProvidersBudget", "ProvidersComment", "ProvidersName", "MeetRequirement",
+    "SignedDate", "ApprovedAt", "RejectedAt", "LegalComment", "ApprovalDecision",
+    "ContractStatus", "CreatedAt",
+    "EmployeeName", "OfficeAddress", "FinalPrice",
+]
+
+PROVIDER_COLUMNS = [
+    "ContractId", "ContractTitle", "ContractType", "Roles", "Skills", "RequestType",
+    "Budget", "ContractStartDate", "ContractEndDate", "Description",
+    "ContractStatus", "ProvidersBudget", "ProvidersComment", "MeetRequirement", "ProvidersName",
+]
+
+
+def encode_cursor(ts, row_id) -> str:
+    raw = json.dumps([ts.isoformat() if ts is not None else None, row_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        ts, row_id = json.loads(base64.urlsafe_b64decode(padded))
+        return (datetime.fromisoformat(ts) if ts is not None else None), int(row_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def parse_fields(fields: Optional[str], allowed: list) -> list:
+    """Validates a comma-separated `fields=` projection (case-insensitive) against allowed columns."""
+    if not fields:
+        return list(allowed)
+    by_lower = {c.lower(): c for c in allowed}
+    out = []
+    for name in fields.split(","):
+        name = name.strip()
+        if not name:
+            continue
+        col = by_lower.get(name.lower())
+        if col is None:
+            raise HTTPException(status_code=400, detail=f"Unknown field '{name}'")
+        if col not in out:
+            out.append(col)
+    return out
+
+
+class ListFilters:
+    def __init__(self, contract_type: Optional[str] = None, request_type: Optional[str] = None,
+                 created_from: Optional[datetime] = None, created_to: Optional[datetime] = None,
+                 provider_name: Optional[str] = None):
+        self.contract_type = contract_type
+        self.request_type = request_type
+        self.created_from = created_from
+        self.created_to = created_to
+        self.provider_name = provider_name
+
+    def where(self):
+        clauses, params = [], []
+        if self.contract_type:
+            clauses.append("ContractType = ?")
+            params.append(self.contract_type)
+        if self.request_type:
+            clauses.append("RequestType = ?")
+            params.append(self.request_type)
+        if self.created_from:
+            clauses.append("CreatedAt >= ?")
+            params.append(self.created_from)
+        if self.created_to:
+            clauses.append("CreatedAt < ?")
+            params.append(self.created_to)
+        if self.provider_name:
+            clauses.append("ProvidersName = ?")
+            params.append(self.provider_name)
+        return clauses, params
+
+
+def json_bytes(payload) -> bytes:
+    """Serializes with orjson (datetimes as ISO 8601), skipping FastAPI's jsonable_encoder pass."""
+    return orjson.dumps(payload, default=str)
+
+
+def page_query(status_where: str, sort_col: str, columns: list, filters: ListFilters,
+               cursor: Optional[str], limit: int):
+    """
+    Builds the SELECT for one page. Sort columns are always selected (needed for the
+    next cursor) and fetched limit + 1 rows tell whether another page exists.
+    """
+    select_cols = list(columns)
+    for c in (sort_col, "Id"):
+        if c not in select_cols:
+            select_cols.append(c)
+
+    clauses, params = filters.where()
+    clauses.insert(0, status_where)
+    if cursor:
+        ts, row_id = decode_cursor(cursor)
+        # The cursor's timestamp only stands in when its row has been deleted since
+        last = f"COALESCE((SELECT {sort_col} FROM Contracts WHERE Id = ?), ?)"
+        clauses.append(f"({sort_col} < {last} OR ({sort_col} = {last} AND Id < ?))")
+        params.extend([row_id, ts, row_id, ts, row_id])
+
+    query = (
+        f"SELECT TOP (?) {', '.join(select_cols)} FROM Contracts "
+        f"WHERE {' AND '.join(clauses)} "
+        f"ORDER BY {sort_col} DESC, Id DESC"
+    )
+    return query, [limit + 1] + params
+
+
+def export_query(status_where: str, sort_col: str, columns: list, filters: ListFilters):
+    """SELECT for a full, unpaginated export in listing order."""
+    clauses, params = filters.where()
+    clauses.insert(0, status_where)
+    query = (
+        f"SELECT {', '.join(columns)} FROM Contracts "
+        f"WHERE {' AND '.join(clauses)} "
+        f"ORDER BY {sort_col} DESC, Id DESC"
+    )
+    return query, params
+
+
+def build_page(cursor_obj, columns: list, sort_col: str, limit: int) -> dict:
+    """Reads up to limit + 1 rows and returns {"items": [...], "next_cursor": ...}."""
+    names = [c[0] for c in cursor_obj.description]
+    rows = cursor_obj.fetchmany(limit + 1)
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    items = []
+    for row in rows:
+        record = dict(zip(names, row))
+        items.append({c: record[c] for c in columns})
+
+    next_cursor = None
+    if has_more and rows:
+        last = dict(zip(names, rows[-1]))
+        next_cursor = encode_cursor(last[sort_col], last["Id"])
+    return {"items": items, "next_cursor": next_cursor}
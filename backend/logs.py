@@ -0,0 +1,146 @@
+"""
+Structured JSON logging shared by the backend and the workers.
+
+Records are written as one JSON object per line (ts, level, logger, msg, the current
+trace/span ids and any structured fields) by a background thread: the calling thread
+only puts the record on a bounded queue, so logging never waits on stdout. When the
+queue is full the record is dropped and counted rather than blocking a request.
+
+High-volume success lines (a contract stored, an email sent, an outbox push) are logged
+with sampled=True and kept with probability LOG_SAMPLE_RATE; warnings and errors are
+never sampled.
+
+    log = get_logger("store-worker")
+    log.info("contract stored", extra=fields(contractId=cid, task=task_id, sampled=True))
+
+    LOG_LEVEL=INFO          # DEBUG adds per-batch detail (e.g. store worker row counts)
+    LOG_SAMPLE_RATE=0.1     # share of sampled success lines kept
+    LOG_QUEUE_SIZE=10000    # records buffered before dropping
+"""
+import atexit
+import copy
+import json
+import logging
+import os
+import queue
+import random
+import sys
+import threading
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+from tracing import current_span
+
+# LogRecord attributes that are not structured fields
+_RESERVED = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+
+def fields(sampled: bool = False, **values) -> dict:
+    """extra= for a log call: structured values, and whether the line is a sampled success line."""
+    return {"fields": values, "sampled": sampled}
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        if getattr(record, "trace_id", None):
+            entry["trace_id"] = record.trace_id
+            entry["span_id"] = record.span_id
+        entry.update(getattr(record, "fields", None) or {})
+        # extra={...} keys passed without fields()
+        entry.update({k: v for k, v in vars(record).items()
+                      if k not in _RESERVED and k not in ("fields", "sampled", "trace_id", "span_id")})
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, default=str, separators=(",", ":"))
+
+
+class ContextFilter(logging.Filter):
+    """
+    Runs on the calling thread: drops unsampled success lines and stamps the record with
+    the current span, which the listener thread cannot see.
+    """
+
+    def __init__(self, sample_rate: float):
+        super().__init__()
+        self.sample_rate = sample_rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if getattr(record, "sampled", False) and random.random() >= self.sample_rate:
+            return False
+        span = current_span()
+        if span is not None:
+            record.trace_id, record.span_id = span.trace_id, span.span_id
+        return True
+
+
+class DroppingQueueHandler(QueueHandler):
+    """QueueHandler that drops (and counts) records instead of blocking when the queue is full."""
+
+    def __init__(self, q: queue.Queue):
+        super().__init__(q)
+        self.dropped = 0
+        self._lock = threading.Lock()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Unlike QueueHandler.prepare, keeps msg and the traceback apart for the JSON formatter
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+
+
+_configured = None
+
+
+def configure() -> DroppingQueueHandler:
+    """Installs the queued JSON handler on the root logger once per process."""
+    global _configured
+    if _configured is not None:
+        return _configured
+
+    q = queue.Queue(maxsize=int(os.getenv("LOG_QUEUE_SIZE", "10000")))
+    handler = DroppingQueueHandler(q)
+    handler.addFilter(ContextFilter(float(os.getenv("LOG_SAMPLE_RATE", "0.1"))))
+
+    stream = logging.StreamHandler(sys.stdout)
+    stream.setFormatter(JsonFormatter())
+    listener = QueueListener(q, stream, respect_handler_level=False)
+    listener.start()
+    atexit.register(listener.stop)
+
+    root = logging.getLogger()
+    root.addHandler(handler)
+    root.setLevel(os.getenv("LOG_LEVEL", "INFO").upper())
+    # httpx logs every engine-rest request at INFO
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    _configured = handler
+    return handler
+
+
+def get_logger(name: str) -> logging.Logger:
+    configure()
+    return logging.getLogger(name)
+
+
+def stats() -> dict:
+    """Queue depth and records dropped because the queue was full."""
+    handler = configure()
+    return {"queued": handler.queue.qsize(), "dropped": handler.dropped}
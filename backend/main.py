@@ -1,11 +1,64 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import Depends, FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from db import get_connection, get_azure_connection
-import sys
+from fastapi.responses import Response, StreamingResponse
+from contextlib import aclosing, asynccontextmanager
+from db import get_connection, get_azure_connection, azure_pool
+from camunda_client import AsyncCamundaClient, CamundaClient, variable
+from cache import TTLCache
+from http_cache import VERSION_SQL, ResponseCache, etag_matches
+from executors import Limiter, SqlExecutor
+from outbox import OutboxDispatcher
+from offers import apply_offer, modifications, submit_offers
+from metrics import HTTP_SECONDS, exposition, register_stats
+from logs import fields, get_logger, stats as log_stats
+from tracing import SERVER, TRACEPARENT_VARIABLE, current_traceparent, start_span
+from prometheus_client import CONTENT_TYPE_LATEST
+import status_counts
+import asyncio
+import os
+import time
+import uuid
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
+from datetime import datetime
+from listing import (CONTRACT_COLUMNS, PROVIDER_COLUMNS, ListFilters, build_page, export_query, json_bytes,
+                     page_query, parse_fields)
+from export import EXPORT_FORMATS, export_stream
+from changes import ChangeNotifier, decode_token, read_changes, sse_event
+from provider_snapshot import ProviderSnapshot
+from invalidation import Invalidator
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Pre-open min_size connections so the first requests skip the TLS/login handshake
+    try:
+        await sql.call(azure_pool.warm)
+    except Exception as e:
+        log.warning("Azure SQL pool warm-up failed: %s", e)
+    dispatcher.start()
+    if CACHE_INVALIDATION == "postgres":
+        invalidator.start(asyncio.get_running_loop(), apply_invalidation, INVALIDATION_KINDS)
+    snapshot_task = None
+    if PROVIDER_SNAPSHOT_MAX_STALENESS_SEC > 0:
+        # Loaded before the first request; the loop retries if the database is not up yet
+        try:
+            await provider_snapshot.refresh()
+        except Exception as e:
+            log.warning("Provider snapshot load failed: %s", e)
+        snapshot_task = asyncio.create_task(
+            provider_snapshot.run(change_notifier.wait, PROVIDER_SNAPSHOT_REFRESH_SEC, log))
+    yield
+    if snapshot_task is not None:
+        snapshot_task.cancel()
+    invalidator.stop()
+    dispatcher.stop()
+    sql.shutdown()
+    azure_pool.close()
+    camunda.close()
+    await camunda_async.aclose()
+
+app = FastAPI(lifespan=lifespan)
+log = get_logger("backend")
 
 app.add_middleware(
     CORSMiddleware,
@@ -15,34 +68,96 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def observe_request(request: Request, call_next):
+    """
+    One server span per request, continuing the caller's `traceparent` header and returned
+    in the response's; latency is recorded per route template (not per contract id).
+    """
+    if request.url.path == "/metrics":
+        return await call_next(request)
+    t0 = time.perf_counter()
+    with start_span(f"{request.method} {request.url.path}", parent=request.headers.get("traceparent") or None,
+                    kind=SERVER, attributes={"http.method": request.method}) as span:
+        status = 500
+        try:
+            response = await call_next(request)
+            status = response.status_code
+            response.headers["traceparent"] = span.traceparent
+            return response
+        finally:
+            route = getattr(request.scope.get("route"), "path", "unmatched")
+            span.name = f"{request.method} {route}"
+            span.set_attribute("http.route", route)
+            span.set_attribute("http.status_code", status)
+            if status >= 500:
+                span.record_error(f"HTTP {status}")
+            HTTP_SECONDS.labels(request.method, route, str(status)).observe(time.perf_counter() - t0)
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus exposition: request / SQL / Camunda latency histograms and pool, cache and outbox gauges."""
+    return Response(exposition(), media_type=CONTENT_TYPE_LATEST)
+
 @app.get("/")
-def home():
+async def home():
     return {"message": "Backend is running!"}
     
 @app.get("/test-db")
-def test_db():
+async def test_db():
     try:
-        conn = get_connection()
+        conn = await sql.call(get_connection)
         conn.close()
         return {"status": "ok", "message": "Database connected"}
     except Exception as e:
         return {"status": "error", "message": str(e)}
 
+@app.get("/outbox-stats")
+async def outbox_stats():
+    """
+    Returns Camunda outbox depth, lag of the oldest pending update and dispatcher counters.
+    """
+    try:
+        return await sql.run(lambda conn: dispatcher.stats(conn.cursor()))
+    except HTTPException:
+        raise
+    except Exception as e:
+        log.exception("Error in /outbox-stats")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/pool-stats")
+async def pool_stats():
+    """
+    Returns Azure SQL connection pool counters (checked out, waiting, created, recycled, ...)
+    and the in-flight / waiting / rejected counts of the SQL executor and Camunda limits.
+    """
+    return {**azure_pool.stats(), "sql_executor": sql.stats(), "camunda_limit": camunda_limit.stats()}
+
+@app.get("/cache-stats")
+async def cache_stats():
+    """
+    Returns listing cache hits / misses, hit rate, 304s and response bytes sent vs saved by 304s,
+    the provider snapshot's size, staleness and hit / fallback counts, and the cross-process
+    invalidation channel's counters.
+    """
+    return {**listing_cache.stats(), "provider_snapshot": provider_snapshot.stats(),
+            "invalidation": invalidator.stats()}
+
 @app.get("/stats")
-def get_stats():
+async def get_stats():
     """
     Returns counts for Submitted, Approved, and Rejected contracts from Azure SQL.
+    Served from the ContractStatusCounts table, cached for STATS_CACHE_TTL_SEC.
     """
+    stats = stats_cache.get("stats")
+    if stats is not None:
+        return stats
     try:
-        conn = get_azure_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute("SELECT ContractStatus, COUNT(*) FROM Contracts GROUP BY ContractStatus")
-        rows = cursor.fetchall()
-        
+        counts = await sql.run(lambda conn: status_counts.read(conn.cursor()))
+
         stats = {"submitted": 0, "approved": 0, "rejected": 0}
-        
-        for status, count in rows:
+
+        for status, count in counts.items():
             s = status.lower() if status else ""
             if s == "submitted" or s == "running":
                 stats["submitted"] += count
@@ -50,18 +165,61 @@ def get_stats():
                 stats["approved"] += count
             elif s == "rejected":
                 stats["rejected"] += count
-        
-        conn.close()
-        
+
+        stats_cache.set("stats", stats)
         return stats
+    except HTTPException:
+        raise
     except Exception as e:
-        print(f"Error in /stats: {e}", file=sys.stderr)
+        log.exception("Error in /stats")
         raise HTTPException(status_code=500, detail=str(e))
 
+async def list_filters(
+    contract_type: Optional[str] = Query(None, alias="contractType"),
+    request_type: Optional[str] = Query(None, alias="requestType"),
+    created_from: Optional[datetime] = Query(None, alias="createdFrom"),
+    created_to: Optional[datetime] = Query(None, alias="createdTo"),
+    provider_name: Optional[str] = Query(None, alias="providerName"),
+) -> ListFilters:
+    return ListFilters(contract_type, request_type, created_from, created_to, provider_name)
+
+# Status filter and keyset sort column per listing status
+STATUS_LISTINGS = {
+    "submitted": ("ContractStatus IN ('Submitted', 'Running')", "CreatedAt"),
+    "approved": ("ContractStatus = 'Approved'", "ApprovedAt"),
+    "rejected": ("ContractStatus = 'Rejected'", "RejectedAt"),
+}
+
+def fetch_page(conn, query: str, params: list, columns: list, sort_col: str, limit: int) -> dict:
+    cur = conn.cursor()
+    cur.execute(query, *params)
+    return build_page(cur, columns, sort_col, limit)
+
+async def read_version():
+    return await sql.run(lambda conn: tuple(conn.cursor().execute(VERSION_SQL).fetchone()))
+
+async def cached_page(request: Request, query: str, params: list, columns: list, sort_col: str, limit: int):
+    """Serves a listing page from listing_cache, answering If-None-Match with 304."""
+    async def build_body():
+        return json_bytes(await sql.run(fetch_page, query, params, columns, sort_col, limit))
+
+    key = f"{request.url.path}?{request.url.query}"
+    return await listing_cache.respond(key, request.headers.get("if-none-match"), read_version, build_body)
+
 @app.get("/contracts/{status}")
-def get_contracts(status: str):
+async def get_contracts(
+    request: Request,
+    status: str,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    filters: ListFilters = Depends(list_filters),
+):
     """
-    Returns list of contracts based on status: 'submitted', 'approved', 'rejected'.
+    Returns a page of contracts based on status: 'submitted', 'approved', 'rejected'.
+    Newest first; pass `next_cursor` back as `cursor` for the next page.
+    `fields` is an optional comma-separated column projection.
+    Responses carry an ETag; send it back in If-None-Match to get a 304 when nothing changed.
     """
     status = status.lower()
     allowed = ["submitted", "approved", "rejected"]
@@ -69,41 +227,181 @@ def get_contracts(status: str):
         raise HTTPException(status_code=400, detail="Invalid status. Must be submitted, approved, or rejected.")
     
     try:
-        conn = get_azure_connection()
-        cursor = conn.cursor()
-        
         # Map frontend status to DB status
         # 'submitted' could match 'Submitted' or 'Running'
         # 'approved' matches 'Approved'
         # 'rejected' matches 'Rejected'
-        
-        if status == "submitted":
-            query = "SELECT * FROM Contracts WHERE ContractStatus IN ('Submitted', 'Running') ORDER BY CreatedAt DESC"
-        elif status == "approved":
-             query = "SELECT * FROM Contracts WHERE ContractStatus = 'Approved' ORDER BY ApprovedAt DESC"
-        else: # rejected
-             query = "SELECT * FROM Contracts WHERE ContractStatus = 'Rejected' ORDER BY RejectedAt DESC"
-            
-        cursor.execute(query)
-        rows = cursor.fetchall()
-        
-        # Convert rows to list of dicts
-        columns = [column[0] for column in cursor.description]
-        results = []
-        for row in rows:
-            results.append(dict(zip(columns, row)))
-            
-        conn.close()
-        return results
-        
+        status_where, sort_col = STATUS_LISTINGS[status]
+        columns = parse_fields(fields, CONTRACT_COLUMNS)
+        query, params = page_query(status_where, sort_col, columns, filters, cursor, limit)
+        return await cached_page(request, query, params, columns, sort_col, limit)
+
+    except HTTPException:
+        raise
     except Exception as e:
-        print(f"Error in /contracts/{status}: {e}", file=sys.stderr)
+        log.exception("Error in /contracts/%s", status)
         raise HTTPException(status_code=500, detail=str(e))
 
-        
-import requests
 
-CAMUNDA_URL = "http://camunda:8080/engine-rest" # Use docker service name if running in docker
+async def export_batches(query: str, params: list):
+    async with export_limit.slot():
+        # aclosing: closing this generator closes the stream (and returns its connection) now,
+        # not whenever the abandoned inner generator is garbage-collected
+        async with aclosing(sql.stream(query, params, EXPORT_BATCH_SIZE)) as batches:
+            async for batch in batches:
+                yield batch
+
+@app.get("/contracts/{status}/export")
+async def export_contracts(
+    status: str,
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    fields: Optional[str] = None,
+    filters: ListFilters = Depends(list_filters),
+):
+    """
+    Streams every contract with the given status as NDJSON (one object per line) or CSV,
+    newest first. Accepts the same `fields` and filters as the paginated listing.
+    """
+    status = status.lower()
+    if status not in STATUS_LISTINGS:
+        raise HTTPException(status_code=400, detail="Invalid status. Must be submitted, approved, or rejected.")
+
+    try:
+        status_where, sort_col = STATUS_LISTINGS[status]
+        columns = parse_fields(fields, CONTRACT_COLUMNS)
+        query, params = export_query(status_where, sort_col, columns, filters)
+
+        # Run the query before sending headers so SQL errors still become a 500
+        batches = export_batches(query, params)
+        try:
+            first = await batches.__anext__()
+        except StopAsyncIteration:
+            first = (columns, [])
+    except HTTPException:
+        raise
+    except Exception as e:
+        log.exception("Error in /contracts/%s/export", status)
+        raise HTTPException(status_code=500, detail=str(e))
+
+    return StreamingResponse(
+        export_stream(first, batches, format),
+        media_type=EXPORT_FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="contracts-{status}.{format}"'},
+    )
+
+
+# SQL runs on its own threads, one per pooled connection, not on Starlette's threadpool
+sql = SqlExecutor(
+    azure_pool,
+    threads=int(os.getenv("SQL_EXECUTOR_THREADS", str(azure_pool.max_size))),
+    queue_timeout=float(os.getenv("SQL_QUEUE_TIMEOUT_SEC", "10")),
+)
+
+# Pooled engine-rest clients; CAMUNDA_URL defaults to the docker service name.
+# The sync client serves the outbox dispatcher thread, the async one the endpoints.
+camunda = CamundaClient.from_env()
+camunda_async = AsyncCamundaClient.from_env()
+
+# Concurrent /export streams; each holds one SQL connection until the download finishes
+export_limit = Limiter("Export", int(os.getenv("EXPORT_CONCURRENCY", "2")), queue_timeout=0.5)
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+
+# Concurrent engine-rest calls from request handlers
+camunda_limit = Limiter(
+    "Camunda",
+    int(os.getenv("CAMUNDA_CONCURRENCY", "20")),
+    queue_timeout=float(os.getenv("CAMUNDA_QUEUE_TIMEOUT_SEC", "10")),
+)
+
+# Drafts per POST /start-process/batch and how many of them start at once; each start also
+# takes a camunda_limit slot, so a batch never uses more than CAMUNDA_CONCURRENCY calls
+START_BATCH_MAX = int(os.getenv("START_BATCH_MAX", "500"))
+START_BATCH_CONCURRENCY = int(os.getenv("START_BATCH_CONCURRENCY", "10"))
+
+# contractId -> Camunda processInstanceId, for contracts whose row lacks ProcessInstanceId
+instance_cache = TTLCache(
+    maxsize=int(os.getenv("INSTANCE_CACHE_SIZE", "10000")),
+    ttl=float(os.getenv("INSTANCE_CACHE_TTL_SEC", "3600")),
+)
+
+# Serialized listing pages, revalidated against MIN_ACTIVE_ROWVERSION() every LISTING_VERSION_TTL_SEC
+listing_cache = ResponseCache(
+    maxsize=int(os.getenv("LISTING_CACHE_SIZE", "1000")),
+    ttl=float(os.getenv("LISTING_CACHE_TTL_SEC", "300")),
+    version_ttl=float(os.getenv("LISTING_VERSION_TTL_SEC", "1")),
+)
+
+# /stats answer; ContractStatusCounts changes from the workers show up after at most this TTL
+stats_cache = TTLCache(maxsize=1, ttl=float(os.getenv("STATS_CACHE_TTL_SEC", "5")))
+
+# Drains CamundaOutbox rows written by the provider PATCH
+dispatcher = OutboxDispatcher(
+    get_azure_connection,
+    camunda,
+    instance_cache,
+    batch_size=int(os.getenv("OUTBOX_BATCH_SIZE", "100")),
+    poll_interval=float(os.getenv("OUTBOX_POLL_SEC", "1.0")),
+    concurrency=int(os.getenv("OUTBOX_CONCURRENCY", "4")),
+    max_backoff=float(os.getenv("OUTBOX_MAX_BACKOFF_SEC", "300")),
+)
+
+# Existing stats() dicts as gauges on GET /metrics, read at scrape time
+register_stats("azure_pool", azure_pool.stats, "Azure SQL connection pool")
+register_stats("sql_executor", sql.stats, "SQL executor slots")
+register_stats("camunda_limit", camunda_limit.stats, "Concurrent engine-rest calls from request handlers")
+register_stats("export_limit", export_limit.stats, "Concurrent export streams")
+register_stats("listing_cache", listing_cache.stats, "Listing response cache")
+register_stats("outbox_dispatcher", dispatcher.counters, "Camunda outbox dispatcher")
+register_stats("log_queue", log_stats, "Queued JSON log handler")
+
+# Provider change feed: rows per page / SSE event, how often open streams re-check the
+# row version for worker writes (PATCHes wake them at once), and how many streams may be open
+CHANGES_PAGE_MAX = int(os.getenv("CHANGES_PAGE_MAX", "1000"))
+CHANGES_POLL_SEC = float(os.getenv("CHANGES_POLL_SEC", "1"))
+CHANGES_HEARTBEAT_SEC = float(os.getenv("CHANGES_HEARTBEAT_SEC", "15"))
+change_streams = Limiter("Change stream", int(os.getenv("CHANGES_STREAM_MAX", "100")), queue_timeout=0.5)
+change_notifier = ChangeNotifier()
+register_stats("change_streams", change_streams.stats, "Open provider change streams")
+
+# Open contracts held in memory for GET /api/providers/contracts: synced every
+# PROVIDER_SNAPSHOT_REFRESH_SEC (and on PATCH); served only while confirmed current within
+# PROVIDER_SNAPSHOT_MAX_STALENESS_SEC, else the SQL listing answers (0 disables the snapshot)
+PROVIDER_SNAPSHOT_MAX_STALENESS_SEC = float(os.getenv("PROVIDER_SNAPSHOT_MAX_STALENESS_SEC", "5"))
+PROVIDER_SNAPSHOT_REFRESH_SEC = float(os.getenv("PROVIDER_SNAPSHOT_REFRESH_SEC", "0.5"))
+provider_snapshot = ProviderSnapshot(
+    sql.run,
+    lambda: listing_cache.version(read_version),
+    max_staleness=PROVIDER_SNAPSHOT_MAX_STALENESS_SEC,
+)
+register_stats("provider_snapshot", provider_snapshot.stats, "In-memory provider listing snapshot")
+
+# Multi-process deployments (gunicorn): CACHE_INVALIDATION=postgres broadcasts PATCH
+# invalidations to the other worker processes over LISTEN / NOTIFY on the Camunda database
+CACHE_INVALIDATION = os.getenv("CACHE_INVALIDATION", "off").lower()
+invalidator = Invalidator(
+    get_connection,
+    channel=os.getenv("INVALIDATION_CHANNEL", "backend_invalidation"),
+    keepalive=float(os.getenv("INVALIDATION_KEEPALIVE_SEC", "30")),
+)
+register_stats("cache_invalidation", invalidator.stats, "Cross-process cache invalidation channel")
+INVALIDATION_KINDS = ("listing", "stats", "outbox")
+
+def apply_invalidation(kinds):
+    """Drops what a Contracts write made stale; runs for local writes and for other processes' ones."""
+    if "outbox" in kinds:
+        dispatcher.notify()
+    if "stats" in kinds:
+        stats_cache.clear()
+    if "listing" in kinds:
+        listing_cache.invalidate()
+        provider_snapshot.mark_dirty()
+        change_notifier.notify()
+
+def contracts_written(outbox: bool, stats: bool):
+    """After a committed provider write: invalidates this process and tells the others."""
+    kinds = ["listing"] + (["outbox"] if outbox else []) + (["stats"] if stats else [])
+    apply_invalidation(kinds)
+    invalidator.publish(kinds)
 
 class ProviderUpdate(BaseModel):
     providersBudget: Optional[int] = None
@@ -111,106 +409,154 @@ class ProviderUpdate(BaseModel):
     meetRequirement: Optional[str] = None
     providersName: Optional[str] = None
 
+class ProviderOffer(ProviderUpdate):
+    contractId: str
+
+# Offers accepted per bulk PATCH; they are written in one transaction
+PROVIDER_BULK_MAX = int(os.getenv("PROVIDER_BULK_MAX", "1000"))
+
 @app.get("/api/providers/contracts")
-def get_provider_contracts():
+async def get_provider_contracts(
+    request: Request,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    filters: ListFilters = Depends(list_filters),
+):
     """
-    Returns contracts for providers that are in 'Submitted' or 'Running' status.
+    Returns a page of contracts for providers that are in 'Submitted' or 'Running' status.
+    Newest first; pass `next_cursor` back as `cursor` for the next page.
+    Responses carry an ETag; send it back in If-None-Match to get a 304 when nothing changed.
+    Unprojected, unfiltered pages come from the in-memory snapshot while it is current.
     """
     try:
-        conn = get_azure_connection()
-        cursor = conn.cursor()
-        
+        if PROVIDER_SNAPSHOT_MAX_STALENESS_SEC > 0 and not fields and not filters.where()[0]:
+            cached = await provider_snapshot.page(limit, cursor)
+            if cached is not None:
+                etag, body = cached
+                headers = {"ETag": etag, "Cache-Control": "no-cache"}
+                if etag_matches(request.headers.get("if-none-match"), etag):
+                    return Response(status_code=304, headers=headers)
+                return Response(body, media_type="application/json", headers=headers)
+
         # Select specific fields requested, filtering for 'Submitted' or 'Running' contracts
-        query = """
-            SELECT ContractId, ContractTitle, ContractType, Roles, Skills, RequestType, 
-                   Budget, ContractStartDate, ContractEndDate, Description,
-                   ContractStatus, ProvidersBudget, ProvidersComment, MeetRequirement, ProvidersName
-            FROM Contracts
-            WHERE ContractStatus IN ('Submitted', 'Running')
-            ORDER BY CreatedAt DESC
-        """
-        cursor.execute(query)
-        rows = cursor.fetchall()
-        
-        columns = [column[0] for column in cursor.description]
-        results = []
-        for row in rows:
-            results.append(dict(zip(columns, row)))
-            
-        conn.close()
-        return results
+        status_where, sort_col = STATUS_LISTINGS["submitted"]
+        columns = parse_fields(fields, PROVIDER_COLUMNS)
+        query, params = page_query(status_where, sort_col, columns, filters, cursor, limit)
+        return await cached_page(request, query, params, columns, sort_col, limit)
+    except HTTPException:
+        raise
+    except Exception as e:
+        log.exception("Error in /api/providers/contracts")
+        raise HTTPException(status_code=500, detail=str(e))
+
+def feed_columns(fields: Optional[str]) -> list:
+    """fields= projection for the change feed; ContractId and ContractStatus are always included."""
+    columns = parse_fields(fields, PROVIDER_COLUMNS)
+    return columns + [c for c in ("ContractId", "ContractStatus") if c not in columns]
+
+@app.get("/api/providers/contracts/changes")
+async def get_provider_contract_changes(
+    since: Optional[str] = None,
+    limit: int = Query(500, ge=1, le=CHANGES_PAGE_MAX),
+    fields: Optional[str] = None,
+):
+    """
+    Contracts changed after the `since` token, oldest change first, as
+    {"items": [...], "next": token, "has_more": bool}. Start without `since` (full snapshot),
+    then keep passing `next` back; call again at once while `has_more` is true.
+    Covers every status, so contracts that leave the provider listing show up as Approved / Rejected.
+    """
+    columns = feed_columns(fields)
+    since_rv = decode_token(since)
+    try:
+        page = await sql.run(lambda conn: read_changes(conn.cursor(), columns, since_rv, limit))
+        return Response(json_bytes(page), media_type="application/json")
+    except HTTPException:
+        raise
     except Exception as e:
-        print(f"Error in /api/providers/contracts: {e}", file=sys.stderr)
+        log.exception("Error in /api/providers/contracts/changes")
         raise HTTPException(status_code=500, detail=str(e))
 
+async def change_events(request: Request, columns: list, since: bytes):
+    """
+    SSE messages for one stream: a `changes` event per batch of changed rows (id = the
+    token after it), a comment line as heartbeat. Holds a change_streams slot, not a SQL
+    connection, while idle; the shared row version tells when there is something to read.
+    """
+    async with change_streams.slot():
+        yield b"retry: 3000\n\n"  # EventSource reconnect delay
+        seen_version = None
+        last_sent = time.monotonic()
+        while not await request.is_disconnected():
+            try:
+                version = await listing_cache.version(read_version)
+                if version != seen_version:
+                    page = await sql.run(lambda conn: read_changes(conn.cursor(), columns, since, CHANGES_PAGE_MAX))
+                    if page["items"]:
+                        since = decode_token(page["next"])
+                        last_sent = time.monotonic()
+                        yield sse_event(json_bytes(page["items"]), page["next"], "changes")
+                    if page["has_more"]:
+                        continue
+                    seen_version = version
+            except Exception as e:
+                # e.g. SQL busy (503) or a dropped connection; the next round retries
+                log.warning("Change stream read failed: %s", e)
+            if time.monotonic() - last_sent >= CHANGES_HEARTBEAT_SEC:
+                last_sent = time.monotonic()
+                yield b": keepalive\n\n"
+            await change_notifier.wait(CHANGES_POLL_SEC)
+
+async def primed(first: bytes, events):
+    try:
+        yield first
+        async for event in events:
+            yield event
+    finally:
+        await events.aclose()
+
+@app.get("/api/providers/contracts/changes/stream")
+async def stream_provider_contract_changes(request: Request, since: Optional[str] = None,
+                                           fields: Optional[str] = None):
+    """
+    Server-Sent Events version of /api/providers/contracts/changes: pushes a `changes` event
+    (JSON array of changed contracts) whenever contracts change. Each event's id is the
+    token after it, so a reconnecting EventSource resumes via Last-Event-ID.
+    """
+    columns = feed_columns(fields)
+    since_rv = decode_token(request.headers.get("last-event-id") or since)
+    events = change_events(request, columns, since_rv)
+    # Takes the stream slot before sending headers so a full server answers 503
+    first = await events.__anext__()
+    return StreamingResponse(primed(first, events), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
 @app.patch("/api/providers/contracts/{contract_id}")
-def update_provider_contract(contract_id: str, update: ProviderUpdate):
+async def update_provider_contract(contract_id: str, update: ProviderUpdate):
     """
     Updates providersBudget, providersComment and meetRequirement for a contract.
     This endpoint is used by providers to submit their offers.
-    It also attempts to sync the data back to Camunda process variables if an active instance is found.
+    The matching Camunda variable update is queued in the CamundaOutbox table in the same
+    transaction and pushed to the process instance by the background dispatcher.
     """
     try:
-        conn = get_azure_connection()
-        cursor = conn.cursor()
-        
-        # Check if contract exists
-        cursor.execute("SELECT ContractId, ContractStatus FROM Contracts WHERE ContractId = ?", contract_id)
-        row = cursor.fetchone()
-        if not row:
-            conn.close()
-            raise HTTPException(status_code=404, detail=f"Contract with ID {contract_id} not found")
-            
-        # Update fields in DB
-        query = """
-            UPDATE Contracts
-            SET ContractStatus = 'Running', ProvidersBudget = ?, ProvidersComment = ?, MeetRequirement = ?, ProvidersName = ?
-            WHERE ContractId = ?
-        """
-        cursor.execute(query, update.providersBudget, update.providersComment, update.meetRequirement, update.providersName, contract_id)
-        conn.commit()
-        conn.close()
+        def apply_update(conn):
+            transitions = apply_offer(conn.cursor(), contract_id, update)
+            if transitions is None:
+                raise HTTPException(status_code=404, detail=f"Contract with ID {contract_id} not found")
+            conn.commit()
+            return transitions
 
-        # Camunda Sync: Try to find and update process variables
-        try:
-            print(f"[Camunda Sync] Looking for instance with contractId={contract_id}...")
-            # Use /variable-instance to find the process instance ID
-            # This is more reliable as it searches throughout the process lifecycle
-            instances_res = requests.get(f"{CAMUNDA_URL}/variable-instance?variableName=contractId&variableValue={contract_id}")
-            variables = instances_res.json()
-            
-            if variables:
-                instance_id = variables[0]["processInstanceId"]
-                print(f"[Camunda Sync] Found instance {instance_id}. Updating variables...")
-                
-                # 2. Update variables (handle None/null safely)
-                modifications = {}
-                if update.providersName is not None:
-                    modifications["providersName"] = {"value": update.providersName, "type": "String"}
-                if update.providersBudget is not None:
-                    modifications["providersBudget"] = {"value": int(update.providersBudget), "type": "Integer"}
-                if update.providersComment is not None:
-                    modifications["providersComment"] = {"value": update.providersComment, "type": "String"}
-                if update.meetRequirement is not None:
-                    modifications["meetRequirement"] = {"value": update.meetRequirement, "type": "String"}
-
-                if modifications:
-                    var_payload = {"modifications": modifications}
-                    print(f"[Camunda Sync] Sending payload: {var_payload}")
-                    resp = requests.post(f"{CAMUNDA_URL}/process-instance/{instance_id}/variables", json=var_payload)
-                    print(f"[Camunda Sync] Status Code: {resp.status_code}")
-                    if resp.status_code >= 400:
-                        print(f"[Camunda Sync] Response Body: {resp.text}")
-                    else:
-                        print(f"[Camunda Sync] Successfully pushed variables to {instance_id}")
-            else:
-                print(f"[Camunda Sync] No process instance found with contractId={contract_id}")
-        except Exception as camunda_err:
-            print(f"Warning: Failed to sync with Camunda: {camunda_err}", file=sys.stderr)
+        transitions = await sql.run(apply_update)
+
+        contracts_written(outbox=bool(modifications(update)), stats=bool(status_counts.deltas(transitions)))
+        log.info("Provider offer stored", extra=fields(contractId=contract_id, sampled=True,
+                                                       updated=sorted(update.model_dump(exclude_none=True))))
 
         return {
             "status": "success",
-            "message": "Contract updated and synced successfully",
+            "message": "Contract updated, Camunda sync queued",
             "contractId": contract_id,
             "updatedFields": {
                 "providersBudget": update.providersBudget,
@@ -223,11 +569,71 @@ def update_provider_contract(contract_id: str, update: ProviderUpdate):
     except HTTPException:
         raise
     except Exception as e:
-        print(f"Error in PATCH /api/providers/contracts: {e}", file=sys.stderr)
+        log.exception("Error in PATCH /api/providers/contracts", extra=fields(contractId=contract_id))
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.patch("/api/providers/contracts")
+async def update_provider_contracts(offers: List[ProviderOffer]):
+    """
+    Bulk version of PATCH /api/providers/contracts/{contract_id}: applies up to
+    PROVIDER_BULK_MAX offers, keyed by contractId, in one transaction with a set-based UPDATE
+    and queues their Camunda variable updates in the outbox.
+    Returns one result per offer, in request order, with an HTTP-style status:
+    200 updated, 400 invalid or duplicate contractId, 404 not found, 500 failed.
+    """
+    if len(offers) > PROVIDER_BULK_MAX:
+        raise HTTPException(status_code=413, detail=f"At most {PROVIDER_BULK_MAX} offers per request")
+
+    # Invalid ids would fail the whole set-based UPDATE, duplicates would make it ambiguous
+    keys, batch, seen = [], [], set()
+    for offer in offers:
+        try:
+            key = str(uuid.UUID(offer.contractId))
+        except ValueError:
+            keys.append((None, "Invalid contractId"))
+            continue
+        if key in seen:
+            keys.append((None, "Duplicate contractId in request"))
+            continue
+        seen.add(key)
+        keys.append((key, None))
+        batch.append((key, offer))
+
+    try:
+        applied, errors = await sql.run(submit_offers, batch) if batch else ({}, {})
+    except HTTPException:
+        raise
+    except Exception as e:
+        log.exception("Error in bulk PATCH /api/providers/contracts", extra=fields(offers=len(offers)))
+        raise HTTPException(status_code=500, detail=str(e))
+
+    if applied:
+        contracts_written(
+            outbox=any(modifications(offer) for key, offer in batch if key in applied),
+            stats=bool(status_counts.deltas([t for transitions in applied.values() for t in transitions])),
+        )
+
+    results = []
+    for offer, (key, invalid) in zip(offers, keys):
+        if invalid:
+            results.append({"contractId": offer.contractId, "status": 400, "detail": invalid})
+        elif key in applied:
+            results.append({"contractId": offer.contractId, "status": 200})
+        elif key in errors:
+            log.error("Error in bulk PATCH /api/providers/contracts: %s", errors[key], extra=fields(contractId=key))
+            results.append({"contractId": offer.contractId, "status": 500, "detail": str(errors[key])})
+        else:
+            results.append({"contractId": offer.contractId, "status": 404,
+                            "detail": f"Contract with ID {offer.contractId} not found"})
+    return {
+        "status": "success" if len(applied) == len(offers) else "partial",
+        "updated": len(applied),
+        "failed": len(offers) - len(applied),
+        "results": results,
+    }
+
 @app.post("/start-process")
-def start_process(data: dict):
+async def start_process(data: dict):
     """
     Starts the Camunda process and passes initial variables.
     """
@@ -236,18 +642,89 @@ def start_process(data: dict):
         "variables": {
             "contractTitle": {"value": data.get("contractTitle"), "type": "String"},
             "requestedBy": {"value": data.get("requestedBy"), "type": "String"},
+            # lets the workers' spans join this request's trace
+            TRACEPARENT_VARIABLE: {"value": current_traceparent(), "type": "String"},
         }
     }
     
     try:
-        print(f"Starting process in Camunda: {data.get('contractTitle')}")
-        res = requests.post(
-            f"{CAMUNDA_URL}/process-definition/key/contractTool/start",
-            json=payload,
-            timeout=10
-        )
-        res.raise_for_status()
-        return {"camunda_response": res.json()}
+        log.info("Starting process in Camunda", extra=fields(contractTitle=data.get("contractTitle"), sampled=True))
+        async with camunda_limit.slot():
+            response = await camunda_async.start_process("contractTool", payload["variables"])
+        return {"camunda_response": response}
+    except HTTPException:
+        raise
     except Exception as e:
-        print(f"Failed to start Camunda process: {e}", file=sys.stderr)
+        log.warning("Failed to start Camunda process: %s", e)
         return {"error": str(e)}
+
+
+class ContractDraft(BaseModel):
+    contractTitle: Optional[str] = None
+    requestedBy: Optional[str] = None
+    contractType: Optional[str] = None
+    roles: Optional[str] = None
+    skills: Optional[str] = None
+    requestType: Optional[str] = None
+    budget: Optional[float] = None
+    contractStartDate: Optional[str] = None
+    contractEndDate: Optional[str] = None
+    description: Optional[str] = None
+    businessKey: Optional[str] = None
+
+# Process variables of the contractDraft form, read by the store-create-contract worker
+DRAFT_VARIABLES = {
+    "contractTitle": "String",
+    "requestedBy": "String",
+    "contractType": "String",
+    "roles": "String",
+    "skills": "String",
+    "requestType": "String",
+    "budget": "Double",
+    "contractStartDate": "String",
+    "contractEndDate": "String",
+    "description": "String",
+}
+
+def draft_variables(draft: ContractDraft) -> dict:
+    values = draft.model_dump()
+    variables = {name: variable(values[name], t) for name, t in DRAFT_VARIABLES.items() if values[name] is not None}
+    variables[TRACEPARENT_VARIABLE] = variable(current_traceparent(), "String")
+    return variables
+
+async def start_draft(draft: ContractDraft) -> dict:
+    try:
+        async with camunda_limit.slot():
+            response = await camunda_async.start_process("contractTool", draft_variables(draft), draft.businessKey)
+        return {"status": 200, "processInstanceId": response["id"], "businessKey": response.get("businessKey")}
+    except HTTPException as e:
+        return {"status": e.status_code, "detail": e.detail}
+    except Exception as e:
+        log.warning("Failed to start Camunda process: %s", e, extra=fields(contractTitle=draft.contractTitle))
+        return {"status": 502, "detail": str(e)}
+
+@app.post("/start-process/batch")
+async def start_processes(drafts: List[ContractDraft]):
+    """
+    Starts one contractTool instance per draft, START_BATCH_CONCURRENCY at a time, with all
+    draft fields (contractType, roles, skills, budget, dates, ...) set as process variables.
+    Returns one result per draft, in request order, with the processInstanceId or an error
+    (503 Camunda busy, 502 engine error).
+    """
+    if len(drafts) > START_BATCH_MAX:
+        raise HTTPException(status_code=413, detail=f"At most {START_BATCH_MAX} drafts per request")
+
+    gate = asyncio.Semaphore(START_BATCH_CONCURRENCY)
+
+    async def start(draft):
+        async with gate:
+            return await start_draft(draft)
+
+    results = await asyncio.gather(*[start(d) for d in drafts])
+    started = sum(1 for r in results if r["status"] == 200)
+    return {
+        "status": "success" if started == len(drafts) else "partial",
+        "started": started,
+        "failed": len(drafts) - started,
+        "results": [{"index": i, **r} for i, r in enumerate(results)],
+    }
@@ -0,0 +1,116 @@
+"""
+Prometheus metrics shared by the backend (GET /metrics) and the workers (METRICS_PORT).
+
+Latencies are histograms in seconds. Component stats that already exist as dicts (the Azure
+SQL pool, the limiters, the caches, the SMTP pool) are exposed as gauges read at scrape
+time via register_stats(), so they need no extra bookkeeping on the hot path.
+
+Under gunicorn (PROMETHEUS_MULTIPROC_DIR set by gunicorn.conf.py) histograms and counters
+are summed over all worker processes; the stats gauges are those of the process that
+answered the scrape.
+"""
+import os
+import re
+
+from prometheus_client import Counter, Gauge, Histogram, generate_latest, multiprocess, start_http_server
+from prometheus_client.core import GaugeMetricFamily
+from prometheus_client.registry import REGISTRY, CollectorRegistry
+
+# Long polls (fetchAndLock) and slow engines need buckets beyond prometheus_client's default 10s
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# --- shared ---
+
+CAMUNDA_SECONDS = Histogram("camunda_request_duration_seconds", "engine-rest call latency including retries",
+                            ["method", "endpoint", "status"], buckets=LATENCY_BUCKETS)
+SQL_SECONDS = Histogram("sql_duration_seconds", "Azure SQL unit of work latency (query or transaction)",
+                        ["operation"], buckets=LATENCY_BUCKETS)
+
+# --- backend ---
+
+HTTP_SECONDS = Histogram("http_request_duration_seconds", "Request latency until the response headers are sent",
+                         ["method", "route", "status"], buckets=LATENCY_BUCKETS)
+
+# --- workers ---
+
+WORKER_FETCH_SECONDS = Histogram("worker_fetch_duration_seconds", "fetchAndLock latency, long polling included",
+                                 ["outcome"], buckets=LATENCY_BUCKETS)
+WORKER_TASKS_FETCHED = Counter("worker_tasks_fetched", "External tasks locked", ["topic"])
+WORKER_TASKS_COMPLETED = Counter("worker_tasks_completed", "External tasks completed", ["topic"])
+WORKER_TASKS_FAILED = Counter("worker_tasks_failed", "External tasks reported as failed", ["topic"])
+WORKER_REPORT_ERRORS = Counter("worker_report_errors", "complete / failure calls that did not reach Camunda",
+                               ["topic"])
+WORKER_BATCH_SIZE = Histogram("worker_batch_size", "Tasks per handler batch", ["topic"],
+                              buckets=(1, 2, 5, 10, 20, 50, 100, 200))
+WORKER_HANDLER_SECONDS = Histogram("worker_handler_duration_seconds", "Handler run time per batch", ["topic"],
+                                   buckets=LATENCY_BUCKETS)
+WORKER_BATCHES_IN_FLIGHT = Gauge("worker_batches_in_flight", "Handler batches running", ["topic"])
+WORKER_LOCK_NEAR_MISSES = Counter("worker_lock_near_misses",
+                                  "Batches settled after most of their lock duration had passed", ["topic"])
+WORKER_LOCK_EXPIRED = Counter("worker_lock_expired", "Batches settled after their lock had expired", ["topic"])
+WORKER_LOCK_EXTENSIONS = Counter("worker_lock_extensions", "Task locks extended while their handler ran", ["topic"])
+WORKER_TASKS_UNLOCKED = Counter("worker_tasks_unlocked", "Tasks handed back unprocessed on shutdown", ["topic"])
+WORKER_MAX_TASKS = Gauge("worker_max_tasks", "Adaptive per-fetch task limit", ["topic"])
+
+_UUID_SEGMENT = re.compile(r"/[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}(?=/|$)")
+
+
+def camunda_endpoint(path: str) -> str:
+    """engine-rest path with instance / task ids replaced, to keep label cardinality bounded."""
+    return _UUID_SEGMENT.sub("/{id}", path.split("?", 1)[0])
+
+
+def operation_name(fn) -> str:
+    """'get_stats.<lambda>' for a lambda defined in get_stats(); used as the SQL operation label."""
+    return getattr(fn, "__qualname__", repr(fn)).replace(".<locals>", "")
+
+
+class StatsCollector:
+    """Numeric values of a stats() dict as gauges named <prefix>_<key>; nested dicts are flattened."""
+
+    def __init__(self, prefix: str, stats_fn, documentation: str):
+        self.prefix = prefix
+        self.stats_fn = stats_fn
+        self.documentation = documentation
+
+    def _flatten(self, prefix: str, stats: dict):
+        for key, value in stats.items():
+            name = f"{prefix}_{key}"
+            if isinstance(value, dict):
+                yield from self._flatten(name, value)
+            elif isinstance(value, (bool, int, float)):
+                yield name, float(value)
+
+    def collect(self):
+        try:
+            stats = self.stats_fn()
+        except Exception:
+            return
+        for name, value in self._flatten(self.prefix, stats):
+            yield GaugeMetricFamily(name, self.documentation, value=value)
+
+
+_stats_collectors = []
+
+
+def register_stats(prefix: str, stats_fn, documentation: str):
+    collector = StatsCollector(prefix, stats_fn, documentation)
+    _stats_collectors.append(collector)
+    REGISTRY.register(collector)
+
+
+def exposition() -> bytes:
+    """Body of GET /metrics."""
+    if not os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        return generate_latest()
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    for collector in _stats_collectors:
+        registry.register(collector)
+    return generate_latest(registry)
+
+
+def serve(port: int):
+    """Starts the /metrics HTTP listener of a worker process (port 0 disables it)."""
+    if port:
+        start_http_server(port)
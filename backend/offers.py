@@ -0,0 +1,128 @@
+"""
+Provider offers: writes ProviderUpdates to Contracts and queues the matching Camunda
+variable updates in the CamundaOutbox, inside the caller's transaction.
+
+apply_offer() serves the single-contract PATCH. apply_offers() writes a whole batch with one
+set-based UPDATE per VALUES chunk and one outbox INSERT per chunk; submit_offers() runs it
+as a single transaction and falls back to one transaction per offer if the batch fails, so
+a bad offer only fails its own item.
+"""
+from outbox import enqueue, enqueue_many
+from sql_batch import chunks, values_placeholders
+from status_counts import STATUS_OUTPUT, record
+from tracing import TRACEPARENT_VARIABLE, current_traceparent
+
+OFFER_COLUMNS = "ContractId, ProvidersBudget, ProvidersComment, MeetRequirement, ProvidersName"
+
+OFFER_ROW_SQL = f"""
+    UPDATE Contracts
+    SET ContractStatus = 'Running', ProvidersBudget = ?, ProvidersComment = ?, MeetRequirement = ?, ProvidersName = ?
+    {STATUS_OUTPUT}, inserted.ProcessInstanceId
+    WHERE ContractId = ?
+"""
+
+
+def modifications(update) -> dict:
+    """
+    Camunda variables to sync for a ProviderUpdate (None values are skipped), plus the
+    current traceparent so the dispatcher and the workers continue the request's trace.
+    """
+    mods = {}
+    if update.providersName is not None:
+        mods["providersName"] = {"value": update.providersName, "type": "String"}
+    if update.providersBudget is not None:
+        mods["providersBudget"] = {"value": int(update.providersBudget), "type": "Integer"}
+    if update.providersComment is not None:
+        mods["providersComment"] = {"value": update.providersComment, "type": "String"}
+    if update.meetRequirement is not None:
+        mods["meetRequirement"] = {"value": update.meetRequirement, "type": "String"}
+    traceparent = current_traceparent()
+    if mods and traceparent:
+        mods[TRACEPARENT_VARIABLE] = {"value": traceparent, "type": "String"}
+    return mods
+
+
+def apply_offer(cursor, contract_id: str, update):
+    """Returns [(old_status, new_status)], or None if the contract does not exist."""
+    cursor.execute(OFFER_ROW_SQL, update.providersBudget, update.providersComment, update.meetRequirement,
+                   update.providersName, contract_id)
+    row = cursor.fetchone()
+    if row is None:
+        return None
+    transitions = [(row[0], row[1])]
+    record(cursor, transitions)
+    mods = modifications(update)
+    if mods:
+        enqueue(cursor, contract_id, row[2], mods)
+    return transitions
+
+
+def apply_offers(cursor, offers: list) -> dict:
+    """
+    Set-based apply_offer() for [(contract_id, update)] with distinct contract ids.
+    Returns {contract_id: [(old_status, new_status)]} for the contracts that exist.
+    """
+    ids = {contract_id.lower(): contract_id for contract_id, _ in offers}
+    updates = dict(offers)
+    rows = [
+        (contract_id, u.providersBudget, u.providersComment, u.meetRequirement, u.providersName)
+        for contract_id, u in offers
+    ]
+    applied, outbox_items = {}, []
+    for chunk in chunks(rows, 5):
+        cursor.execute(
+            f"""
+            UPDATE c
+            SET
+                ContractStatus = 'Running',
+                ProvidersBudget = u.ProvidersBudget,
+                ProvidersComment = u.ProvidersComment,
+                MeetRequirement = u.MeetRequirement,
+                ProvidersName = u.ProvidersName
+            {STATUS_OUTPUT}, inserted.ProcessInstanceId, inserted.ContractId
+            FROM Contracts c
+            JOIN (VALUES {values_placeholders(len(chunk), 5)}) AS u({OFFER_COLUMNS})
+              ON c.ContractId = u.ContractId
+            """,
+            *[v for row in chunk for v in row]
+        )
+        output = cursor.fetchall()
+        record(cursor, [(old, new) for old, new, _, _ in output])
+        for old, new, process_instance_id, contract_id in output:
+            contract_id = ids[str(contract_id).lower()]
+            applied[contract_id] = [(old, new)]
+            mods = modifications(updates[contract_id])
+            if mods:
+                outbox_items.append((contract_id, process_instance_id, mods))
+    enqueue_many(cursor, outbox_items)
+    return applied
+
+
+def submit_offers(conn, offers: list) -> tuple:
+    """
+    Applies [(contract_id, update)] in one transaction, or one transaction per offer if
+    the batch fails. Returns ({contract_id: transitions}, {contract_id: exception});
+    ids in neither dict do not exist.
+    """
+    cursor = conn.cursor()
+    try:
+        applied = apply_offers(cursor, offers)
+        conn.commit()
+        return applied, {}
+    except Exception as batch_err:
+        conn.rollback()
+        if len(offers) == 1:
+            return {}, {offers[0][0]: batch_err}
+
+    applied, errors = {}, {}
+    for contract_id, update in offers:
+        try:
+            transitions = apply_offer(cursor, contract_id, update)
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            errors[contract_id] = e
+            continue
+        if transitions is not None:
+            applied[contract_id] = transitions
+    return applied, errors
@@ -0,0 +1,271 @@
+"""
+Transactional outbox for pushing provider offers to Camunda process variables.
+
+The PATCH handler writes its Contracts UPDATE and a CamundaOutbox row in the same
+transaction (enqueue) and returns. OutboxDispatcher drains the table in the background:
+pending rows are read in Id order, coalesced per contract (later values win), pushed to
+Camunda, and deleted on success or rescheduled with exponential backoff on failure.
+
+Rows carry the contract's ProcessInstanceId (stored by the create worker). Only rows
+without one fall back to the contractId cache and then to Camunda's /variable-instance
+search.
+
+Only one dispatcher is active at a time across backend processes; it holds the
+'CamundaOutbox' application lock (sp_getapplock) on its own connection. The others keep
+one standby connection open to retry the lock on, instead of logging in again each time.
+"""
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from logs import fields, get_logger
+from sql_batch import chunks, values_placeholders
+from tracing import TRACEPARENT_VARIABLE, start_span
+
+APP_LOCK = "CamundaOutbox"
+
+log = get_logger("outbox")
+
+
+def enqueue(cursor, contract_id: str, process_instance_id: str, modifications: dict):
+    """Adds a pending Camunda variable update; call inside the caller's transaction."""
+    cursor.execute(
+        "INSERT INTO CamundaOutbox (ContractId, ProcessInstanceId, Modifications) "
+        "VALUES (CONVERT(uniqueidentifier, ?), ?, ?)",
+        contract_id, process_instance_id, json.dumps(modifications)
+    )
+
+
+def enqueue_many(cursor, items: list):
+    """enqueue() for [(contract_id, process_instance_id, modifications)] with one INSERT per chunk."""
+    rows = [(contract_id, pid, json.dumps(mods)) for contract_id, pid, mods in items]
+    for chunk in chunks(rows, 3):
+        cursor.execute(
+            "INSERT INTO CamundaOutbox (ContractId, ProcessInstanceId, Modifications) "
+            f"VALUES {values_placeholders(len(chunk), 3)}",
+            *[v for row in chunk for v in row]
+        )
+
+
+def coalesce(rows: list) -> dict:
+    """
+    Merges pending rows (ordered by Id) per contract; later values win.
+    Returns {contractId: {"modifications": {...}, "ids": [...], "attempts": n, "processInstanceId": ...}}.
+    """
+    merged = {}
+    for outbox_id, contract_id, process_instance_id, payload, attempts in rows:
+        entry = merged.setdefault(str(contract_id).lower(), {
+            "modifications": {}, "ids": [], "attempts": 0, "processInstanceId": None
+        })
+        entry["modifications"].update(json.loads(payload))
+        entry["ids"].append(outbox_id)
+        entry["attempts"] = max(entry["attempts"], attempts)
+        entry["processInstanceId"] = process_instance_id or entry["processInstanceId"]
+    return merged
+
+
+class OutboxDispatcher:
+    def __init__(self, connect, camunda, instance_cache, batch_size: int = 100, poll_interval: float = 1.0,
+                 concurrency: int = 4, max_backoff: float = 300.0):
+        self._connect = connect
+        self.camunda = camunda
+        self.instance_cache = instance_cache
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.concurrency = concurrency
+        self.max_backoff = max_backoff
+
+        self._conn = None
+        self._standby = None  # not the leader: the connection the lock is retried on
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._stats = {"active": False, "dispatched": 0, "coalesced": 0, "failed": 0,
+                       "batches": 0, "last_batch_size": 0, "last_error": None}
+
+    # --- lifecycle ---
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="outbox-dispatcher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout=10)
+        self._reset()
+
+    def notify(self):
+        """Wakes the dispatcher right after a PATCH committed a new outbox row."""
+        self._wake.set()
+
+    # --- connection + leadership ---
+
+    def _reset(self):
+        for conn in (self._conn, self._standby):
+            if conn is not None:
+                try:
+                    conn.close()
+                except Exception:
+                    pass
+        self._conn = self._standby = None
+        self._set(active=False)
+
+    def _ensure_leader(self) -> bool:
+        if self._conn is not None:
+            return True
+        if self._standby is None:
+            self._standby = self._connect()
+            self._standby.autocommit = True
+        acquired = self._standby.cursor().execute(
+            "SET NOCOUNT ON; DECLARE @r INT; "
+            "EXEC @r = sp_getapplock @Resource = ?, @LockMode = 'Exclusive', @LockOwner = 'Session', @LockTimeout = 0; "
+            "SELECT @r",
+            APP_LOCK
+        ).fetchval()
+        if acquired is None or acquired < 0:
+            return False
+        conn, self._standby = self._standby, None
+        conn.autocommit = False
+        self._conn = conn
+        self._set(active=True)
+        return True
+
+    # --- dispatch ---
+
+    def _fetch_pending(self) -> list:
+        cur = self._conn.cursor()
+        # Skip rows queued behind an older row of the same contract that is waiting for a retry,
+        # so updates for one contract always reach Camunda in order
+        cur.execute(
+            """
+            SELECT TOP (?) o.Id, o.ContractId, o.ProcessInstanceId, o.Modifications, o.Attempts
+            FROM CamundaOutbox o
+            WHERE o.NextAttemptAt <= SYSUTCDATETIME()
+              AND NOT EXISTS (
+                  SELECT 1 FROM CamundaOutbox p
+                  WHERE p.ContractId = o.ContractId AND p.Id < o.Id AND p.NextAttemptAt > SYSUTCDATETIME()
+              )
+            ORDER BY o.Id
+            """,
+            self.batch_size
+        )
+        rows = cur.fetchall()
+        self._conn.commit()
+        return rows
+
+    def _resolve_instance(self, contract_id: str, process_instance_id: str = None):
+        if process_instance_id:
+            return process_instance_id
+        instance_id = self.instance_cache.get(contract_id)
+        if instance_id:
+            return instance_id
+        # Legacy rows without ProcessInstanceId: search Camunda once, then cache
+        variables = self.camunda.variable_instances("contractId", contract_id)
+        if not variables:
+            return None
+        instance_id = variables[0]["processInstanceId"]
+        self.instance_cache.set(contract_id, instance_id)
+        return instance_id
+
+    def _push(self, contract_id: str, entry: dict):
+        # Continues the trace of the PATCH that queued the (latest) update
+        parent = entry["modifications"].get(TRACEPARENT_VARIABLE, {}).get("value")
+        with start_span("outbox push", parent=parent, attributes={"contract.id": contract_id,
+                                                                  "outbox.rows": len(entry["ids"])}):
+            instance_id = self._resolve_instance(contract_id, entry["processInstanceId"])
+            if not instance_id:
+                log.warning("No process instance found", extra=fields(contractId=contract_id))
+                return
+            self.camunda.set_variables(instance_id, entry["modifications"])
+            log.info("Pushed to Camunda", extra=fields(contractId=contract_id, processInstanceId=instance_id,
+                                                       variables=sorted(entry["modifications"]), sampled=True))
+
+    def _dispatch(self, rows: list):
+        merged = coalesce(rows)
+        done, failed = [], []
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            futures = {cid: pool.submit(self._push, cid, entry) for cid, entry in merged.items()}
+            for cid, fut in futures.items():
+                entry = merged[cid]
+                try:
+                    fut.result()
+                    done.extend(entry["ids"])
+                except Exception as e:
+                    failed.append((entry, e))
+                    log.warning("Failed to sync contract with Camunda: %s", e,
+                                extra=fields(contractId=cid, attempts=entry["attempts"]))
+
+        cur = self._conn.cursor()
+        if done:
+            cur.execute(f"DELETE FROM CamundaOutbox WHERE Id IN ({', '.join('?' * len(done))})", *done)
+        for entry, err in failed:
+            ids = entry["ids"]
+            delay = int(min(self.max_backoff, 2 ** entry["attempts"]))
+            cur.execute(
+                f"""
+                UPDATE CamundaOutbox
+                SET Attempts = Attempts + 1,
+                    NextAttemptAt = DATEADD(SECOND, ?, SYSUTCDATETIME()),
+                    LastError = ?
+                WHERE Id IN ({', '.join('?' * len(ids))})
+                """,
+                delay, str(err)[:4000], *ids
+            )
+        self._conn.commit()
+
+        with self._lock:
+            self._stats["batches"] += 1
+            self._stats["last_batch_size"] = len(rows)
+            self._stats["dispatched"] += len(done)
+            self._stats["coalesced"] += len(rows) - len(merged)
+            self._stats["failed"] += sum(len(entry["ids"]) for entry, _ in failed)
+            if failed:
+                self._stats["last_error"] = str(failed[-1][1])
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                if not self._ensure_leader():
+                    # Another backend process is dispatching; check again later
+                    self._stop.wait(self.poll_interval * 5)
+                    continue
+                rows = self._fetch_pending()
+                if rows:
+                    self._dispatch(rows)
+                    if len(rows) == self.batch_size:
+                        continue
+                self._wake.wait(self.poll_interval)
+                self._wake.clear()
+            except Exception as e:
+                log.exception("Error in outbox dispatcher")
+                self._set(last_error=str(e))
+                self._reset()
+                self._stop.wait(self.poll_interval)
+
+    # --- metrics ---
+
+    def _set(self, **kwargs):
+        with self._lock:
+            self._stats.update(kwargs)
+
+    def counters(self) -> dict:
+        """In-memory dispatcher counters (no database round trip)."""
+        with self._lock:
+            return dict(self._stats)
+
+    def stats(self, cursor) -> dict:
+        """Depth and lag of the outbox plus dispatcher counters."""
+        cursor.execute(
+            """
+            SELECT COUNT(*),
+                   DATEDIFF_BIG(MILLISECOND, MIN(CreatedAt), SYSUTCDATETIME()),
+                   SUM(CASE WHEN Attempts > 0 THEN 1 ELSE 0 END)
+            FROM CamundaOutbox
+            """
+        )
+        depth, lag_ms, retrying = cursor.fetchone()
+        return {"depth": depth, "lag_ms": lag_ms or 0, "retrying": retrying or 0, **self.counters(),
+                "instance_cache": self.instance_cache.stats()}
@@ -0,0 +1,191 @@
+"""
+In-memory snapshot of the open (Submitted / Running) contracts behind the provider listing.
+
+The snapshot is loaded once at startup and then kept current from Contracts.RowVer:
+whenever the database's row version moves, only the rows written since the last sync are
+read and upserted or, once they are no longer open, dropped. Each row is kept pre-serialized, so a page is a join of ready JSON bytes and
+costs no SQL round trip.
+
+Pages are byte-for-byte what the SQL listing returns (same order, columns and
+next_cursor), so clients cannot tell which path served them. A request falls back to SQL
+when the snapshot has not confirmed it is current for longer than `max_staleness`
+seconds (e.g. the database is unreachable), or when it asks for `fields=` / filters.
+After a write in this process (mark_dirty) the next request first applies the delta, so
+a provider always reads its own PATCH.
+"""
+import asyncio
+import bisect
+import time
+
+from changes import ZERO_TOKEN
+from http_cache import etag_of
+from listing import PROVIDER_COLUMNS, decode_cursor, encode_cursor, json_bytes
+
+OPEN_WHERE = "ContractStatus IN ('Submitted', 'Running')"
+OPEN_STATUSES = {"Submitted", "Running"}
+# Provider fields plus the listing's sort key (CreatedAt DESC, Id DESC)
+SNAPSHOT_COLUMNS = PROVIDER_COLUMNS + ["CreatedAt", "Id"]
+DELTA_PAGE = 1000
+
+
+def load_open(cursor) -> tuple:
+    """(rows, token): every open contract, and a token at or before the read."""
+    cursor.execute("SELECT MIN_ACTIVE_ROWVERSION()")
+    active = int.from_bytes(bytes(cursor.fetchone()[0]), "big")
+    cursor.execute(f"SELECT {', '.join(SNAPSHOT_COLUMNS)} FROM Contracts WHERE {OPEN_WHERE}")
+    names = [c[0] for c in cursor.description]
+    rows = [dict(zip(names, r)) for r in cursor.fetchall()]
+    # Rows at or above the active version may be missing from the read; the first delta
+    # re-reads them (upserts are idempotent)
+    return rows, max(active - 1, 0).to_bytes(8, "big")
+
+
+def read_delta(cursor, since: bytes) -> tuple:
+    """
+    (rows, token): every row written after since, in RowVer order. Unlike the change feed
+    it also reads rows committed above MIN_ACTIVE_ROWVERSION() while an older transaction
+    is still open (e.g. this process's own PATCH), but the token stops below that
+    transaction, so the rows it may still commit are read again on a later sync.
+    """
+    cursor.execute("SELECT MIN_ACTIVE_ROWVERSION()")
+    active = int.from_bytes(bytes(cursor.fetchone()[0]), "big")
+    rows, last = [], since
+    while True:
+        cursor.execute(
+            f"SELECT TOP (?) {', '.join(SNAPSHOT_COLUMNS)}, RowVer FROM Contracts WHERE RowVer > ? ORDER BY RowVer",
+            DELTA_PAGE, last
+        )
+        names = [c[0] for c in cursor.description]
+        page = [dict(zip(names, r)) for r in cursor.fetchall()]
+        rows.extend(page)
+        if page:
+            last = bytes(page[-1]["RowVer"])
+        if len(page) < DELTA_PAGE:
+            break
+    token = min(int.from_bytes(last, "big"), max(active - 1, 0))
+    return rows, max(token, int.from_bytes(since, "big")).to_bytes(8, "big")
+
+
+class ProviderSnapshot:
+    def __init__(self, run_sql, read_version, max_staleness: float = 5.0, page_cache_size: int = 1000):
+        self.run_sql = run_sql            # SqlExecutor.run
+        self.read_version = read_version  # coroutine -> current row version (cached by the caller)
+        self.max_staleness = max_staleness
+        self.page_cache_size = page_cache_size
+        self._rows = {}                   # ContractId -> ((CreatedAt, Id), json bytes)
+        self._keys = self._bodies = None  # ascending by (CreatedAt, Id), rebuilt lazily
+        self._pages = {}                  # (limit, cursor) -> (etag, body), cleared on change
+        self._token = ZERO_TOKEN
+        self._version = None
+        self._loaded = False
+        self._dirty = False
+        self._synced_at = 0.0
+        self._lock = asyncio.Lock()
+        self._stats = {"hits": 0, "fallbacks": 0, "loads": 0, "deltas": 0, "rows_applied": 0, "errors": 0}
+        self._last_error = None
+
+    # --- maintenance ---
+
+    def mark_dirty(self):
+        """Called after this process wrote Contracts; the next request syncs before serving."""
+        self._dirty = True
+
+    def _put(self, row: dict):
+        cid = row["ContractId"]
+        if row["ContractStatus"] in OPEN_STATUSES:
+            body = json_bytes({c: row[c] for c in PROVIDER_COLUMNS})
+            self._rows[cid] = ((row["CreatedAt"], row["Id"]), body)
+        else:
+            self._rows.pop(cid, None)
+
+    def _changed(self):
+        self._keys = self._bodies = None
+        self._pages.clear()
+
+    async def refresh(self):
+        """Loads the snapshot, or applies the rows written since the last sync."""
+        async with self._lock:
+            dirty = False
+            try:
+                version = await self.read_version()
+                if self._loaded and not self._dirty and version == self._version:
+                    self._synced_at = time.monotonic()
+                    return
+                dirty, self._dirty = self._dirty, False
+                if not self._loaded:
+                    rows, token = await self.run_sql(lambda conn: load_open(conn.cursor()))
+                    self._rows.clear()
+                    self._stats["loads"] += 1
+                else:
+                    since = self._token
+                    rows, token = await self.run_sql(lambda conn: read_delta(conn.cursor(), since))
+                    self._stats["deltas"] += 1
+            except Exception as e:
+                self._stats["errors"] += 1
+                self._last_error = str(e)
+                self._dirty = self._dirty or dirty
+                raise
+            for row in rows:
+                self._put(row)
+            if rows or not self._loaded:
+                self._changed()
+            self._stats["rows_applied"] += len(rows)
+            self._token, self._version, self._loaded = token, version, True
+            self._synced_at = time.monotonic()
+
+    async def run(self, wake, interval: float, log):
+        """Background sync loop; wake(timeout) returns early when this process wrote Contracts."""
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                log.warning("Provider snapshot sync failed: %s", e)
+            await wake(interval)
+
+    # --- serving ---
+
+    def staleness(self) -> float:
+        return time.monotonic() - self._synced_at if self._loaded else float("inf")
+
+    async def page(self, limit: int, cursor: str = None):
+        """(etag, body) of a provider listing page, or None when the caller must use SQL."""
+        if self._dirty:
+            try:
+                await self.refresh()
+            except Exception:
+                self._stats["fallbacks"] += 1
+                return None
+        if not self._loaded or self.staleness() > self.max_staleness:
+            self._stats["fallbacks"] += 1
+            return None
+        self._stats["hits"] += 1
+
+        cached = self._pages.get((limit, cursor))
+        if cached is not None:
+            return cached
+        if self._keys is None:
+            entries = sorted(self._rows.values(), key=lambda e: e[0])
+            self._keys = [e[0] for e in entries]
+            self._bodies = [e[1] for e in entries]
+
+        # Newest first: rows strictly before the cursor's (CreatedAt, Id), walking backwards
+        end = bisect.bisect_left(self._keys, decode_cursor(cursor)) if cursor else len(self._keys)
+        start = max(0, end - limit)
+        items = self._bodies[start:end][::-1]
+        next_cursor = encode_cursor(*self._keys[start]) if start > 0 and items else None
+        body = b'{"items":[' + b",".join(items) + b'],"next_cursor":' + json_bytes(next_cursor) + b"}"
+
+        if len(self._pages) >= self.page_cache_size:
+            self._pages.clear()
+        self._pages[(limit, cursor)] = (etag_of(body), body)
+        return self._pages[(limit, cursor)]
+
+    def stats(self) -> dict:
+        return {
+            **self._stats,
+            "loaded": self._loaded,
+            "rows": len(self._rows),
+            "staleness_sec": round(self.staleness(), 3) if self._loaded else None,
+            "max_staleness_sec": self.max_staleness,
+            "last_error": self._last_error,
+        }
@@ -0,0 +1,20 @@
+"""
+Helpers for set-based statements that bind a whole batch as a VALUES list.
+
+Shared by the backend and the store worker.
+"""
+
+# SQL Server accepts at most 2100 parameters per statement
+MAX_PARAMS = 2000
+
+
+def values_placeholders(n_rows: int, n_cols: int) -> str:
+    """'(?, ?), (?, ?)' for a table value constructor with n_rows x n_cols parameters."""
+    row = "(" + ", ".join("?" * n_cols) + ")"
+    return ", ".join([row] * n_rows)
+
+
+def chunks(rows: list, n_cols: int):
+    size = max(1, MAX_PARAMS // n_cols)
+    for i in range(0, len(rows), size):
+        yield rows[i:i + size]
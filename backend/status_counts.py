@@ -0,0 +1,102 @@
+"""
+Materialized per-status contract counts (dbo.ContractStatusCounts).
+
+Every write that inserts a contract or changes its ContractStatus calls record() inside its
+own transaction, so /stats reads a few counter rows instead of grouping the whole Contracts
+table. UPDATEs report their transitions with STATUS_OUTPUT
+(`OUTPUT deleted.ContractStatus, inserted.ContractStatus`); inserts pass (None, status).
+
+Shared by the backend and the store worker. reconcile() recomputes the counts from Contracts
+and reports, or repairs, any drift:
+
+    python status_counts.py          # report drift
+    python status_counts.py --fix    # report and overwrite the counters
+"""
+import argparse
+import json
+
+STATUS_OUTPUT = "OUTPUT deleted.ContractStatus, inserted.ContractStatus"
+
+
+def deltas(transitions) -> dict:
+    """{status: delta} for [(old_status, new_status)]; unchanged rows cancel out."""
+    out = {}
+    for old, new in transitions:
+        if old == new:
+            continue
+        if old is not None:
+            out[old] = out.get(old, 0) - 1
+        if new is not None:
+            out[new] = out.get(new, 0) + 1
+    return {status: d for status, d in out.items() if d}
+
+
+def record(cursor, transitions):
+    """Applies status transitions to the counters; call inside the writer's transaction."""
+    changes = sorted(deltas(transitions).items())
+    if not changes:
+        return
+    cursor.execute(
+        f"""
+        MERGE ContractStatusCounts WITH (HOLDLOCK) AS t
+        USING (VALUES {', '.join(['(?, ?)'] * len(changes))}) AS s (ContractStatus, Delta)
+          ON t.ContractStatus = s.ContractStatus
+        WHEN MATCHED THEN UPDATE SET ContractCount = t.ContractCount + s.Delta
+        WHEN NOT MATCHED THEN INSERT (ContractStatus, ContractCount) VALUES (s.ContractStatus, s.Delta);
+        """,
+        *[v for change in changes for v in change]
+    )
+
+
+def read(cursor) -> dict:
+    cursor.execute("SELECT ContractStatus, ContractCount FROM ContractStatusCounts")
+    return {status: count for status, count in cursor.fetchall()}
+
+
+def reconcile(cursor, fix: bool = False) -> dict:
+    """
+    Compares the counters with a full GROUP BY over Contracts and returns
+    {"counters", "actual", "drift"} where drift is counter - actual per status.
+    With fix=True the counters are overwritten; the caller commits. The counters are locked
+    first, so writers that commit meanwhile apply their deltas after the recount.
+    """
+    cursor.execute("SELECT ContractStatus, ContractCount FROM ContractStatusCounts WITH (TABLOCKX, HOLDLOCK)")
+    counters = {status: count for status, count in cursor.fetchall()}
+    cursor.execute(
+        "SELECT ContractStatus, COUNT_BIG(*) FROM Contracts WHERE ContractStatus IS NOT NULL GROUP BY ContractStatus"
+    )
+    actual = {status: count for status, count in cursor.fetchall()}
+
+    drift = {}
+    for status in sorted(set(counters) | set(actual)):
+        diff = counters.get(status, 0) - actual.get(status, 0)
+        if diff:
+            drift[status] = diff
+
+    if fix and drift:
+        cursor.execute("DELETE FROM ContractStatusCounts")
+        for status, count in actual.items():
+            cursor.execute("INSERT INTO ContractStatusCounts (ContractStatus, ContractCount) VALUES (?, ?)",
+                           status, count)
+    return {"counters": counters, "actual": actual, "drift": drift}
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--fix", action="store_true", help="overwrite the counters with the recomputed counts")
+    args = ap.parse_args()
+
+    from db import get_azure_connection
+    conn = get_azure_connection()
+    try:
+        report = reconcile(conn.cursor(), fix=args.fix)
+        conn.commit()
+    finally:
+        conn.close()
+    print(json.dumps(report, indent=2))
+    if report["drift"]:
+        print(f"{'Repaired' if args.fix else 'Found'} drift in {len(report['drift'])} status(es)")
+
+
+if __name__ == "__main__":
+    main()
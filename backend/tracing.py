@@ -0,0 +1,139 @@
+"""
+Minimal W3C Trace Context tracing shared by the backend and the workers.
+
+Ids and propagation follow OpenTelemetry: 16-byte trace ids, 8-byte span ids and
+`traceparent` values of the form 00-<trace id>-<span id>-01. Incoming `traceparent` headers
+are continued, outgoing engine-rest calls carry one, and the provider PATCH stores its own
+in the Camunda process variable `traceparent`, so the outbox dispatcher and the store
+workers open their spans as children of the request that caused them.
+
+Finished spans are exported as JSON lines with OTLP/JSON span fields (traceId, spanId,
+parentSpanId, name, kind, startTimeUnixNano, endTimeUnixNano, attributes, status) when
+TRACE_EXPORT is set:
+
+    TRACE_EXPORT=console                  # stdout
+    TRACE_EXPORT=/var/log/app/spans.jsonl # append to a file (e.g. for a filelog collector)
+
+Without TRACE_EXPORT spans are still created and propagated, just not written.
+"""
+import contextvars
+import json
+import os
+import re
+import sys
+import threading
+import time
+
+TRACEPARENT_VARIABLE = "traceparent"
+
+# OTLP span kinds
+INTERNAL, SERVER, CLIENT, CONSUMER = 1, 2, 3, 5
+
+_TRACEPARENT_RE = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-[0-9a-f]{2}$")
+_current = contextvars.ContextVar("current_span", default=None)
+
+
+def parse_traceparent(value) -> tuple:
+    """(trace_id, span_id) of a valid traceparent, else None."""
+    m = _TRACEPARENT_RE.match(value.strip().lower()) if isinstance(value, str) else None
+    if not m or m.group(1) == "0" * 32 or m.group(2) == "0" * 16:
+        return None
+    return m.group(1), m.group(2)
+
+
+class Exporter:
+    def __init__(self, target: str):
+        self.target = target
+        self._lock = threading.Lock()
+        self._file = sys.stdout if target == "console" else open(target, "a", encoding="utf-8", buffering=1)
+
+    def export(self, span: dict):
+        line = json.dumps(span, default=str, separators=(",", ":"))
+        with self._lock:
+            self._file.write(line + "\n")
+            if self._file is sys.stdout:
+                self._file.flush()
+
+
+_exporter = Exporter(os.environ["TRACE_EXPORT"]) if os.getenv("TRACE_EXPORT") else None
+
+
+class Span:
+    def __init__(self, name: str, trace_id: str, parent_id: str = None, kind: int = INTERNAL,
+                 attributes: dict = None):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.kind = kind
+        self.attributes = dict(attributes or {})
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.error = None
+        self._token = None
+
+    @property
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+    def set_attribute(self, key: str, value):
+        self.attributes[key] = value
+
+    def record_error(self, error):
+        """Marks the span as failed without raising, e.g. for an HTTP 5xx response."""
+        self.error = error
+
+    def end(self, error: BaseException = None):
+        if self.end_ns is not None:
+            return
+        self.end_ns = time.time_ns()
+        self.error = error or self.error
+        if _exporter is not None:
+            _exporter.export(self.to_dict())
+
+    def to_dict(self) -> dict:
+        return {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "parentSpanId": self.parent_id or "",
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": self.start_ns,
+            "endTimeUnixNano": self.end_ns,
+            "attributes": self.attributes,
+            "status": {"code": 2, "message": str(self.error)} if self.error else {"code": 1},
+        }
+
+    # `with start_span(...)` makes the span current for the block and ends it afterwards
+    def __enter__(self):
+        self._token = _current.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        _current.reset(self._token)
+        self.end(exc)
+        return False
+
+
+def start_span(name: str, parent=None, kind: int = INTERNAL, attributes: dict = None) -> Span:
+    """
+    New span under parent: a Span, a traceparent string, or None for the current span.
+    An invalid or missing parent starts a new trace.
+    """
+    if parent is None:
+        parent = _current.get()
+    if isinstance(parent, Span):
+        return Span(name, parent.trace_id, parent.span_id, kind, attributes)
+    ids = parse_traceparent(parent)
+    if ids:
+        return Span(name, ids[0], ids[1], kind, attributes)
+    return Span(name, os.urandom(16).hex(), None, kind, attributes)
+
+
+def current_span() -> Span:
+    return _current.get()
+
+
+def current_traceparent() -> str:
+    span = _current.get()
+    return span.traceparent if span else None
@@ -0,0 +1,133 @@
+"""
+Closed-loop HTTP load test for the backend: N concurrent clients each send requests
+back to back for --duration seconds; reports requests/sec, latency percentiles and
+status codes per concurrency level.
+
+    cd docker && docker compose up -d backend camunda
+    cd benchmarks && python bench_backend_load.py --url http://localhost:8000 \\
+        --path "/api/providers/contracts?limit=20" --path /stats \\
+        --post /start-process '{"contractTitle": "load", "requestedBy": "bench"}' \\
+        --concurrency 50,200,1000
+
+Paths are picked round-robin per client, so mixing a Camunda-bound POST with the SQL
+GETs shows whether slow engine calls hold up the provider listing.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import statistics
+import time
+from collections import Counter
+from urllib.parse import urlsplit
+
+
+def percentile(sorted_lat: list, q: float) -> float:
+    return sorted_lat[min(len(sorted_lat) - 1, int(len(sorted_lat) * q))]
+
+
+class Connection:
+    """
+    One keep-alive HTTP/1.1 connection per simulated client. A shared client pool
+    (httpx) costs more CPU per request than the backend itself at high concurrency.
+    """
+
+    def __init__(self, host: str, port: int):
+        self.host, self.port = host, port
+        self.reader = self.writer = None
+        self.body = b""  # body of the last response
+
+    async def request(self, method: str, path: str, body=None):
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        data = b"" if body is None else json.dumps(body).encode()
+        head = f"{method} {path} HTTP/1.1\r\nHost: {self.host}\r\nContent-Length: {len(data)}\r\n"
+        if data:
+            head += "Content-Type: application/json\r\n"
+        self.writer.write(head.encode() + b"\r\n" + data)
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise ConnectionError("connection closed")
+        headers = {}
+        while True:
+            line = await self.reader.readline()
+            if line in (b"\r\n", b""):
+                break
+            k, _, v = line.decode().partition(":")
+            headers[k.strip().lower()] = v.strip()
+        if headers.get("transfer-encoding") == "chunked":
+            parts = []
+            while True:
+                size = int((await self.reader.readline()).strip(), 16)
+                parts.append((await self.reader.readexactly(size + 2))[:size])
+                if size == 0:
+                    break
+            self.body = b"".join(parts)
+        else:
+            self.body = await self.reader.readexactly(int(headers.get("content-length", 0)))
+        if headers.get("connection") == "close":
+            self.close()
+        return int(status_line.split()[1])
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+        self.reader = self.writer = None
+
+
+async def client_loop(conn: Connection, requests: list, deadline: float, offset: int, lat: dict, codes: Counter,
+                      timeout: float):
+    for method, path, body in itertools.islice(itertools.cycle(requests), offset, None):
+        if time.perf_counter() >= deadline:
+            break
+        t0 = time.perf_counter()
+        try:
+            codes[await asyncio.wait_for(conn.request(method, path, body), timeout)] += 1
+        except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError) as e:
+            codes[type(e).__name__] += 1
+            conn.close()
+        lat.setdefault(f"{method} {path}", []).append(time.perf_counter() - t0)
+    conn.close()
+
+
+async def run_level(url: str, requests: list, concurrency: int, duration: float, timeout: float):
+    parts = urlsplit(url)
+    lat, codes = {}, Counter()
+    t0 = time.perf_counter()
+    deadline = t0 + duration
+    await asyncio.gather(*[
+        client_loop(Connection(parts.hostname, parts.port or 80), requests, deadline, i, lat, codes, timeout)
+        for i in range(concurrency)
+    ])
+    elapsed = time.perf_counter() - t0
+
+    all_lat = sorted(x for v in lat.values() for x in v)
+    print(f"\nconcurrency={concurrency}: {len(all_lat)} requests in {elapsed:.1f}s "
+          f"= {len(all_lat) / elapsed:,.0f} req/s  status={dict(codes)}")
+    for name, values in sorted(lat.items()):
+        values.sort()
+        print(f"  {name:<45} n={len(values):>6} mean={statistics.mean(values) * 1000:8.1f}ms "
+              f"p50={percentile(values, 0.50) * 1000:8.1f}ms p99={percentile(values, 0.99) * 1000:8.1f}ms")
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--url", default="http://localhost:8000")
+    ap.add_argument("--path", action="append", default=[], help="GET path (repeatable)")
+    ap.add_argument("--post", nargs=2, action="append", default=[], metavar=("PATH", "JSON"),
+                    help="POST path and JSON body (repeatable)")
+    ap.add_argument("--concurrency", default="50,200,1000", help="comma-separated client counts")
+    ap.add_argument("--duration", type=float, default=20.0, help="seconds per concurrency level")
+    ap.add_argument("--timeout", type=float, default=30.0, help="per-request timeout in seconds")
+    args = ap.parse_args()
+
+    requests = [("GET", p, None) for p in args.path] + [("POST", p, json.loads(b)) for p, b in args.post]
+    if not requests:
+        requests = [("GET", "/api/providers/contracts?limit=20", None), ("GET", "/stats", None)]
+
+    for level in (int(c) for c in args.concurrency.split(",")):
+        asyncio.run(run_level(args.url, requests, level, args.duration, args.timeout))
+
+
+if __name__ == "__main__":
+    main()
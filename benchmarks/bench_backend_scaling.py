@@ -0,0 +1,218 @@
+"""
+Backend throughput from 1 to N gunicorn worker processes, and how long a provider PATCH
+takes to be visible from every worker (cross-process cache coherence).
+
+    docker run -d --name contract-sql -e ACCEPT_EULA=Y -e MSSQL_SA_PASSWORD='Bench!Passw0rd' \\
+        -p 1433:1433 mcr.microsoft.com/mssql/server:2022-latest
+    docker run -d --name contract-pg -e POSTGRES_PASSWORD=camunda -e POSTGRES_USER=camunda \\
+        -p 5432:5432 postgres:14
+    cd benchmarks && PYTHONPATH=../backend:../docker python bench_backend_scaling.py \\
+        --sql-password 'Bench!Passw0rd' --workers 1,2,4,8 --contracts 2000
+
+--contracts open contracts are inserted directly into SQL. For each worker count the
+backend is started with gunicorn (gunicorn.conf.py, WEB_CONCURRENCY=<n>,
+CACHE_INVALIDATION=postgres unless --no-invalidation) and --concurrency keep-alive
+clients, spread over --load-procs processes so the load generator is not the bottleneck,
+send the --path requests for --duration seconds. Then the newest contract is PATCHed
+through one connection while --probes fresh connections (spread over the workers by the
+kernel's accept) poll the provider listing until all of them show the new comment.
+
+Reported per worker count: requests/sec and speed-up over one worker, latency p50 / p99,
+CPU cores used by the backend (master + workers, Linux /proc), and the PATCH visibility
+lag. Run it with --no-invalidation to see the lag without the LISTEN / NOTIFY broadcast
+(bounded by LISTING_VERSION_TTL_SEC and PROVIDER_SNAPSHOT_REFRESH_SEC instead).
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+import uuid
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import urlsplit
+
+import httpx
+import pyodbc
+
+from bench_backend_load import Connection, client_loop, percentile
+from bench_lifecycle import ROOT, Service, conn_str, cpu_seconds, prepare_database, wait_ready
+
+DEFAULT_PATHS = ["/api/providers/contracts?limit=20", "/api/providers/contracts?limit=20&fields=ContractId,Budget",
+                 "/stats"]
+
+
+def seed(args):
+    conn = pyodbc.connect(conn_str(args, args.sql_database))
+    try:
+        cur = conn.cursor()
+        cur.fast_executemany = True
+        cur.executemany(
+            "INSERT INTO Contracts (ContractId, ContractTitle, ContractType, RequestType, Budget, Description, "
+            "ContractStatus) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [(str(uuid.uuid4()), f"scaling contract {i}", "Service", "Single", 1000.0 + i, "x" * 200,
+              "Submitted" if i % 2 else "Running") for i in range(args.contracts)]
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def backend_cpu(master_pid: int) -> float:
+    """CPU seconds of the gunicorn master and its live workers."""
+    total = cpu_seconds(master_pid)
+    try:
+        with open(f"/proc/{master_pid}/task/{master_pid}/children") as f:
+            total += sum(cpu_seconds(int(pid)) for pid in f.read().split())
+    except OSError:
+        pass
+    return total
+
+
+def _load_proc(url: str, requests: list, clients: int, duration: float, timeout: float):
+    """One load generator process: (latencies, status codes)."""
+    async def run():
+        parts = urlsplit(url)
+        lat, codes = {}, Counter()
+        deadline = time.perf_counter() + duration
+        await asyncio.gather(*[
+            client_loop(Connection(parts.hostname, parts.port), requests, deadline, i, lat, codes, timeout)
+            for i in range(clients)
+        ])
+        return [x for values in lat.values() for x in values], codes
+    return asyncio.run(run())
+
+
+def load(url: str, requests: list, args, duration: float) -> tuple:
+    procs = max(1, min(args.load_procs, args.concurrency))
+    share = [args.concurrency // procs + (i < args.concurrency % procs) for i in range(procs)]
+    with ProcessPoolExecutor(procs) as pool:
+        results = list(pool.map(_load_proc, [url] * procs, [requests] * procs, share,
+                                [duration] * procs, [args.timeout] * procs))
+    lat = sorted(x for values, _ in results for x in values)
+    codes = sum((c for _, c in results), Counter())
+    return lat, codes
+
+
+async def visibility_lag(url: str, probes: int, timeout: float) -> float:
+    """PATCHes the newest open contract and waits until every probe connection sees it."""
+    parts = urlsplit(url)
+    writer = Connection(parts.hostname, parts.port)
+    if await writer.request("GET", "/api/providers/contracts?limit=1") != 200:
+        raise SystemExit(f"listing failed: {writer.body[:200]!r}")
+    contract_id = json.loads(writer.body)["items"][0]["ContractId"]
+    marker = f"scaling-{uuid.uuid4().hex[:8]}"
+
+    conns = [Connection(parts.hostname, parts.port) for _ in range(probes)]
+    for c in conns:  # open every connection first, so each is already bound to a worker
+        await c.request("GET", "/")
+    t0 = time.perf_counter()
+    if await writer.request("PATCH", f"/api/providers/contracts/{contract_id}",
+                            {"providersComment": marker}) != 200:
+        raise SystemExit(f"PATCH failed: {writer.body[:200]!r}")
+
+    async def until_visible(c: Connection) -> float:
+        while time.perf_counter() - t0 < timeout:
+            await c.request("GET", "/api/providers/contracts?limit=1")
+            if marker.encode() in c.body:
+                return time.perf_counter() - t0
+            await asyncio.sleep(0.002)
+        return float("inf")
+
+    try:
+        return max(await asyncio.gather(*(until_visible(c) for c in conns)))
+    finally:
+        for c in conns + [writer]:
+            c.close()
+
+
+def backend_env(args, workers: int) -> dict:
+    env = dict(os.environ)
+    env.update({
+        "AZURE_SQL_SERVER": args.sql_server,
+        "AZURE_SQL_PORT": str(args.sql_port),
+        "AZURE_SQL_DATABASE": args.sql_database,
+        "AZURE_SQL_USER": args.sql_user,
+        "AZURE_SQL_PASSWORD": args.sql_password,
+        "AZURE_SQL_TRUST_SERVER_CERTIFICATE": "yes",
+        "DB_HOST": args.pg_host,
+        "DB_PORT": str(args.pg_port),
+        # Offers are queued in the outbox; no engine is needed to serve them
+        "CAMUNDA_URL": "http://127.0.0.1:9/engine-rest",
+        "WEB_CONCURRENCY": str(workers),
+        "PORT": str(args.backend_port),
+        "CACHE_INVALIDATION": "off" if args.no_invalidation else "postgres",
+        "PROMETHEUS_MULTIPROC_DIR": os.path.join(args.logs_dir, "metrics"),
+        "LOG_LEVEL": "WARNING",
+    })
+    return env
+
+
+async def started(url: str):
+    async with httpx.AsyncClient(base_url=url) as client:
+        await wait_ready(client)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    cpus = os.cpu_count() or 1
+    ap.add_argument("--workers", default=",".join(str(n) for n in sorted({1, 2, 4, cpus}) if n <= cpus),
+                    help="comma-separated gunicorn worker counts")
+    ap.add_argument("--path", action="append", default=[], help="GET path (repeatable)")
+    ap.add_argument("--concurrency", type=int, default=200, help="keep-alive clients")
+    ap.add_argument("--load-procs", type=int, default=max(1, cpus // 2),
+                    help="load generator processes")
+    ap.add_argument("--duration", type=float, default=20.0, help="seconds per worker count")
+    ap.add_argument("--timeout", type=float, default=30.0, help="per-request timeout in seconds")
+    ap.add_argument("--probes", type=int, default=32, help="connections checking PATCH visibility")
+    ap.add_argument("--contracts", type=int, default=2000, help="open contracts to insert")
+    ap.add_argument("--no-invalidation", action="store_true", help="run without CACHE_INVALIDATION=postgres")
+    ap.add_argument("--sql-server", default="localhost")
+    ap.add_argument("--sql-port", type=int, default=1433)
+    ap.add_argument("--sql-database", default="contract_bench")
+    ap.add_argument("--sql-user", default="sa")
+    ap.add_argument("--sql-password", required=True)
+    ap.add_argument("--keep-data", dest="truncate", action="store_false",
+                    help="keep rows from earlier runs (default: delete them first)")
+    ap.add_argument("--pg-host", default="localhost")
+    ap.add_argument("--pg-port", type=int, default=5432)
+    ap.add_argument("--backend-port", type=int, default=8766)
+    ap.add_argument("--logs-dir", default=os.path.join(ROOT, "benchmarks", "scaling-logs"))
+    args = ap.parse_args()
+
+    requests = [("GET", p, None) for p in (args.path or DEFAULT_PATHS)]
+    url = f"http://127.0.0.1:{args.backend_port}"
+    os.makedirs(args.logs_dir, exist_ok=True)
+    print(f"Preparing database {args.sql_database} with {args.contracts} open contracts ...")
+    prepare_database(args)
+    seed(args)
+
+    results = []
+    for workers in (int(n) for n in args.workers.split(",")):
+        backend = Service(f"backend-{workers}", [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "main:app"],
+                          os.path.join(ROOT, "backend"), backend_env(args, workers), args.logs_dir)
+        try:
+            asyncio.run(started(url))
+            load(url, requests, args, 2.0)  # warm-up: connections, snapshot, listing cache
+            cpu0, t0 = backend_cpu(backend.pid), time.perf_counter()
+            lat, codes = load(url, requests, args, args.duration)
+            elapsed = time.perf_counter() - t0
+            cores = (backend_cpu(backend.pid) - cpu0) / elapsed
+            lag = asyncio.run(visibility_lag(url, args.probes, 10.0))
+        finally:
+            backend.stop()
+        results.append((workers, len(lat) / args.duration, percentile(lat, 0.5), percentile(lat, 0.99), cores, lag))
+        print(f"workers={workers}: {len(lat) / args.duration:,.0f} req/s status={dict(codes)}")
+
+    base = results[0][1]
+    mode = "off" if args.no_invalidation else "postgres"
+    print(f"\nconcurrency={args.concurrency}, cache invalidation={mode}, paths={[p for _, p, _ in requests]}")
+    print(f"{'workers':>7} {'req/s':>10} {'speed-up':>9} {'p50':>9} {'p99':>9} {'cores':>6} {'PATCH visible':>14}")
+    for workers, rps, p50, p99, cores, lag in results:
+        print(f"{workers:>7} {rps:>10,.0f} {rps / base:>8.2f}x {p50 * 1000:7.1f}ms {p99 * 1000:7.1f}ms "
+              f"{cores:>6.1f} {lag * 1000:12.0f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+Throughput of provider offer submission: N single-contract PATCHes vs the bulk PATCH.
+
+    cd docker && docker compose up -d backend camunda
+    cd benchmarks && python bench_bulk_offers.py --url http://localhost:8000 --offers 1000
+
+Takes 2 x --offers open contracts from GET /api/providers/contracts (seed them first, e.g.
+with bench_backend_load.py --post /start-process ...). The first half is offered one
+PATCH /api/providers/contracts/{id} at a time from --concurrency clients, the second half
+through PATCH /api/providers/contracts in requests of --bulk-size offers. For each path it
+reports offers/sec, request latency and how long the background dispatcher took to push
+the queued variable updates to Camunda (CamundaOutbox depth back to 0).
+"""
+import argparse
+import asyncio
+import json
+import time
+from urllib.parse import urlsplit
+
+from bench_backend_load import Connection, percentile
+
+
+def offer(contract_id: str, i: int) -> dict:
+    return {"providersBudget": 1000 + i, "providersComment": "bench offer", "meetRequirement": "Yes",
+            "providersName": f"bench-provider-{i % 10}", "contractId": contract_id}
+
+
+async def open_contract_ids(conn: Connection, n: int) -> list:
+    ids, cursor = [], None
+    while len(ids) < n:
+        path = "/api/providers/contracts?fields=ContractId&limit=1000" + (f"&cursor={cursor}" if cursor else "")
+        if await conn.request("GET", path) != 200:
+            raise SystemExit(f"GET {path} failed: {conn.body[:200]!r}")
+        page = json.loads(conn.body)
+        ids += [item["ContractId"] for item in page["items"]]
+        cursor = page["next_cursor"]
+        if not cursor:
+            break
+    if len(ids) < n:
+        raise SystemExit(f"Only {len(ids)} open contracts, need {n}")
+    return ids[:n]
+
+
+async def wait_outbox_drained(conn: Connection, timeout: float) -> float:
+    t0 = time.perf_counter()
+    while time.perf_counter() - t0 < timeout:
+        await conn.request("GET", "/outbox-stats")
+        if json.loads(conn.body)["depth"] == 0:
+            return time.perf_counter() - t0
+        await asyncio.sleep(0.2)
+    return float("nan")
+
+
+def report(name: str, n: int, elapsed: float, lat: list, failed: int, drain: float):
+    lat.sort()
+    print(f"{name:<8} {n} offers in {elapsed:6.2f}s = {n / elapsed:8,.0f} offers/s  failed={failed}  "
+          f"requests={len(lat)} p50={percentile(lat, 0.50) * 1000:7.1f}ms p99={percentile(lat, 0.99) * 1000:7.1f}ms  "
+          f"camunda sync drained after {drain:.1f}s")
+
+
+async def run_single(host: str, port: int, offers: list, concurrency: int) -> tuple:
+    queue = asyncio.Queue()
+    for o in offers:
+        queue.put_nowait(o)
+    lat, failed = [], 0
+
+    async def client():
+        nonlocal failed
+        conn = Connection(host, port)
+        while not queue.empty():
+            o = queue.get_nowait()
+            body = {k: v for k, v in o.items() if k != "contractId"}
+            t0 = time.perf_counter()
+            if await conn.request("PATCH", f"/api/providers/contracts/{o['contractId']}", body) != 200:
+                failed += 1
+            lat.append(time.perf_counter() - t0)
+        conn.close()
+
+    await asyncio.gather(*[client() for _ in range(concurrency)])
+    return lat, failed
+
+
+async def run_bulk(host: str, port: int, offers: list, bulk_size: int) -> tuple:
+    conn = Connection(host, port)
+    lat, failed = [], 0
+    for i in range(0, len(offers), bulk_size):
+        t0 = time.perf_counter()
+        status = await conn.request("PATCH", "/api/providers/contracts", offers[i:i + bulk_size])
+        lat.append(time.perf_counter() - t0)
+        failed += len(offers[i:i + bulk_size]) if status != 200 else json.loads(conn.body)["failed"]
+    conn.close()
+    return lat, failed
+
+
+async def main_async(args):
+    parts = urlsplit(args.url)
+    host, port = parts.hostname, parts.port or 80
+    ctl = Connection(host, port)
+    ids = await open_contract_ids(ctl, 2 * args.offers)
+    offers = [offer(cid, i) for i, cid in enumerate(ids)]
+    single, bulk = offers[:args.offers], offers[args.offers:]
+
+    await wait_outbox_drained(ctl, args.drain_timeout)
+
+    t0 = time.perf_counter()
+    lat, failed = await run_single(host, port, single, args.concurrency)
+    elapsed = time.perf_counter() - t0
+    report("single", len(single), elapsed, lat, failed, await wait_outbox_drained(ctl, args.drain_timeout))
+
+    t0 = time.perf_counter()
+    lat, failed = await run_bulk(host, port, bulk, args.bulk_size)
+    elapsed = time.perf_counter() - t0
+    report("bulk", len(bulk), elapsed, lat, failed, await wait_outbox_drained(ctl, args.drain_timeout))
+    ctl.close()
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--url", default="http://localhost:8000")
+    ap.add_argument("--offers", type=int, default=1000, help="offers per path")
+    ap.add_argument("--concurrency", type=int, default=20, help="clients sending single PATCHes")
+    ap.add_argument("--bulk-size", type=int, default=1000, help="offers per bulk PATCH")
+    ap.add_argument("--drain-timeout", type=float, default=300.0, help="seconds to wait for the outbox to drain")
+    asyncio.run(main_async(ap.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
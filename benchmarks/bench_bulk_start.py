@@ -0,0 +1,100 @@
+"""
+Throughput of process starts: N POST /start-process calls vs POST /start-process/batch.
+
+    cd docker && docker compose up -d backend camunda
+    cd benchmarks && python bench_bulk_start.py --url http://localhost:8000 --drafts 500
+
+The single path sends one draft per request from --concurrency clients, the batch path
+sends --batch-size drafts per request from one client. Both start real contractTool
+instances (each then waits in the PM draft task), so point it at a disposable engine.
+Reports drafts/sec, request latency and failed starts per path.
+"""
+import argparse
+import asyncio
+import json
+import time
+from urllib.parse import urlsplit
+
+from bench_backend_load import Connection, percentile
+
+
+def draft(i: int) -> dict:
+    return {
+        "contractTitle": f"bench import {i}",
+        "requestedBy": "bench",
+        "contractType": "freelance",
+        "roles": "Backend Developer",
+        "skills": "Python, SQL",
+        "requestType": "single",
+        "budget": 10000 + i,
+        "contractStartDate": "2026-01-01",
+        "contractEndDate": "2026-12-31",
+        "description": "bench_bulk_start.py",
+    }
+
+
+def report(name: str, n: int, elapsed: float, lat: list, failed: int):
+    lat.sort()
+    print(f"{name:<7} {n} drafts in {elapsed:6.2f}s = {n / elapsed:7,.0f} starts/s  failed={failed}  "
+          f"requests={len(lat)} p50={percentile(lat, 0.50) * 1000:8.1f}ms p99={percentile(lat, 0.99) * 1000:8.1f}ms")
+
+
+async def run_single(host: str, port: int, drafts: list, concurrency: int) -> tuple:
+    queue = asyncio.Queue()
+    for d in drafts:
+        queue.put_nowait(d)
+    lat, failed = [], 0
+
+    async def client():
+        nonlocal failed
+        conn = Connection(host, port)
+        while not queue.empty():
+            d = queue.get_nowait()
+            t0 = time.perf_counter()
+            # /start-process reports engine errors in the body with a 200
+            if await conn.request("POST", "/start-process", d) != 200 or "error" in json.loads(conn.body):
+                failed += 1
+            lat.append(time.perf_counter() - t0)
+        conn.close()
+
+    await asyncio.gather(*[client() for _ in range(concurrency)])
+    return lat, failed
+
+
+async def run_batch(host: str, port: int, drafts: list, batch_size: int) -> tuple:
+    conn = Connection(host, port)
+    lat, failed = [], 0
+    for i in range(0, len(drafts), batch_size):
+        t0 = time.perf_counter()
+        status = await conn.request("POST", "/start-process/batch", drafts[i:i + batch_size])
+        lat.append(time.perf_counter() - t0)
+        failed += len(drafts[i:i + batch_size]) if status != 200 else json.loads(conn.body)["failed"]
+    conn.close()
+    return lat, failed
+
+
+async def main_async(args):
+    parts = urlsplit(args.url)
+    host, port = parts.hostname, parts.port or 80
+    drafts = [draft(i) for i in range(args.drafts)]
+
+    t0 = time.perf_counter()
+    lat, failed = await run_single(host, port, drafts, args.concurrency)
+    report("single", len(drafts), time.perf_counter() - t0, lat, failed)
+
+    t0 = time.perf_counter()
+    lat, failed = await run_batch(host, port, drafts, args.batch_size)
+    report("batch", len(drafts), time.perf_counter() - t0, lat, failed)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--url", default="http://localhost:8000")
+    ap.add_argument("--drafts", type=int, default=500, help="process starts per path")
+    ap.add_argument("--concurrency", type=int, default=1, help="clients sending single /start-process calls")
+    ap.add_argument("--batch-size", type=int, default=500, help="drafts per /start-process/batch request")
+    asyncio.run(main_async(ap.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
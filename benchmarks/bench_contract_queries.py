@@ -0,0 +1,242 @@
+"""
+Query plans and latency of the hot Contracts queries before and after migration 0004.
+
+Needs a local SQL Server container (the queries are T-SQL: TOP, filtered indexes, ...):
+
+    docker run -d --name bench-mssql -e ACCEPT_EULA=Y -e MSSQL_SA_PASSWORD=Bench_Passw0rd \\
+        -p 1433:1433 mcr.microsoft.com/mssql/server:2022-latest
+    cd benchmarks && PYTHONPATH=../backend:../docker python bench_contract_queries.py --rows 1000000
+
+Creates the database, applies migrations up to 0003, seeds --rows contracts (10% Submitted,
+10% Running, 60% Approved, 20% Rejected), measures every endpoint query, applies 0004 and
+measures again. Each query is listed with the operators of its actual plan, logical reads
+and latency over --runs executions. The SQL comes from backend/listing.py, so it is exactly
+what the endpoints send.
+
+Last, --tie-rows contracts are approved by one UPDATE, so they share an ApprovedAt with
+sub-microsecond digits like a store-worker batch, and /contracts/approved is paged through
+them with a small limit to check that no row is skipped at the page boundaries.
+"""
+import argparse
+import re
+import statistics
+import time
+import xml.etree.ElementTree as ET
+
+import pyodbc
+
+import migrate
+from listing import CONTRACT_COLUMNS, PROVIDER_COLUMNS, ListFilters, build_page, encode_cursor, page_query
+
+DEFAULT_CONN = ("Driver={ODBC Driver 18 for SQL Server};Server=localhost,1433;Uid=sa;Pwd=Bench_Passw0rd;"
+                "Encrypt=yes;TrustServerCertificate=yes;")
+
+PLAN_NS = {"p": "http://schemas.microsoft.com/sqlserver/2004/07/showplan"}
+
+# Same status filters / sort columns as backend/main.py STATUS_LISTINGS
+OPEN = ("ContractStatus IN ('Submitted', 'Running')", "CreatedAt")
+APPROVED = ("ContractStatus = 'Approved'", "ApprovedAt")
+REJECTED = ("ContractStatus = 'Rejected'", "RejectedAt")
+
+SEED_SQL = """
+WITH n AS (
+    SELECT TOP (?) ROW_NUMBER() OVER (ORDER BY (SELECT NULL)) + ? AS i
+    FROM sys.all_objects a CROSS JOIN sys.all_objects b
+)
+INSERT INTO dbo.Contracts
+    (ContractId, ProcessInstanceId, BusinessKey, ContractTitle, ContractType, Roles, Skills, RequestType,
+     Budget, ContractStartDate, ContractEndDate, Description, ProvidersBudget, ProvidersComment, ProvidersName,
+     MeetRequirement, LegalComment, ApprovalDecision, ContractStatus, CreatedAt, ApprovedAt, RejectedAt)
+SELECT NEWID(), CONVERT(NVARCHAR(64), NEWID()), CONCAT('BK-', i), CONCAT('Contract ', i),
+       CHOOSE(i % 3 + 1, 'Service', 'License', 'Consulting'),
+       REPLICATE(N'role, ', 10), REPLICATE(N'skill, ', 10), CHOOSE(i % 2 + 1, 'Single', 'Team'),
+       (i % 1000) * 100.0, '2026-01-01', '2026-12-31', REPLICATE(N'Lorem ipsum dolor sit amet. ', 5),
+       i % 5000, N'', CONCAT('Provider ', i % 50), 'yes', N'ok', s.Decision, s.Status, s.CreatedAt,
+       CASE WHEN s.Status = 'Approved' THEN DATEADD(HOUR, 2, s.CreatedAt) END,
+       CASE WHEN s.Status = 'Rejected' THEN DATEADD(HOUR, 2, s.CreatedAt) END
+FROM n
+CROSS APPLY (SELECT
+    CASE i % 10 WHEN 0 THEN 'Submitted' WHEN 1 THEN 'Running' WHEN 2 THEN 'Rejected' WHEN 3 THEN 'Rejected'
+                ELSE 'Approved' END AS Status,
+    CASE WHEN i % 10 IN (2, 3) THEN 'reject' ELSE 'approve' END AS Decision,
+    DATEADD(SECOND, CAST(i * 30 AS INT), '2025-01-01') AS CreatedAt
+) s
+"""
+
+
+def connect(conn_str: str, database: str = None):
+    return pyodbc.connect(conn_str + (f"Database={database};" if database else ""))
+
+
+def prepare_database(conn_str: str, database: str, reset: bool):
+    if not re.fullmatch(r"\w+", database):
+        raise ValueError("database name must be alphanumeric")
+    master = connect(conn_str)
+    master.autocommit = True
+    if reset:
+        master.execute(f"IF DB_ID('{database}') IS NOT NULL DROP DATABASE [{database}]")
+    master.execute(f"IF DB_ID('{database}') IS NULL CREATE DATABASE [{database}]")
+    master.close()
+
+
+def seed(conn, rows: int, chunk: int = 100000):
+    existing = conn.execute("SELECT COUNT(*) FROM dbo.Contracts").fetchval()
+    if existing >= rows:
+        print(f"Contracts already holds {existing} rows")
+        return
+    t0 = time.perf_counter()
+    for start in range(existing, rows, chunk):
+        conn.execute(SEED_SQL, min(chunk, rows - start), start)
+        conn.commit()
+    print(f"seeded {rows - existing} rows in {time.perf_counter() - t0:.1f}s")
+
+
+def deep_cursor(conn, status_where: str, sort_col: str, offset: int) -> str:
+    row = conn.execute(
+        f"SELECT {sort_col}, Id FROM dbo.Contracts WHERE {status_where} "
+        f"ORDER BY {sort_col} DESC, Id DESC OFFSET ? ROWS FETCH NEXT 1 ROWS ONLY",
+        offset
+    ).fetchone()
+    return encode_cursor(row[0], row[1]) if row else None
+
+
+def cases(conn, rows: int) -> list:
+    """(name, sql, params) for every query the listing/stats/PATCH endpoints run."""
+    none = ListFilters()
+    out = [("GET /stats", "SELECT ContractStatus, COUNT(*) FROM Contracts GROUP BY ContractStatus", [])]
+
+    def listing(name, status, columns, filters=none, cursor=None, limit=100):
+        out.append((name, *page_query(status[0], status[1], columns, filters, cursor, limit)))
+
+    listing("GET /contracts/submitted", OPEN, CONTRACT_COLUMNS)
+    listing("GET /contracts/submitted (deep cursor)", OPEN, CONTRACT_COLUMNS,
+            cursor=deep_cursor(conn, *OPEN, offset=rows // 20))
+    listing("GET /contracts/submitted?contractType", OPEN, CONTRACT_COLUMNS, ListFilters(contract_type="License"))
+    listing("GET /contracts/approved", APPROVED, CONTRACT_COLUMNS)
+    listing("GET /contracts/approved?fields=3", APPROVED, ["ContractId", "ContractTitle", "Budget"])
+    listing("GET /contracts/approved (deep cursor)", APPROVED, CONTRACT_COLUMNS,
+            cursor=deep_cursor(conn, *APPROVED, offset=rows // 4))
+    listing("GET /contracts/rejected", REJECTED, CONTRACT_COLUMNS)
+    listing("GET /api/providers/contracts", OPEN, PROVIDER_COLUMNS)
+
+    contract_id = str(conn.execute("SELECT TOP 1 ContractId FROM dbo.Contracts ORDER BY Id DESC").fetchval())
+    out.append(("PATCH lookup by ContractId",
+                "SELECT ContractId, ContractStatus, ProcessInstanceId FROM Contracts WHERE ContractId = ?",
+                [contract_id]))
+    return out
+
+
+def plan_summary(plan_xml: str) -> str:
+    """Physical operators of an actual plan, with the index each one touches."""
+    ops = []
+    for rel in ET.fromstring(plan_xml).iter(f"{{{PLAN_NS['p']}}}RelOp"):
+        op = rel.get("PhysicalOp")
+        obj = rel.find("./*/p:Object", PLAN_NS)
+        if obj is not None and obj.get("Index"):
+            op = f"{op}[{obj.get('Index').strip('[]')}]"
+        if op not in ops:
+            ops.append(op)
+    return " > ".join(ops)
+
+
+def explain(conn, sql: str, params: list):
+    """Runs the query once with STATISTICS XML/IO on; returns (plan summary, logical reads)."""
+    cur = conn.cursor()
+    cur.execute("SET STATISTICS XML ON; SET STATISTICS IO ON;")
+    cur.execute(sql, *params)
+    cur.fetchall()
+    messages = list(getattr(cur, "messages", None) or [])
+    plan = ""
+    while cur.nextset():
+        messages.extend(getattr(cur, "messages", None) or [])
+        row = cur.fetchone() if cur.description else None
+        if row and isinstance(row[0], str) and "ShowPlanXML" in row[0]:
+            plan = plan_summary(row[0])
+    reads = sum(int(n) for _, msg in messages for n in re.findall(r"logical reads (\d+)", msg))
+    cur.execute("SET STATISTICS XML OFF; SET STATISTICS IO OFF;")
+    return plan, reads
+
+
+def measure(conn, sql: str, params: list, runs: int) -> list:
+    lat = []
+    cur = conn.cursor()
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        cur.execute(sql, *params)
+        cur.fetchall()
+        lat.append(time.perf_counter() - t0)
+    return sorted(lat)
+
+
+def run_phase(conn, label: str, queries: list, runs: int):
+    print(f"\n== {label} ==")
+    for name, sql, params in queries:
+        plan, reads = explain(conn, sql, params)
+        lat = measure(conn, sql, params, runs)
+        p95 = lat[min(len(lat) - 1, int(len(lat) * 0.95))]
+        print(f"{name:<40} mean={statistics.mean(lat) * 1000:8.2f}ms p50={statistics.median(lat) * 1000:8.2f}ms "
+              f"p95={p95 * 1000:8.2f}ms reads={reads}")
+        print(f"{'':<40} plan: {plan}")
+
+
+def check_ties(conn, rows: int, limit: int = 7):
+    """Pages /contracts/approved through rows approved by one UPDATE; every one must come back."""
+    marker = f"tie-{time.time_ns()}"
+    conn.execute(SEED_SQL, rows, 0)
+    conn.execute(
+        "UPDATE dbo.Contracts SET ContractTitle = ?, ContractStatus = 'Approved', "
+        # One value for the whole statement, with digits below the microsecond
+        "ApprovedAt = DATEADD(NANOSECOND, 700, DATEADD(YEAR, 1, SYSUTCDATETIME())) "
+        "WHERE Id > (SELECT MAX(Id) FROM dbo.Contracts) - ?", marker, rows)
+    conn.commit()
+    try:
+        seen, cursor, pages = 0, None, 0
+        while True:
+            sql, params = page_query(APPROVED[0], APPROVED[1], ["ContractTitle"], ListFilters(), cursor, limit)
+            page = build_page(conn.execute(sql, *params), ["ContractTitle"], APPROVED[1], limit)
+            pages += 1
+            hits = sum(item["ContractTitle"] == marker for item in page["items"])
+            seen += hits
+            cursor = page["next_cursor"]
+            if not cursor or (seen and not hits):
+                break
+        status = "ok" if seen == rows else "ROWS SKIPPED"
+        print(f"\n== ties: {rows} contracts sharing one ApprovedAt, limit={limit} ==")
+        print(f"{seen}/{rows} returned over {pages} pages: {status}")
+    finally:
+        conn.execute("DELETE FROM dbo.Contracts WHERE ContractTitle = ?", marker)
+        conn.commit()
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--conn-str", default=DEFAULT_CONN, help="ODBC connection string without Database=")
+    ap.add_argument("--database", default="contract_bench")
+    ap.add_argument("--rows", type=int, default=1000000)
+    ap.add_argument("--runs", type=int, default=20, help="timed executions per query")
+    ap.add_argument("--reset", action="store_true", help="drop and recreate the database first")
+    ap.add_argument("--tie-rows", type=int, default=25, help="contracts approved by one UPDATE for the tie check")
+    args = ap.parse_args()
+
+    prepare_database(args.conn_str, args.database, args.reset)
+    conn = connect(args.conn_str, args.database)
+
+    indexes = max(m.version for m in migrate.load_migrations() if m.name == "contracts_listing_indexes")
+    applied = dict((v, a) for v, _, a in migrate.status(conn))
+    if applied.get(indexes):
+        print("Listing indexes already applied; rerun with --reset for the before/after comparison")
+    else:
+        migrate.apply(conn, target=indexes - 1)
+        seed(conn, args.rows)
+        run_phase(conn, "before 0004 (clustered index + UX_Contracts_ContractId only)", cases(conn, args.rows),
+                  args.runs)
+
+    migrate.apply(conn, target=indexes)
+    seed(conn, args.rows)
+    run_phase(conn, "after 0004 (filtered/covering listing indexes)", cases(conn, args.rows), args.runs)
+    check_ties(conn, args.tie_rows)
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
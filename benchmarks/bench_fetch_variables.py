@@ -0,0 +1,131 @@
+"""
+fetchAndLock payload size and latency: every process variable vs the variables each
+worker handler declares.
+
+    cd docker && docker compose up -d camunda
+    cd benchmarks && PYTHONPATH=../backend:../docker python bench_fetch_variables.py \\
+        --engine http://localhost:8080/engine-rest --instances 200 --max-tasks 10
+
+Deploys a one-task process (topic bench-fetch-variables), starts --instances instances
+carrying the variables a contract has by the time it is stored (draft form, provider
+offer, legal review, CA form, with realistic text sizes), then for each fetch spec locks
+--rounds batches of --max-tasks tasks, unlocking them again between rounds. The specs are
+built with Topic.fetch_spec, exactly as the workers send them. The deployment is deleted
+afterwards.
+"""
+import argparse
+import statistics
+import time
+import uuid
+
+from camunda_client import CamundaClient, variable
+from email_worker import EMAIL_VARIABLES
+from store_worker import APPROVE_VARIABLES, CREATE_VARIABLES, REJECT_VARIABLES
+from worker_runtime import Topic
+
+TOPIC = "bench-fetch-variables"
+
+BPMN = f"""<?xml version="1.0" encoding="UTF-8"?>
+<bpmn:definitions xmlns:bpmn="http://www.omg.org/spec/BPMN/20100524/MODEL"
+                  xmlns:camunda="http://camunda.org/schema/1.0/bpmn" id="benchDefs" targetNamespace="bench">
+  <bpmn:process id="benchFetchVariables" isExecutable="true">
+    <bpmn:startEvent id="start"><bpmn:outgoing>f1</bpmn:outgoing></bpmn:startEvent>
+    <bpmn:serviceTask id="fetch" camunda:type="external" camunda:topic="{TOPIC}">
+      <bpmn:incoming>f1</bpmn:incoming><bpmn:outgoing>f2</bpmn:outgoing>
+    </bpmn:serviceTask>
+    <bpmn:endEvent id="end"><bpmn:incoming>f2</bpmn:incoming></bpmn:endEvent>
+    <bpmn:sequenceFlow id="f1" sourceRef="start" targetRef="fetch"/>
+    <bpmn:sequenceFlow id="f2" sourceRef="fetch" targetRef="end"/>
+  </bpmn:process>
+</bpmn:definitions>
+"""
+
+
+def contract_variables(i: int) -> dict:
+    text = "Lorem ipsum dolor sit amet, consectetur adipiscing elit. "
+    return {
+        # contractDraft.form
+        "contractId": variable(str(uuid.uuid4()), "String"),
+        "contractTitle": variable(f"Bench contract {i}", "String"),
+        "requestedBy": variable("pmuser", "String"),
+        "contractType": variable("freelance", "String"),
+        "roles": variable("Backend Developer, Data Engineer", "String"),
+        "skills": variable("Python, SQL, Azure, Camunda, Docker, " * 5, "String"),
+        "requestType": variable("single", "String"),
+        "budget": variable(25000.0, "Double"),
+        "contractStartDate": variable("2026-01-01", "String"),
+        "contractEndDate": variable("2026-12-31", "String"),
+        "description": variable(text * 60, "String"),
+        # provider offer (PATCH /api/providers/contracts)
+        "providersName": variable("Acme Consulting", "String"),
+        "providersBudget": variable(24000, "Integer"),
+        "providersComment": variable(text * 20, "String"),
+        "meetRequirement": variable("Yes", "String"),
+        # reviewOffers / reviewContract forms
+        "pmComment": variable(text * 10, "String"),
+        "legalcomment": variable(text * 20, "String"),
+        "approvaldecision": variable("approve", "String"),
+        # storeContract.form
+        "signeddate": variable("2026-01-15", "String"),
+        "employeeName": variable("Jane Doe", "String"),
+        "officeAddress": variable("Main Street 1, 10115 Berlin", "String"),
+        "finalPrice": variable(24000, "Integer"),
+    }
+
+
+def percentile(sorted_values: list, q: float) -> float:
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * q))]
+
+
+def measure(client: CamundaClient, label: str, variables, args):
+    spec = Topic(TOPIC, None, 1, "", variables).fetch_spec(lock_ms=60000)
+    payload = {"workerId": f"bench-{uuid.uuid4()}", "maxTasks": args.max_tasks, "topics": [spec]}
+    sizes, lat, tasks_seen = [], [], 0
+    for _ in range(args.rounds):
+        t0 = time.perf_counter()
+        r = client.session.post(f"{client.base_url}/external-task/fetchAndLock", json=payload, timeout=60)
+        lat.append(time.perf_counter() - t0)
+        r.raise_for_status()
+        tasks = r.json()
+        sizes.append(len(r.content))
+        tasks_seen += len(tasks)
+        for t in tasks:
+            client.request("POST", f"/external-task/{t['id']}/unlock")
+    lat.sort()
+    per_task = sum(sizes) / tasks_seen if tasks_seen else 0
+    print(f"{label:<8} vars={'all' if variables is None else len(variables):>3}  "
+          f"{statistics.mean(sizes) / 1024:8.1f} KiB/batch  {per_task / 1024:6.2f} KiB/task  "
+          f"p50={percentile(lat, 0.50) * 1000:7.1f}ms p95={percentile(lat, 0.95) * 1000:7.1f}ms")
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--engine", default="http://localhost:8080/engine-rest")
+    ap.add_argument("--user", default="demo")
+    ap.add_argument("--password", default="demo")
+    ap.add_argument("--instances", type=int, default=200)
+    ap.add_argument("--max-tasks", type=int, default=10)
+    ap.add_argument("--rounds", type=int, default=50)
+    args = ap.parse_args()
+
+    client = CamundaClient(args.engine, auth=(args.user, args.password), timeout=60)
+    deployment = client.request("POST", "/deployment/create",
+                                data={"deployment-name": "bench-fetch-variables"},
+                                files={"bench.bpmn": ("bench.bpmn", BPMN, "application/xml")})
+    try:
+        print(f"Starting {args.instances} instances ...")
+        for i in range(args.instances):
+            client.start_process("benchFetchVariables", contract_variables(i))
+
+        measure(client, "all", None, args)
+        measure(client, "create", CREATE_VARIABLES, args)
+        measure(client, "approve", APPROVE_VARIABLES, args)
+        measure(client, "reject", REJECT_VARIABLES, args)
+        measure(client, "email", EMAIL_VARIABLES, args)
+    finally:
+        client.request("DELETE", f"/deployment/{deployment['id']}", params={"cascade": "true"})
+        client.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Cost of resolving contractId -> processInstanceId for the provider PATCH sync.
+
+Seeds a fake engine with many process instances, then pushes provider variables for random
+contracts three ways:
+
+- search: GET /variable-instance?variableName=contractId (the old PATCH path) + POST variables
+- cached: TTLCache lookup, falling back to the search on a miss + POST variables
+- stored: ProcessInstanceId read from the Contracts row + POST variables
+
+The fake engine answers the search with a linear scan, standing in for Camunda's
+value search over its variable table.
+
+    cd benchmarks && PYTHONPATH=../backend python bench_instance_lookup.py --instances 100000
+"""
+import argparse
+import random
+import statistics
+import time
+import uuid
+
+from cache import TTLCache
+from camunda_client import CamundaClient
+from fake_camunda import FakeCamunda
+
+MODS = {"providersBudget": {"value": 7500, "type": "Integer"}}
+
+
+def timed(fn, calls: list) -> list:
+    out = []
+    for args in calls:
+        t0 = time.perf_counter()
+        fn(*args)
+        out.append(time.perf_counter() - t0)
+    return out
+
+
+def report(name: str, lat: list):
+    lat = sorted(lat)
+    p95 = lat[min(len(lat) - 1, int(len(lat) * 0.95))]
+    print(f"{name:>7}: n={len(lat)} mean={statistics.mean(lat) * 1000:8.2f}ms "
+          f"p50={statistics.median(lat) * 1000:8.2f}ms p95={p95 * 1000:8.2f}ms")
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--instances", type=int, default=100000, help="seeded process instances")
+    ap.add_argument("--calls", type=int, default=200, help="PATCH syncs per strategy")
+    ap.add_argument("--hot", type=int, default=50, help="distinct contracts the syncs are drawn from")
+    args = ap.parse_args()
+
+    with FakeCamunda(["store-create-contract"]) as cam:
+        contract_ids = [str(uuid.uuid4()) for _ in range(args.instances)]
+        instance_ids = cam.engine.seed([{"contractId": {"value": c, "type": "String"}} for c in contract_ids])
+        stored = dict(zip(contract_ids, instance_ids))
+        client = CamundaClient(cam.url)
+
+        rng = random.Random(7)
+        hot = rng.sample(contract_ids, args.hot)
+        calls = [(rng.choice(hot),) for _ in range(args.calls)]
+
+        def search(cid):
+            instance_id = client.variable_instances("contractId", cid)[0]["processInstanceId"]
+            client.set_variables(instance_id, MODS)
+
+        cache = TTLCache(maxsize=10000, ttl=3600)
+
+        def cached(cid):
+            instance_id = cache.get(cid)
+            if instance_id is None:
+                instance_id = client.variable_instances("contractId", cid)[0]["processInstanceId"]
+                cache.set(cid, instance_id)
+            client.set_variables(instance_id, MODS)
+
+        def from_row(cid):
+            client.set_variables(stored[cid], MODS)
+
+        print(f"seeded {args.instances} instances, {args.calls} syncs over {args.hot} contracts")
+        report("search", timed(search, calls))
+        report("cached", timed(cached, calls))
+        report("stored", timed(from_row, calls))
+        print(f"cache: {cache.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,316 @@
+"""
+End-to-end load test of the contract lifecycle, offline: N synthetic contracts go through
+contractTool (draft -> store -> provider PATCH -> review -> approve / reject) against the
+real backend and store worker, with the fake engine-rest from fake_camunda.py standing in
+for Camunda and a local SQL Server container for Azure SQL.
+
+    docker run -d --name contract-sql -e ACCEPT_EULA=Y -e MSSQL_SA_PASSWORD='Bench!Passw0rd' \\
+        -p 1433:1433 mcr.microsoft.com/mssql/server:2022-latest
+    cd benchmarks && PYTHONPATH=../backend:../docker python bench_lifecycle.py \\
+        --contracts 500 --concurrency 50 --sql-user sa --sql-password 'Bench!Passw0rd'
+
+The harness creates --sql-database if needed and applies docker/migrations, then starts
+the backend (uvicorn) and store_worker.py as subprocesses pointed at the fake engine
+(their output goes to --logs-dir). It plays every human role itself: each contract is
+started with POST /start-process, its PM draft completed with the contractDraft fields,
+offered through PATCH /api/providers/contracts/{id} once stored, reviewed, and approved
+or (with --reject-ratio) declined by legal. The notify topics are completed in-process
+without sending mail. User tasks are completed as soon as they exist, so the lifecycle
+time is pure system time.
+
+Reported: contracts/sec, latency percentiles per stage (HTTP calls, each external task
+from creation to completion, and PATCH -> variables pushed to the engine by the outbox),
+CPU time and peak RSS per process (Linux /proc), and the final status counts in SQL.
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from collections import defaultdict
+
+import httpx
+import pyodbc
+
+import migrate
+from fake_camunda import CONTRACT_TOOL, FakeCamunda
+from worker_runtime import WorkerRuntime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+NOTIFY_TOPICS = ["notify-provider-manager", "notify-legal"]
+EXTERNAL_STAGES = ["store-create-contract", "notify-provider-manager", "notify-legal",
+                   "store-contract", "store-reject-contract"]
+
+
+def percentile(sorted_values: list, q: float) -> float:
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * q))]
+
+
+# --- SQL ---
+
+def conn_str(args, database: str) -> str:
+    return ("Driver={ODBC Driver 18 for SQL Server};"
+            f"Server=tcp:{args.sql_server},{args.sql_port};Database={database};"
+            f"Uid={args.sql_user};Pwd={args.sql_password};Encrypt=yes;TrustServerCertificate=yes;")
+
+
+def prepare_database(args):
+    master = pyodbc.connect(conn_str(args, "master"), autocommit=True)
+    master.cursor().execute(f"IF DB_ID(N'{args.sql_database}') IS NULL CREATE DATABASE [{args.sql_database}]")
+    master.close()
+    conn = pyodbc.connect(conn_str(args, args.sql_database))
+    try:
+        migrate.apply(conn)
+        if args.truncate:
+            cur = conn.cursor()
+            cur.execute("DELETE FROM CamundaOutbox; DELETE FROM Contracts; DELETE FROM ContractStatusCounts")
+            conn.commit()
+    finally:
+        conn.close()
+
+
+def status_counts(args) -> dict:
+    conn = pyodbc.connect(conn_str(args, args.sql_database))
+    try:
+        cur = conn.cursor()
+        cur.execute("SELECT ContractStatus, COUNT(*) FROM Contracts GROUP BY ContractStatus")
+        return {status: count for status, count in cur.fetchall()}
+    finally:
+        conn.close()
+
+
+# --- processes ---
+
+class Service:
+    """A backend or worker subprocess with CPU / RSS read from /proc."""
+
+    def __init__(self, name: str, cmd: list, cwd: str, env: dict, logs_dir: str):
+        self.name = name
+        self.log = open(os.path.join(logs_dir, f"{name}.log"), "w")
+        self.proc = subprocess.Popen(cmd, cwd=cwd, env=env, stdout=self.log, stderr=subprocess.STDOUT)
+        self.pid = self.proc.pid
+
+    def stop(self):
+        self.proc.terminate()
+        try:
+            self.proc.wait(10)
+        except subprocess.TimeoutExpired:
+            self.proc.kill()
+        self.log.close()
+
+
+def cpu_seconds(pid: int) -> float:
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+    except (OSError, IndexError, ValueError):
+        return float("nan")
+
+
+def peak_rss_mb(pid: int) -> float:
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return float("nan")
+
+
+def service_env(args, engine_rest: str) -> dict:
+    env = dict(os.environ)
+    env.update({
+        "PYTHONPATH": os.pathsep.join([os.path.join(ROOT, "backend"), os.path.join(ROOT, "docker")]),
+        "AZURE_SQL_SERVER": args.sql_server,
+        "AZURE_SQL_PORT": str(args.sql_port),
+        "AZURE_SQL_DATABASE": args.sql_database,
+        "AZURE_SQL_USER": args.sql_user,
+        "AZURE_SQL_PASSWORD": args.sql_password,
+        "AZURE_SQL_TRUST_SERVER_CERTIFICATE": "yes",
+        "CAMUNDA_URL": engine_rest,
+        "ENGINE_REST": engine_rest,
+        "METRICS_PORT": "0",
+    })
+    return env
+
+
+def start_notify_runtime(engine_rest: str):
+    """Completes notify tasks in-process, standing in for the notify worker and MailHog."""
+    runtime = WorkerRuntime(engine_rest, None, "bench-notify", max_tasks=20, session_factory=lambda: None,
+                            tag="bench-notify")
+    for topic in NOTIFY_TOPICS:
+        runtime.topic(topic, concurrency=2)(lambda session, tasks: [{} for _ in tasks])
+    threading.Thread(target=asyncio.run, args=(runtime.run(),), daemon=True).start()
+
+
+async def wait_ready(client: httpx.AsyncClient, timeout: float = 60.0):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            if (await client.get("/")).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        if time.monotonic() > deadline:
+            raise RuntimeError("backend did not start; see its log in --logs-dir")
+        await asyncio.sleep(0.2)
+
+
+# --- one contract ---
+
+def var(value, type_name: str = "String") -> dict:
+    return {"value": value, "type": type_name}
+
+
+async def until(predicate, timeout: float, what: str, poll: float = 0.005):
+    deadline = time.monotonic() + timeout
+    while True:
+        result = predicate()
+        if result:
+            return result
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"timed out waiting for {what}")
+        await asyncio.sleep(poll)
+
+
+async def user_task(engine, instance_id: str, key: str, timeout: float) -> dict:
+    tasks = await until(lambda: engine.tasks(instance_id, key), timeout, key)
+    return tasks[0]
+
+
+async def lifecycle(i: int, client: httpx.AsyncClient, engine, args, rng: random.Random, lat: dict) -> str:
+    t0 = time.monotonic()
+    r = await client.post("/start-process", json={"contractTitle": f"Bench contract {i}", "requestedBy": "pmuser"})
+    lat["POST /start-process"].append(time.monotonic() - t0)
+    r.raise_for_status()
+    instance_id = r.json()["camunda_response"]["id"]
+
+    # PM fills in the draft form
+    task = await user_task(engine, instance_id, "PM_Draft_Contract", args.timeout)
+    engine.complete_user_task(task["id"], {
+        "contractType": var("freelance"), "roles": var("Backend Developer"), "skills": var("Python, SQL"),
+        "requestType": var("single"), "budget": var(25000.0, "Double"),
+        "contractStartDate": var("2026-01-01"), "contractEndDate": var("2026-12-31"),
+        "description": var("Lorem ipsum dolor sit amet. " * 20),
+    })
+
+    # Provider offers once the create worker has stored the contract
+    contract_id = await until(lambda: engine.get_variables(instance_id).get("contractId", {}).get("value"),
+                              args.timeout, "contractId")
+    t1 = time.monotonic()
+    r = await client.patch(f"/api/providers/contracts/{contract_id}", json={
+        "providersBudget": 24000, "providersComment": "Bench offer", "meetRequirement": "Yes",
+        "providersName": "Acme"})
+    lat["PATCH /api/providers/contracts/{id}"].append(time.monotonic() - t1)
+    r.raise_for_status()
+    synced = await until(lambda: engine.instances[instance_id]["variableTimes"].get("providersBudget"),
+                         args.timeout, "outbox sync")
+    lat["PATCH -> engine variables (outbox)"].append(synced - t1)
+
+    task = await user_task(engine, instance_id, "PM_Review_Offers", args.timeout)
+    engine.complete_user_task(task["id"], {"pmComment": var("Looks good")})
+
+    decision = "decline" if rng.random() < args.reject_ratio else "approve"
+    task = await user_task(engine, instance_id, "Legal_Review", args.timeout)
+    engine.complete_user_task(task["id"], {"approvaldecision": var(decision), "legalcomment": var("Checked")})
+    if decision == "approve":
+        task = await user_task(engine, instance_id, "CA_Finalize_Storage", args.timeout)
+        engine.complete_user_task(task["id"], {
+            "signeddate": var("2026-01-15"), "employeeName": var("Jane Doe"),
+            "officeAddress": var("Main Street 1"), "finalPrice": var(24000, "Integer")})
+
+    inst = engine.instances[instance_id]
+    await until(lambda: inst["endedAt"], args.timeout, "process end")
+    lat["lifecycle (start -> end)"].append(inst["endedAt"] - t0)
+    for step, created, locked, completed in inst["stageTimes"]:
+        if step in EXTERNAL_STAGES:
+            lat[f"{step} (created -> completed)"].append(completed - created)
+            lat[f"{step} (pickup)"].append(locked - created)
+    return decision
+
+
+async def drive(engine, backend_url: str, args) -> tuple:
+    lat = defaultdict(list)
+    outcomes = defaultdict(int)
+    rng = random.Random(42)
+    gate = asyncio.Semaphore(args.concurrency)
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=backend_url, timeout=args.timeout, limits=limits) as client:
+        await wait_ready(client)
+
+        async def one(i):
+            async with gate:
+                try:
+                    outcomes[await lifecycle(i, client, engine, args, rng, lat)] += 1
+                except Exception as e:
+                    outcomes[f"error: {type(e).__name__}: {e}"[:120]] += 1
+
+        t0 = time.monotonic()
+        await asyncio.gather(*(one(i) for i in range(args.contracts)))
+        elapsed = time.monotonic() - t0
+    return lat, outcomes, elapsed
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--contracts", type=int, default=200)
+    ap.add_argument("--concurrency", type=int, default=20, help="contracts in flight at once")
+    ap.add_argument("--reject-ratio", type=float, default=0.2, help="share of contracts legal declines")
+    ap.add_argument("--timeout", type=float, default=60.0, help="seconds per HTTP call / lifecycle step")
+    ap.add_argument("--sql-server", default="localhost")
+    ap.add_argument("--sql-port", type=int, default=1433)
+    ap.add_argument("--sql-database", default="contract_bench")
+    ap.add_argument("--sql-user", default="sa")
+    ap.add_argument("--sql-password", required=True)
+    ap.add_argument("--keep-data", dest="truncate", action="store_false",
+                    help="keep rows from earlier runs (default: delete them first)")
+    ap.add_argument("--backend-port", type=int, default=8765)
+    ap.add_argument("--logs-dir", default=os.path.join(ROOT, "benchmarks", "lifecycle-logs"))
+    args = ap.parse_args()
+
+    os.makedirs(args.logs_dir, exist_ok=True)
+    print(f"Preparing database {args.sql_database} on {args.sql_server}:{args.sql_port} ...")
+    prepare_database(args)
+
+    with FakeCamunda(CONTRACT_TOOL) as cam:
+        env = service_env(args, cam.url)
+        services = [
+            Service("backend", [sys.executable, "-m", "uvicorn", "main:app", "--port", str(args.backend_port),
+                                "--log-level", "warning"], os.path.join(ROOT, "backend"), env, args.logs_dir),
+            Service("store-worker", [sys.executable, "store_worker.py"], os.path.join(ROOT, "docker"), env,
+                    args.logs_dir),
+        ]
+        start_notify_runtime(cam.url)
+        try:
+            cpu0 = {s.name: cpu_seconds(s.pid) for s in services}
+            self_cpu0 = cpu_seconds(os.getpid())
+            lat, outcomes, elapsed = asyncio.run(drive(cam.engine, f"http://127.0.0.1:{args.backend_port}", args))
+            usage = [(s.name, cpu_seconds(s.pid) - cpu0[s.name], peak_rss_mb(s.pid)) for s in services]
+            usage.append(("harness + fake engine", cpu_seconds(os.getpid()) - self_cpu0, peak_rss_mb(os.getpid())))
+        finally:
+            for s in services:
+                s.stop()
+
+    done = sum(n for k, n in outcomes.items() if not k.startswith("error"))
+    print(f"\n{done}/{args.contracts} contracts in {elapsed:.1f}s = {done / elapsed:.1f} contracts/s "
+          f"(concurrency {args.concurrency})  outcomes={dict(outcomes)}")
+    print(f"\n{'stage':<48} {'n':>6} {'mean':>9} {'p50':>9} {'p95':>9} {'p99':>9}")
+    for name, values in lat.items():
+        values.sort()
+        print(f"{name:<48} {len(values):>6} " + " ".join(
+            f"{v * 1000:7.1f}ms" for v in (statistics.mean(values), percentile(values, 0.50),
+                                           percentile(values, 0.95), percentile(values, 0.99))))
+    print(f"\n{'process':<24} {'CPU s':>8} {'CPU %':>7} {'peak RSS':>10}")
+    for name, cpu, rss in usage:
+        print(f"{name:<24} {cpu:8.1f} {cpu / elapsed * 100:6.0f}% {rss:8.0f}MB")
+    print(f"\nContracts in SQL by status: {status_counts(args)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+End-to-end latency per process instance: fixed-sleep polling vs. fetchAndLock long polling.
+
+A fake engine chains five external-task topics (the service tasks of contract-tool-v1.bpmn).
+A WorkerRuntime subscribed to all of them completes every task without touching SQL, so the
+measured latency is pure task-pickup delay.
+
+    cd benchmarks && PYTHONPATH=../backend:../docker python bench_polling_latency.py --instances 30
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import threading
+import time
+
+import requests
+
+from fake_camunda import FakeCamunda
+from worker_runtime import WorkerRuntime
+
+TOPICS = [
+    "store-create-contract",
+    "notify-provider-manager",
+    "notify-legal",
+    "store-contract",
+    "store-reject-contract",
+]
+
+
+def noop(session, tasks: list) -> list:
+    return [{} for _ in tasks]
+
+
+def start_runtime(engine_rest: str, poll_sleep: float, async_timeout_ms: int) -> threading.Thread:
+    runtime = WorkerRuntime(engine_rest, None, "bench-worker", sql_connect=None, max_tasks=10,
+                            async_timeout_ms=async_timeout_ms, poll_sleep=poll_sleep, tag="bench")
+    for topic in TOPICS:
+        runtime.topic(topic, concurrency=4)(noop)
+    th = threading.Thread(target=asyncio.run, args=(runtime.run(),), daemon=True)
+    th.start()
+    return th
+
+
+def run(mode: str, instances: int, poll_sleep: float, async_timeout_ms: int, spacing: float) -> list:
+    with FakeCamunda(TOPICS) as cam:
+        start_runtime(cam.url, poll_sleep, 0 if mode == "poll" else async_timeout_ms)
+
+        rng = random.Random(42)
+        for i in range(instances):
+            requests.post(f"{cam.url}/process-definition/key/contractTool/start",
+                          json={"variables": {"contractTitle": {"value": f"bench-{i}"}}}, timeout=10)
+            time.sleep(rng.uniform(0, 2 * spacing))
+
+        while len(cam.engine.finished()) < instances:
+            time.sleep(0.05)
+        return [i["endedAt"] - i["startedAt"] for i in cam.engine.finished()]
+
+
+def report(mode: str, latencies: list):
+    lat = sorted(latencies)
+    p95 = lat[min(len(lat) - 1, int(len(lat) * 0.95))]
+    print(f"{mode:>9}: n={len(lat)} mean={statistics.mean(lat) * 1000:8.1f}ms "
+          f"p50={statistics.median(lat) * 1000:8.1f}ms p95={p95 * 1000:8.1f}ms")
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--instances", type=int, default=20)
+    ap.add_argument("--poll-sleep", type=float, default=2.0, help="POLL_SLEEP_SEC of the old loop")
+    ap.add_argument("--async-timeout-ms", type=int, default=30000, help="ASYNC_RESPONSE_TIMEOUT_MS")
+    ap.add_argument("--spacing", type=float, default=0.3, help="mean seconds between process starts")
+    args = ap.parse_args()
+
+    for mode in ("poll", "long-poll"):
+        report(mode, run(mode, args.instances, args.poll_sleep, args.async_timeout_ms, args.spacing))
+
+
+if __name__ == "__main__":
+    main()
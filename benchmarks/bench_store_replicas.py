@@ -0,0 +1,147 @@
+"""
+Store-worker throughput with 1 to N replicas polling the same topics, and how the work
+is shared between them.
+
+    docker run -d --name contract-sql -e ACCEPT_EULA=Y -e MSSQL_SA_PASSWORD='Bench!Passw0rd' \\
+        -p 1433:1433 mcr.microsoft.com/mssql/server:2022-latest
+    cd benchmarks && PYTHONPATH=../backend:../docker python bench_store_replicas.py \\
+        --sql-password 'Bench!Passw0rd' --replicas 1,2,4 --contracts 2000
+
+For each replica count the fake engine-rest (fake_camunda.py) gets --contracts instances
+of a two-step flow, store-create-contract then store-contract, with every variable both
+steps need set at start; then that many store_worker.py processes are started against it
+and a local SQL Server container, and the run ends when every instance has ended.
+--sigterm-after stops one replica that many seconds into the run, to check that its
+batches are drained or handed back rather than lost.
+
+Reported per replica count: tasks/sec and speed-up over one replica, each replica's share
+of the completed tasks (by workerId), lock events in the engine (extended, unlocked on
+shutdown, expired - the last should stay 0), worker CPU seconds, and the contracts in SQL
+by status (duplicates there would mean a task was stored twice).
+"""
+import argparse
+import os
+import sys
+import time
+
+import pyodbc
+
+from bench_lifecycle import ROOT, Service, conn_str, cpu_seconds, prepare_database, service_env, status_counts
+from fake_camunda import FakeCamunda
+
+FLOW = ["store-create-contract", "store-contract"]
+
+
+def var(value, type_name: str = "String") -> dict:
+    return {"value": value, "type": type_name}
+
+
+def contract_variables(i: int) -> dict:
+    return {
+        "contractTitle": var(f"Replica contract {i}"), "contractType": var("freelance"),
+        "roles": var("Backend Developer"), "skills": var("Python, SQL"), "requestType": var("single"),
+        "budget": var(25000.0, "Double"), "contractStartDate": var("2026-01-01"),
+        "contractEndDate": var("2026-12-31"), "description": var("Lorem ipsum dolor sit amet. " * 20),
+        # store-contract
+        "signeddate": var("2026-01-15"), "employeeName": var("Jane Doe"), "officeAddress": var("Main Street 1"),
+        "finalPrice": var(24000, "Integer"), "legalcomment": var("Checked"), "approvaldecision": var("approve"),
+    }
+
+
+def distinct_contracts(args) -> int:
+    conn = pyodbc.connect(conn_str(args, args.sql_database))
+    try:
+        cur = conn.cursor()
+        cur.execute("SELECT COUNT(DISTINCT ProcessInstanceId) FROM Contracts")
+        return cur.fetchone()[0]
+    finally:
+        conn.close()
+
+
+def run(args, replicas: int) -> dict:
+    prepare_database(args)
+    with FakeCamunda(FLOW) as cam:
+        for i in range(args.contracts):
+            cam.engine.start(contract_variables(i))
+        env = service_env(args, cam.url)
+        env.update({
+            "MAX_TASKS": str(args.max_tasks),
+            "LOCK_DURATION_MS": str(args.lock_ms),
+            "BATCH_TARGET_MS": str(args.batch_target_ms),
+            "SHUTDOWN_GRACE_SEC": str(args.shutdown_grace),
+            "WORKER_ID": "bench-store",
+        })
+        t0 = time.monotonic()
+        services = [Service(f"store-{replicas}-{n}", [sys.executable, "store_worker.py"],
+                            os.path.join(ROOT, "docker"), env, args.logs_dir) for n in range(replicas)]
+        stopped = None
+        try:
+            while len(cam.engine.finished()) < args.contracts:
+                if time.monotonic() - t0 > args.timeout:
+                    raise SystemExit(f"timed out: {len(cam.engine.finished())}/{args.contracts} instances ended; "
+                                     f"see the worker logs in {args.logs_dir}")
+                if args.sigterm_after and stopped is None and time.monotonic() - t0 >= args.sigterm_after:
+                    stopped = services[-1]
+                    stopped.proc.terminate()
+                time.sleep(0.01)
+            elapsed = time.monotonic() - t0
+            cpu = sum(cpu_seconds(s.pid) for s in services if s.proc.poll() is None)
+        finally:
+            for s in services:
+                s.stop()
+        with cam.engine.cond:
+            completed_by = dict(cam.engine.completed_by)
+            lock_events = dict(cam.engine.lock_events)
+    return {
+        "replicas": replicas, "elapsed": elapsed, "tasks": sum(completed_by.values()),
+        "completed_by": completed_by, "lock_events": lock_events, "cpu": cpu,
+        "stopped_exit": None if stopped is None else stopped.proc.returncode,
+        "statuses": status_counts(args), "distinct": distinct_contracts(args),
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--replicas", default="1,2,4", help="comma-separated store-worker replica counts")
+    ap.add_argument("--contracts", type=int, default=2000, help="instances per replica count")
+    ap.add_argument("--max-tasks", type=int, default=10, help="MAX_TASKS per replica")
+    ap.add_argument("--lock-ms", type=int, default=60000, help="LOCK_DURATION_MS")
+    ap.add_argument("--batch-target-ms", type=int, default=5000, help="BATCH_TARGET_MS")
+    ap.add_argument("--shutdown-grace", type=float, default=20.0, help="SHUTDOWN_GRACE_SEC")
+    ap.add_argument("--sigterm-after", type=float, default=0.0,
+                    help="SIGTERM one replica this many seconds into each run (0 = never)")
+    ap.add_argument("--timeout", type=float, default=600.0, help="seconds per replica count")
+    ap.add_argument("--sql-server", default="localhost")
+    ap.add_argument("--sql-port", type=int, default=1433)
+    ap.add_argument("--sql-database", default="contract_bench")
+    ap.add_argument("--sql-user", default="sa")
+    ap.add_argument("--sql-password", required=True)
+    ap.add_argument("--logs-dir", default=os.path.join(ROOT, "benchmarks", "replica-logs"))
+    args = ap.parse_args()
+    args.truncate = True  # every replica count starts from an empty Contracts table
+
+    os.makedirs(args.logs_dir, exist_ok=True)
+    results = []
+    for replicas in (int(n) for n in args.replicas.split(",")):
+        print(f"Running {args.contracts} contracts through {replicas} replica(s) ...")
+        r = run(args, replicas)
+        results.append(r)
+        share = ", ".join(f"{n / r['tasks']:.0%}" for n in sorted(r["completed_by"].values(), reverse=True))
+        print(f"  {r['tasks'] / r['elapsed']:,.0f} tasks/s  share=[{share}]  lock events={r['lock_events']}"
+              + (f"  stopped replica exit={r['stopped_exit']}" if args.sigterm_after else ""))
+        print(f"  Contracts in SQL by status: {r['statuses']} ({r['distinct']} distinct instances)")
+
+    base = results[0]["tasks"] / results[0]["elapsed"]
+    print(f"\nflow={FLOW}, MAX_TASKS={args.max_tasks}, LOCK_DURATION_MS={args.lock_ms}")
+    print(f"{'replicas':>8} {'tasks/s':>9} {'speed-up':>9} {'max share':>10} {'extended':>9} {'unlocked':>9} "
+          f"{'expired':>8} {'CPU s':>7}")
+    for r in results:
+        rate = r["tasks"] / r["elapsed"]
+        top = max(r["completed_by"].values()) / r["tasks"] if r["tasks"] else 0.0
+        ev = r["lock_events"]
+        print(f"{r['replicas']:>8} {rate:>9,.0f} {rate / base:>8.2f}x {top:>10.0%} {ev.get('extended', 0):>9} "
+              f"{ev.get('unlocked', 0):>9} {ev.get('expired', 0):>8} {r['cpu']:>7.1f}")
+
+
+if __name__ == "__main__":
+    main()
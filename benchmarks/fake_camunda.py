@@ -0,0 +1,419 @@
+"""
+Minimal in-process stand-in for Camunda 7 `engine-rest`, for offline benchmarks.
+
+Each process instance walks a flow of steps: external-task topics, or user tasks written
+as "user:<taskDefinitionKey>". Completing the task of one step creates the task of the
+next. A flow is either a list (steps in order) or a dict {step: next} where next is a
+step, None (end) or a function of the instance variables returning one, like an
+exclusive gateway; CONTRACT_TOOL models contract-tool-v1.bpmn. Supported endpoints:
+
+- POST /process-definition/key/{key}/start
+- POST /external-task/fetchAndLock   (maxTasks, topics, asyncResponseTimeout)
+- POST /external-task/{id}/complete
+- POST /external-task/{id}/failure
+- POST /external-task/{id}/extendLock (newDuration)
+- POST /external-task/{id}/unlock
+- GET  /task                         (processInstanceId, taskDefinitionKey)
+- POST /task/{id}/complete
+- GET  /variable-instance            (variableName, variableValue; linear scan like an unindexed search)
+- GET  /process-instance/{id}/variables
+- POST /process-instance/{id}/variables
+"""
+import itertools
+import json
+import re
+import threading
+import time
+import uuid
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+USER = "user:"
+
+
+def _value(variables: dict, name: str):
+    return (variables.get(name) or {}).get("value")
+
+
+# contract-tool-v1.bpmn. A rejected contract loops back to the PM draft in the real
+# process; here its instance ends after store-reject-contract.
+CONTRACT_TOOL = {
+    "start": "user:PM_Draft_Contract",
+    "user:PM_Draft_Contract": "store-create-contract",
+    "store-create-contract": "notify-provider-manager",
+    "notify-provider-manager": "user:PM_Review_Offers",
+    "user:PM_Review_Offers": "notify-legal",
+    "notify-legal": "user:Legal_Review",
+    "user:Legal_Review": lambda v: ("user:CA_Finalize_Storage" if _value(v, "approvaldecision") == "approve"
+                                    else "store-reject-contract"),
+    "user:CA_Finalize_Storage": "store-contract",
+    "store-contract": None,
+    "store-reject-contract": None,
+}
+
+
+def _as_flow(steps) -> dict:
+    if isinstance(steps, dict):
+        return steps
+    flow = {"start": steps[0]}
+    flow.update(zip(steps, list(steps[1:]) + [None]))
+    return flow
+
+
+class Engine:
+    def __init__(self, steps):
+        self.flow = _as_flow(steps)
+        self.cond = threading.Condition()
+        self.pending = {step: [] for step in self.flow if step != "start" and not step.startswith(USER)}
+        self.locked = {}                                # task id -> task
+        self.user_tasks = {}                            # task id -> open user task
+        self.instances = {}                             # instance id -> dict
+        self.completed_by = Counter()                   # workerId -> external tasks completed
+        self.lock_events = Counter()                    # extended / unlocked / expired
+        self._ids = itertools.count(1)
+
+    # --- state transitions (caller holds self.cond) ---
+
+    def _advance(self, inst: dict, step: str, now: float):
+        nxt = self.flow[step]
+        if callable(nxt):
+            nxt = nxt(inst["variables"])
+        inst["step"] = nxt
+        if nxt is None:
+            inst["endedAt"] = now
+            self.cond.notify_all()
+        else:
+            self._create_task(inst)
+
+    def _create_task(self, inst: dict):
+        step = inst["step"]
+        task = {
+            "id": f"task-{next(self._ids)}",
+            "processInstanceId": inst["id"],
+            "businessKey": inst.get("businessKey"),
+            "createdAt": time.monotonic(),
+        }
+        if step.startswith(USER):
+            task.update(taskDefinitionKey=step[len(USER):], name=step[len(USER):])
+            self.user_tasks[task["id"]] = task
+        else:
+            task.update(topicName=step, retries=None)
+            self.pending[step].append(task)
+        self.cond.notify_all()
+
+    def start(self, variables: dict, business_key=None) -> dict:
+        with self.cond:
+            inst = {
+                "id": str(uuid.uuid4()),
+                "businessKey": business_key,
+                "variables": dict(variables),
+                "step": self.flow["start"],
+                "startedAt": time.monotonic(),
+                "endedAt": None,
+                "stageTimes": [],     # (step, created, locked, completed) per finished task
+                "variableTimes": {},  # name -> last POST /process-instance/{id}/variables
+            }
+            self.instances[inst["id"]] = inst
+            self._create_task(inst)
+            return inst
+
+    def seed(self, variables_list: list) -> list:
+        """Adds instances parked before their first task (bulk setup for lookup benchmarks)."""
+        with self.cond:
+            ids = []
+            for variables in variables_list:
+                inst = {"id": str(uuid.uuid4()), "businessKey": None, "variables": dict(variables),
+                        "step": self.flow["start"], "startedAt": time.monotonic(), "endedAt": None,
+                        "stageTimes": [], "variableTimes": {}}
+                self.instances[inst["id"]] = inst
+                ids.append(inst["id"])
+            return ids
+
+    def variable_instances(self, name: str, value) -> list:
+        with self.cond:
+            return [
+                {"id": f"{inst['id']}:{name}", "name": name, "processInstanceId": inst["id"], **inst["variables"][name]}
+                for inst in self.instances.values()
+                if name in inst["variables"] and str(inst["variables"][name].get("value")) == value
+            ]
+
+    def get_variables(self, instance_id: str) -> dict:
+        with self.cond:
+            return dict(self.instances[instance_id]["variables"])
+
+    def set_variables(self, instance_id: str, modifications: dict):
+        with self.cond:
+            inst = self.instances[instance_id]
+            inst["variables"].update(modifications or {})
+            now = time.monotonic()
+            for name in modifications or {}:
+                inst["variableTimes"][name] = now
+            self.cond.notify_all()
+
+    def tasks(self, instance_id: str = None, key: str = None) -> list:
+        """Open user tasks, like GET /task."""
+        with self.cond:
+            return [
+                {k: v for k, v in t.items() if k != "createdAt"} for t in self.user_tasks.values()
+                if (instance_id is None or t["processInstanceId"] == instance_id)
+                and (key is None or t["taskDefinitionKey"] == key)
+            ]
+
+    def complete_user_task(self, task_id: str, variables: dict = None):
+        with self.cond:
+            task = self.user_tasks.pop(task_id)
+            inst = self.instances[task["processInstanceId"]]
+            inst["variables"].update(variables or {})
+            now = time.monotonic()
+            step = USER + task["taskDefinitionKey"]
+            inst["stageTimes"].append((step, task["createdAt"], task["createdAt"], now))
+            self._advance(inst, step, now)
+
+    def _take(self, worker_id: str, max_tasks: int, topics: list) -> list:
+        out = []
+        now = time.monotonic()
+        for t in topics:
+            queue = self.pending.get(t["topicName"], [])
+            for task in [q for q in queue if q.get("availableAt", 0) <= now]:
+                if len(out) >= max_tasks:
+                    break
+                queue.remove(task)
+                task["workerId"] = worker_id
+                task["lockExpiresAt"] = now + t.get("lockDuration", 60000) / 1000
+                task["lockedAt"] = now
+                self.locked[task["id"]] = task
+                inst = self.instances[task["processInstanceId"]]
+                names = t.get("variables")
+                variables = inst["variables"] if names is None else {
+                    k: v for k, v in inst["variables"].items() if k in names
+                }
+                out.append({**{k: v for k, v in task.items() if k not in ("createdAt", "lockedAt", "availableAt")},
+                            "variables": variables})
+        return out
+
+    def fetch_and_lock(self, body: dict) -> list:
+        deadline = time.monotonic() + body.get("asyncResponseTimeout", 0) / 1000
+        with self.cond:
+            while True:
+                self._expire_locks()
+                tasks = self._take(body["workerId"], body.get("maxTasks", 1), body.get("topics", []))
+                remaining = deadline - time.monotonic()
+                if tasks or remaining <= 0:
+                    return tasks
+                # Wake up for tasks whose retryTimeout elapses before the poll deadline
+                retry_at = [q["availableAt"] for queue in self.pending.values() for q in queue if "availableAt" in q]
+                if retry_at:
+                    remaining = max(0.001, min(remaining, min(retry_at) - time.monotonic()))
+                self.cond.wait(remaining)
+
+    def _expire_locks(self):
+        now = time.monotonic()
+        for task_id, task in list(self.locked.items()):
+            if task["lockExpiresAt"] < now:
+                del self.locked[task_id]
+                self.pending[task["topicName"]].insert(0, task)
+                self.lock_events["expired"] += 1
+
+    def complete(self, task_id: str, body: dict):
+        with self.cond:
+            task = self.locked.pop(task_id, None)
+            if task is None or task.get("workerId") != body.get("workerId"):
+                raise KeyError(task_id)
+            self.completed_by[task["workerId"]] += 1
+            inst = self.instances[task["processInstanceId"]]
+            inst["variables"].update(body.get("variables") or {})
+            now = time.monotonic()
+            inst["stageTimes"].append((task["topicName"], task["createdAt"], task["lockedAt"], now))
+            self._advance(inst, task["topicName"], now)
+
+    def failure(self, task_id: str, body: dict):
+        with self.cond:
+            task = self.locked.pop(task_id, None)
+            if task is None:
+                raise KeyError(task_id)
+            task["retries"] = body.get("retries", 0)
+            if task["retries"] > 0:
+                task["availableAt"] = time.monotonic() + body.get("retryTimeout", 0) / 1000
+                self.pending[task["topicName"]].append(task)
+                self.cond.notify_all()
+
+    def extend_lock(self, task_id: str, body: dict):
+        with self.cond:
+            task = self.locked.get(task_id)
+            if task is None or task.get("workerId") != body.get("workerId"):
+                raise KeyError(task_id)
+            task["lockExpiresAt"] = time.monotonic() + body.get("newDuration", 0) / 1000
+            self.lock_events["extended"] += 1
+
+    def unlock(self, task_id: str):
+        with self.cond:
+            task = self.locked.pop(task_id, None)
+            if task is None:
+                raise KeyError(task_id)
+            self.pending[task["topicName"]].insert(0, task)
+            self.lock_events["unlocked"] += 1
+            self.cond.notify_all()
+
+    def finished(self) -> list:
+        with self.cond:
+            return [i for i in self.instances.values() if i["endedAt"] is not None]
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Send headers and body in one segment; otherwise Nagle + delayed ACK adds ~40ms per keep-alive call
+    disable_nagle_algorithm = True
+    wbufsize = -1
+    routes = []
+
+    def log_message(self, *args):
+        pass
+
+    def _body(self):
+        n = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(n) or b"{}") if n else {}
+
+    def _send(self, status: int, payload=None):
+        data = b"" if payload is None else json.dumps(payload).encode()
+        self.send_response(status)
+        if payload is not None:
+            self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _query(self) -> dict:
+        qs = self.path.split("?", 1)[1] if "?" in self.path else ""
+        return {k: v[0] for k, v in parse_qs(qs).items()}
+
+    def _dispatch(self, method: str):
+        path = self.path.split("?", 1)[0]
+        prefix = self.server.prefix
+        if path.startswith(prefix):
+            path = path[len(prefix):]
+        for m, pattern, fn in self.routes:
+            match = pattern.fullmatch(path)
+            if m == method and match:
+                try:
+                    status, payload = fn(self.server.engine, self, *match.groups())
+                except KeyError as e:
+                    status, payload = 404, {"type": "RestException", "message": f"Not found: {e}"}
+                return self._send(status, payload)
+        self._send(404, {"type": "RestException", "message": f"No route {method} {path}"})
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def do_PUT(self):
+        self._dispatch("PUT")
+
+    def do_DELETE(self):
+        self._dispatch("DELETE")
+
+
+def route(method: str, pattern: str):
+    def deco(fn):
+        _Handler.routes.append((method, re.compile(pattern), fn))
+        return fn
+    return deco
+
+
+@route("POST", r"/process-definition/key/([^/]+)/start")
+def _start(engine, req, key):
+    body = req._body()
+    inst = engine.start(body.get("variables") or {}, body.get("businessKey"))
+    return 200, {"id": inst["id"], "definitionId": f"{key}:1", "businessKey": inst["businessKey"],
+                 "ended": False, "suspended": False}
+
+
+@route("POST", r"/external-task/fetchAndLock")
+def _fetch_and_lock(engine, req):
+    return 200, engine.fetch_and_lock(req._body())
+
+
+@route("POST", r"/external-task/([^/]+)/complete")
+def _complete(engine, req, task_id):
+    engine.complete(task_id, req._body())
+    return 204, None
+
+
+@route("POST", r"/external-task/([^/]+)/failure")
+def _failure(engine, req, task_id):
+    engine.failure(task_id, req._body())
+    return 204, None
+
+
+@route("POST", r"/external-task/([^/]+)/extendLock")
+def _extend_lock(engine, req, task_id):
+    engine.extend_lock(task_id, req._body())
+    return 204, None
+
+
+@route("POST", r"/external-task/([^/]+)/unlock")
+def _unlock(engine, req, task_id):
+    engine.unlock(task_id)
+    return 204, None
+
+
+@route("GET", r"/task")
+def _tasks(engine, req):
+    q = req._query()
+    return 200, engine.tasks(q.get("processInstanceId"), q.get("taskDefinitionKey"))
+
+
+@route("POST", r"/task/([^/]+)/complete")
+def _complete_user_task(engine, req, task_id):
+    engine.complete_user_task(task_id, req._body().get("variables"))
+    return 204, None
+
+
+@route("GET", r"/process-instance/([^/]+)/variables")
+def _get_variables(engine, req, instance_id):
+    return 200, engine.get_variables(instance_id)
+
+
+@route("GET", r"/variable-instance")
+def _variable_instances(engine, req):
+    q = req._query()
+    return 200, engine.variable_instances(q.get("variableName"), q.get("variableValue"))
+
+
+@route("POST", r"/process-instance/([^/]+)/variables")
+def _set_variables(engine, req, instance_id):
+    engine.set_variables(instance_id, req._body().get("modifications"))
+    return 204, None
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    # The default backlog of 5 drops connects when several workers open their pools at
+    # once, and each dropped connect stalls for a SYN retransmit
+    request_queue_size = 128
+
+
+class FakeCamunda:
+    """Runs an Engine behind a threaded HTTP server; use as a context manager."""
+
+    def __init__(self, steps, host: str = "127.0.0.1", port: int = 0):
+        self.engine = Engine(steps)
+        self.server = _Server((host, port), _Handler)
+        self.server.engine = self.engine
+        self.server.prefix = "/engine-rest"
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/engine-rest"
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
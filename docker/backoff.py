@@ -0,0 +1,21 @@
+import random
+
+
+class Backoff:
+    """
+    Exponential backoff with full jitter: the n-th consecutive failure sleeps a random
+    time in [0, min(cap, base * 2**n)] so restarted workers do not hit Camunda in lockstep.
+    """
+
+    def __init__(self, base: float = 1.0, cap: float = 60.0):
+        self.base = base
+        self.cap = cap
+        self.failures = 0
+
+    def next_delay(self) -> float:
+        delay = min(self.cap, self.base * (2 ** self.failures))
+        self.failures += 1
+        return random.uniform(0, delay)
+
+    def reset(self):
+        self.failures = 0
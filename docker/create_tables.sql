@@ -1,13 +1,17 @@
 -- =========================================
 -- Contract Tool - Azure SQL Tables
+-- Fresh install (drops existing tables). Mirrors migrations/ up to 0007;
+-- existing databases are upgraded with `python migrate.py` instead.
 -- =========================================
--- Unified Contracts Table
-IF OBJECT_ID('dbo.Contracts', 'U') IS NOT NULL DROP TABLE dbo.Contracts;
-GO -- Drop old tables if they exist (cleanup)
-  IF OBJECT_ID('dbo.CreatedContracts', 'U') IS NOT NULL DROP TABLE dbo.CreatedContracts;
+-- Drop old tables if they exist (cleanup)
+IF OBJECT_ID('dbo.CreatedContracts', 'U') IS NOT NULL DROP TABLE dbo.CreatedContracts;
 IF OBJECT_ID('dbo.ApprovedContracts', 'U') IS NOT NULL DROP TABLE dbo.ApprovedContracts;
 IF OBJECT_ID('dbo.RejectedContracts', 'U') IS NOT NULL DROP TABLE dbo.RejectedContracts;
-GO CREATE TABLE dbo.Contracts (
+GO
+-- Unified Contracts Table
+IF OBJECT_ID('dbo.Contracts', 'U') IS NOT NULL DROP TABLE dbo.Contracts;
+GO
+CREATE TABLE dbo.Contracts (
     Id INT IDENTITY(1, 1) PRIMARY KEY,
     ContractId UNIQUEIDENTIFIER NOT NULL,
     ProcessInstanceId NVARCHAR(64) NULL,
@@ -26,16 +30,13 @@ GO CREATE TABLE dbo.Contracts (
     ProvidersBudget INT NULL,
     ProvidersComment NVARCHAR(MAX) DEFAULT '',
     ProvidersName NVARCHAR(255) NULL,
-    -- Provider Fields
-    ProvidersBudget INT NULL,
-    ProvidersComment NVARCHAR(MAX) DEFAULT '',
-    ProvidersName NVARCHAR(255) NULL,
     -- Approval Fields
     SignedDate NVARCHAR(50) NULL,
     ApprovedAt DATETIME2 NULL,
     -- Rejection Fields
     LegalComment NVARCHAR(MAX) NULL,
     ApprovalDecision NVARCHAR(50) NULL,
+    RejectedAt DATETIME2 NULL,
     -- Meta
     ContractStatus NVARCHAR(50) DEFAULT 'Running',
     -- Submitted, Approved, Rejected
@@ -45,7 +46,61 @@ GO CREATE TABLE dbo.Contracts (
     OfficeAddress NVARCHAR(255) NULL,
     FinalPrice FLOAT NULL,
     -- New Fields (Provider Offer)
-    MeetRequirement NVARCHAR(50) NULL
+    MeetRequirement NVARCHAR(50) NULL,
+    -- Bumped on every write; MIN_ACTIVE_ROWVERSION() is the listing cache's change token
+    RowVer ROWVERSION
   );
 CREATE UNIQUE INDEX UX_Contracts_ContractId ON dbo.Contracts(ContractId);
-GO
\ No newline at end of file
+-- /stats
+CREATE INDEX IX_Contracts_ContractStatus ON dbo.Contracts(ContractStatus);
+-- Keyset listings: one filtered index per status, keyed like ORDER BY (timestamp DESC, Id DESC)
+CREATE INDEX IX_Contracts_Open_CreatedAt ON dbo.Contracts(CreatedAt DESC, Id DESC)
+  INCLUDE (ContractId, ContractTitle, ContractType, RequestType, Budget, ContractStatus, ProvidersName, ProvidersBudget)
+  WHERE ContractStatus IN ('Submitted', 'Running');
+CREATE INDEX IX_Contracts_Approved_ApprovedAt ON dbo.Contracts(ApprovedAt DESC, Id DESC)
+  INCLUDE (ContractId, ContractTitle, ContractType, RequestType, Budget, ContractStatus, ProvidersName, CreatedAt)
+  WHERE ContractStatus = 'Approved';
+CREATE INDEX IX_Contracts_Rejected_RejectedAt ON dbo.Contracts(RejectedAt DESC, Id DESC)
+  INCLUDE (ContractId, ContractTitle, ContractType, RequestType, Budget, ContractStatus, ProvidersName, CreatedAt)
+  WHERE ContractStatus = 'Rejected';
+-- Provider change feed: WHERE RowVer > @since ORDER BY RowVer
+CREATE INDEX IX_Contracts_RowVer ON dbo.Contracts(RowVer);
+GO
+-- =========================================
+-- Camunda variable sync outbox
+-- Written by the provider PATCH in the same transaction as the Contracts update,
+-- drained by the backend's OutboxDispatcher.
+-- =========================================
+IF OBJECT_ID('dbo.CamundaOutbox', 'U') IS NOT NULL DROP TABLE dbo.CamundaOutbox;
+GO
+CREATE TABLE dbo.CamundaOutbox (
+    Id BIGINT IDENTITY(1, 1) PRIMARY KEY,
+    ContractId UNIQUEIDENTIFIER NOT NULL,
+    -- Copied from Contracts so the dispatcher can skip the /variable-instance search
+    ProcessInstanceId NVARCHAR(64) NULL,
+    -- JSON {varName: {value, type}} as sent to /process-instance/{id}/variables
+    Modifications NVARCHAR(MAX) NOT NULL,
+    CreatedAt DATETIME2 NOT NULL DEFAULT SYSUTCDATETIME(),
+    Attempts INT NOT NULL DEFAULT 0,
+    NextAttemptAt DATETIME2 NOT NULL DEFAULT SYSUTCDATETIME(),
+    LastError NVARCHAR(4000) NULL
+  );
+CREATE INDEX IX_CamundaOutbox_NextAttemptAt ON dbo.CamundaOutbox(NextAttemptAt, Id) INCLUDE (ContractId);
+CREATE INDEX IX_CamundaOutbox_ContractId ON dbo.CamundaOutbox(ContractId, Id) INCLUDE (NextAttemptAt);
+GO
+-- =========================================
+-- Materialized per-status counts for /stats (see backend/status_counts.py)
+-- =========================================
+IF OBJECT_ID('dbo.ContractStatusCounts', 'U') IS NOT NULL DROP TABLE dbo.ContractStatusCounts;
+GO
+CREATE TABLE dbo.ContractStatusCounts (
+    ContractStatus NVARCHAR(50) NOT NULL PRIMARY KEY,
+    ContractCount BIGINT NOT NULL DEFAULT 0
+  );
+GO
+-- =========================================
+-- Migration bookkeeping (see migrate.py): reset so the next `migrate.py` run
+-- records 0001-0007 (no-ops on this schema) and applies anything newer
+-- =========================================
+IF OBJECT_ID('dbo.SchemaMigrations', 'U') IS NOT NULL DROP TABLE dbo.SchemaMigrations;
+GO
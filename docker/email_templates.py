@@ -0,0 +1,75 @@
+import html
+import os
+from string import Template
+
+TEMPLATE_DIR = os.getenv("EMAIL_TEMPLATE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "templates"))
+
+
+class CompiledTemplate:
+    """
+    `${name}` placeholders pre-split into literal and variable parts once, so rendering is a
+    single join. Values are HTML-escaped when `escape` is set; `$$` is a literal `$`.
+    """
+
+    def __init__(self, text: str, escape: bool = False):
+        self.escape = escape
+        self.parts = []  # (literal, variable name or None)
+        self.variables = set()
+        pos = 0
+        for m in Template.pattern.finditer(text):
+            name = m.group("named") or m.group("braced")
+            if m.group("escaped") is not None:
+                literal, name = text[pos:m.start()] + "$", None
+            elif name is None:
+                raise ValueError(f"Invalid placeholder at offset {m.start()}")
+            else:
+                literal = text[pos:m.start()]
+                self.variables.add(name)
+            self.parts.append((literal, name))
+            pos = m.end()
+        self.parts.append((text[pos:], None))
+
+    def render(self, context: dict) -> str:
+        out = []
+        for literal, name in self.parts:
+            out.append(literal)
+            if name is not None:
+                value = context.get(name)
+                value = "" if value is None else str(value)
+                out.append(html.escape(value) if self.escape else value)
+        return "".join(out)
+
+
+class EmailTemplate:
+    """
+    One template file: a `Subject: ...` line, a blank line, then the body.
+    `<key>.html` bodies are sent as HTML (context values escaped), `<key>.txt` as plain text.
+    """
+
+    def __init__(self, key: str, text: str, is_html: bool):
+        header, sep, body = text.partition("\n\n")
+        if not sep or not header.startswith("Subject:"):
+            raise ValueError(f"Template '{key}' must start with a 'Subject:' line and a blank line")
+        self.key = key
+        self.is_html = is_html
+        self.subject = CompiledTemplate(header[len("Subject:"):].strip())
+        self.body = CompiledTemplate(body, escape=is_html)
+        self.variables = self.subject.variables | self.body.variables
+
+    def render(self, context: dict) -> tuple:
+        missing = sorted(v for v in self.variables if v not in context)
+        if missing:
+            raise KeyError(f"Template '{self.key}' is missing variable(s): {', '.join(missing)}")
+        return self.subject.render(context), self.body.render(context)
+
+
+def load_templates(directory: str = TEMPLATE_DIR) -> dict:
+    """Reads and compiles every *.html / *.txt template in directory; {key: EmailTemplate}."""
+    templates = {}
+    for name in sorted(os.listdir(directory)):
+        key, ext = os.path.splitext(name)
+        if ext not in (".html", ".txt"):
+            continue
+        with open(os.path.join(directory, name), encoding="utf-8") as f:
+            templates[key] = EmailTemplate(key, f.read(), is_html=ext == ".html")
+    return templates
@@ -1,57 +1,98 @@
+import asyncio
 import os
-import smtplib
 from email.message import EmailMessage
 
-from camunda.external_task.external_task import ExternalTask, TaskResult
-from camunda.external_task.external_task_worker import ExternalTaskWorker
+from email_templates import load_templates
+from logs import fields, get_logger
+from metrics import register_stats
+from smtp_pool import SmtpPool
+from worker_runtime import get_var, runtime_from_env
 
 # Configuration from environment
-ENGINE_REST = os.getenv("ENGINE_REST", "http://camunda-app:8080/engine-rest")
 MAILHOG_HOST = os.getenv("MAILHOG_HOST", "mailhog")
 MAILHOG_PORT = int(os.getenv("MAILHOG_PORT", "1025"))
-TOPIC_NAME = os.getenv("TOPIC_NAME", "notify-topic")
 FROM_EMAIL = os.getenv("FROM_EMAIL", "noreply@local.com")
-WORKER_ID = os.getenv("WORKER_ID", f"email-worker-{TOPIC_NAME}")
+# One process serves every notify topic
+EMAIL_TOPICS = [t.strip() for t in os.getenv("EMAIL_TOPICS", "notify-legal,notify-provider-manager").split(",")
+                if t.strip()]
+# Named templates (templates/<templateKey>.html|.txt), compiled once at startup
+TEMPLATES = load_templates()
+# Process variables to fetch: the routing fields, the legacy subject / body and whatever the templates use
+EMAIL_VARIABLES = sorted({"toEmail", "templateKey", "subject", "body"}.union(*(t.variables for t in TEMPLATES.values())))
 
+log = get_logger("email-worker")
+
+
+def build_message(task: dict) -> EmailMessage:
+    vars_dict = task.get("variables", {})
+    to_email = get_var(vars_dict, "toEmail") or "recipient@local.com"
+    template_key = get_var(vars_dict, "templateKey")
+
+    if template_key:
+        template = TEMPLATES.get(template_key)
+        if template is None:
+            raise KeyError(f"Unknown email template '{template_key}'")
+        subject, body = template.render({name: get_var(vars_dict, name) for name in vars_dict})
+        is_html = template.is_html
+    else:
+        # Instances started before the templates carry the full subject and body
+        subject = get_var(vars_dict, "subject") or "Notification"
+        body = get_var(vars_dict, "body") or "You have a new task in the Contract Management Tool."
+        is_html = body.strip().startswith("<") and "</div>" in body
 
-def send_via_mailhog(to_email: str, subject: str, body: str):
     msg = EmailMessage()
     msg["From"] = FROM_EMAIL
     msg["To"] = to_email
     msg["Subject"] = subject
-    
-    # Check if body starts with HTML tag to set subtype
-    if body.strip().startswith("<") and "</div>" in body:
+
+    if is_html:
         msg.set_content("Your email client does not support HTML. Please view in a compatible client.")
         msg.add_alternative(body, subtype="html")
     else:
         msg.set_content(body)
+    return msg
 
-    with smtplib.SMTP(MAILHOG_HOST, MAILHOG_PORT, timeout=10) as s:
-        s.send_message(msg)
 
+def send_notifications(pool: SmtpPool, tasks: list) -> list:
+    """Sends the batch concurrently over the pooled SMTP connections."""
+    results, messages = [None] * len(tasks), {}
+    for i, t in enumerate(tasks):
+        try:
+            messages[i] = build_message(t)
+        except Exception as e:
+            results[i] = e
 
-def handle(task: ExternalTask) -> TaskResult:
-    to_email = task.get_variable("toEmail") or "recipient@local.com"
-    subject = task.get_variable("subject") or "Notification"
-    body = task.get_variable("body") or "You have a new task in the Contract Management Tool."
+    for (i, msg), err in zip(messages.items(), pool.send_many(list(messages.values()))):
+        if err is not None:
+            results[i] = err
+            continue
+        results[i] = {"emailSent": True}
+        log.info("Email sent", extra=fields(topic=tasks[i]["topicName"], to=msg["To"], task=tasks[i]["id"],
+                                            sampled=True))
+    return results
 
-    try:
-        print(f"[{TOPIC_NAME}] Sending email to {to_email}...")
-        send_via_mailhog(to_email, subject, body)
-        return task.complete({"emailSent": True})
-    except Exception as e:
-        print(f"[{TOPIC_NAME}] Error: {e}")
-        return task.handle_failure(
-            error_message=str(e),
-            error_details=repr(e),
-            retries=3,
-            retry_timeout=10000
-        )
+
+def register(runtime):
+    """Subscribes every notify topic; all of them share one SMTP connection pool."""
+    for name in EMAIL_TOPICS:
+        runtime.topic(name, concurrency=int(os.getenv("EMAIL_CONCURRENCY", "2")),
+                      error_message=f"Email delivery failed ({name})", variables=EMAIL_VARIABLES)(send_notifications)
+    return runtime
 
 
 if __name__ == "__main__":
-    print(f"Starting email worker for topic: {TOPIC_NAME}")
-    worker = ExternalTaskWorker(worker_id=WORKER_ID, base_url=ENGINE_REST)
-    worker.subscribe(TOPIC_NAME, handle)
-    worker.run()
+    pool = SmtpPool(
+        MAILHOG_HOST,
+        MAILHOG_PORT,
+        size=int(os.getenv("SMTP_POOL_SIZE", "4")),
+        timeout=float(os.getenv("SMTP_TIMEOUT_SEC", "10")),
+        check_after=float(os.getenv("SMTP_CHECK_AFTER_SEC", "5")),
+        max_age=float(os.getenv("SMTP_MAX_AGE_SEC", "300")),
+    )
+    register_stats("smtp_pool", pool.stats, "Pooled SMTP connections")
+    runtime = runtime_from_env(None, tag="email-worker", worker_id_prefix="worker-email",
+                               session_factory=lambda: pool)
+    try:
+        asyncio.run(register(runtime).run())
+    finally:
+        pool.close()
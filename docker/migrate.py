@@ -0,0 +1,136 @@
+"""
+Versioned schema migrations for the Azure SQL Contracts database.
+
+Migrations live in migrations/ as NNNN_description.sql and are applied in version order.
+Each file is split into batches on `GO` lines and applied in one transaction together
+with its row in dbo.SchemaMigrations, so a failed migration leaves nothing behind.
+Migrations are written to be idempotent, so databases created from create_tables.sql
+can be brought under version tracking by simply running them.
+
+    python migrate.py                 # apply all pending migrations
+    python migrate.py --target 2      # apply up to and including version 2
+    python migrate.py --status        # list applied / pending versions
+    python migrate.py --conn-str "Driver={ODBC Driver 18 for SQL Server};Server=localhost,1433;..."
+"""
+import argparse
+import hashlib
+import os
+import re
+import sys
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "migrations")
+
+FILE_RE = re.compile(r"^(\d+)_([\w-]+)\.sql$")
+GO_RE = re.compile(r"^\s*GO\s*(?:--.*)?$", re.IGNORECASE | re.MULTILINE)
+
+
+class Migration:
+    def __init__(self, version: int, name: str, sql: str):
+        self.version = version
+        self.name = name
+        self.sql = sql
+        self.checksum = hashlib.sha256(sql.encode()).hexdigest()
+
+    def batches(self) -> list:
+        return [b.strip() for b in GO_RE.split(self.sql) if b.strip()]
+
+
+def load_migrations(directory: str = MIGRATIONS_DIR) -> list:
+    migrations = []
+    for filename in sorted(os.listdir(directory)):
+        match = FILE_RE.match(filename)
+        if not match:
+            continue
+        with open(os.path.join(directory, filename), encoding="utf-8") as f:
+            migrations.append(Migration(int(match.group(1)), match.group(2), f.read()))
+    versions = [m.version for m in migrations]
+    if len(versions) != len(set(versions)):
+        raise ValueError(f"Duplicate migration versions in {directory}")
+    return sorted(migrations, key=lambda m: m.version)
+
+
+def ensure_version_table(conn):
+    cur = conn.cursor()
+    cur.execute(
+        """
+        IF OBJECT_ID('dbo.SchemaMigrations', 'U') IS NULL
+        CREATE TABLE dbo.SchemaMigrations (
+            Version INT PRIMARY KEY,
+            Name NVARCHAR(255) NOT NULL,
+            Checksum CHAR(64) NOT NULL,
+            AppliedAt DATETIME2 NOT NULL DEFAULT SYSUTCDATETIME()
+        )
+        """
+    )
+    conn.commit()
+
+
+def applied_versions(conn) -> dict:
+    cur = conn.cursor()
+    cur.execute("SELECT Version, Checksum FROM dbo.SchemaMigrations")
+    return {version: checksum for version, checksum in cur.fetchall()}
+
+
+def apply(conn, target: int = None, migrations: list = None) -> list:
+    """Applies pending migrations up to target (all when None); returns the versions applied."""
+    conn.autocommit = False
+    ensure_version_table(conn)
+    applied = applied_versions(conn)
+    done = []
+    for m in migrations if migrations is not None else load_migrations():
+        if target is not None and m.version > target:
+            break
+        if m.version in applied:
+            if applied[m.version] != m.checksum:
+                print(f"Warning: migration {m.version:04d}_{m.name} changed after it was applied", file=sys.stderr)
+            continue
+        cur = conn.cursor()
+        try:
+            for batch in m.batches():
+                cur.execute(batch)
+            cur.execute("INSERT INTO dbo.SchemaMigrations (Version, Name, Checksum) VALUES (?, ?, ?)",
+                        m.version, m.name, m.checksum)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        print(f"Applied migration {m.version:04d}_{m.name}")
+        done.append(m.version)
+    return done
+
+
+def status(conn, migrations: list = None) -> list:
+    """[(version, name, applied)] for every migration on disk."""
+    ensure_version_table(conn)
+    applied = applied_versions(conn)
+    return [(m.version, m.name, m.version in applied)
+            for m in (migrations if migrations is not None else load_migrations())]
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--target", type=int, help="highest version to apply")
+    ap.add_argument("--status", action="store_true", help="show applied and pending migrations")
+    ap.add_argument("--conn-str", help="ODBC connection string (default: AZURE_SQL_* environment)")
+    args = ap.parse_args()
+
+    if args.conn_str:
+        import pyodbc
+        conn = pyodbc.connect(args.conn_str)
+    else:
+        from store_worker import sql_conn
+        conn = sql_conn()
+
+    try:
+        if args.status:
+            for version, name, is_applied in status(conn):
+                print(f"{version:04d}_{name}: {'applied' if is_applied else 'pending'}")
+        else:
+            if not apply(conn, args.target):
+                print("Schema is up to date")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
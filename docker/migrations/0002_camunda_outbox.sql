@@ -0,0 +1,23 @@
+-- =========================================
+-- 0002: Camunda variable sync outbox
+-- Written by the provider PATCH in the same transaction as the Contracts update,
+-- drained by the backend's OutboxDispatcher.
+-- =========================================
+IF OBJECT_ID('dbo.CamundaOutbox', 'U') IS NULL
+BEGIN
+  CREATE TABLE dbo.CamundaOutbox (
+    Id BIGINT IDENTITY(1, 1) PRIMARY KEY,
+    ContractId UNIQUEIDENTIFIER NOT NULL,
+    -- Copied from Contracts so the dispatcher can skip the /variable-instance search
+    ProcessInstanceId NVARCHAR(64) NULL,
+    -- JSON {varName: {value, type}} as sent to /process-instance/{id}/variables
+    Modifications NVARCHAR(MAX) NOT NULL,
+    CreatedAt DATETIME2 NOT NULL DEFAULT SYSUTCDATETIME(),
+    Attempts INT NOT NULL DEFAULT 0,
+    NextAttemptAt DATETIME2 NOT NULL DEFAULT SYSUTCDATETIME(),
+    LastError NVARCHAR(4000) NULL
+  );
+  CREATE INDEX IX_CamundaOutbox_NextAttemptAt ON dbo.CamundaOutbox(NextAttemptAt, Id) INCLUDE (ContractId);
+  CREATE INDEX IX_CamundaOutbox_ContractId ON dbo.CamundaOutbox(ContractId, Id) INCLUDE (NextAttemptAt);
+END
+GO
@@ -0,0 +1,9 @@
+-- =========================================
+-- 0003: RejectedAt for the rejected listing
+-- =========================================
+IF COL_LENGTH('dbo.Contracts', 'RejectedAt') IS NULL
+  ALTER TABLE dbo.Contracts ADD RejectedAt DATETIME2 NULL;
+GO
+-- Rows rejected before the reject worker stamped RejectedAt sort by their creation time
+UPDATE dbo.Contracts SET RejectedAt = CreatedAt WHERE ContractStatus = 'Rejected' AND RejectedAt IS NULL;
+GO
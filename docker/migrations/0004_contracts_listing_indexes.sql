@@ -0,0 +1,24 @@
+-- =========================================
+-- 0004: Indexes for the hot Contracts queries
+-- =========================================
+-- /stats: GROUP BY ContractStatus reads this narrow index instead of the clustered table
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_Contracts_ContractStatus' AND object_id = OBJECT_ID('dbo.Contracts'))
+  CREATE INDEX IX_Contracts_ContractStatus ON dbo.Contracts(ContractStatus);
+GO
+-- Listings: one filtered index per status, keyed like the keyset ORDER BY (timestamp DESC, Id DESC).
+-- The small columns are included so light `fields=` projections never touch the clustered index.
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_Contracts_Open_CreatedAt' AND object_id = OBJECT_ID('dbo.Contracts'))
+  CREATE INDEX IX_Contracts_Open_CreatedAt ON dbo.Contracts(CreatedAt DESC, Id DESC)
+    INCLUDE (ContractId, ContractTitle, ContractType, RequestType, Budget, ContractStatus, ProvidersName, ProvidersBudget)
+    WHERE ContractStatus IN ('Submitted', 'Running');
+GO
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_Contracts_Approved_ApprovedAt' AND object_id = OBJECT_ID('dbo.Contracts'))
+  CREATE INDEX IX_Contracts_Approved_ApprovedAt ON dbo.Contracts(ApprovedAt DESC, Id DESC)
+    INCLUDE (ContractId, ContractTitle, ContractType, RequestType, Budget, ContractStatus, ProvidersName, CreatedAt)
+    WHERE ContractStatus = 'Approved';
+GO
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_Contracts_Rejected_RejectedAt' AND object_id = OBJECT_ID('dbo.Contracts'))
+  CREATE INDEX IX_Contracts_Rejected_RejectedAt ON dbo.Contracts(RejectedAt DESC, Id DESC)
+    INCLUDE (ContractId, ContractTitle, ContractType, RequestType, Budget, ContractStatus, ProvidersName, CreatedAt)
+    WHERE ContractStatus = 'Rejected';
+GO
@@ -0,0 +1,18 @@
+-- =========================================
+-- 0005: Materialized per-status contract counts for /stats
+-- Maintained by every writer in the same transaction as its Contracts change
+-- (see backend/status_counts.py); seeded here from the current table.
+-- =========================================
+IF OBJECT_ID('dbo.ContractStatusCounts', 'U') IS NULL
+BEGIN
+  CREATE TABLE dbo.ContractStatusCounts (
+    ContractStatus NVARCHAR(50) NOT NULL PRIMARY KEY,
+    ContractCount BIGINT NOT NULL DEFAULT 0
+  );
+  INSERT INTO dbo.ContractStatusCounts (ContractStatus, ContractCount)
+  SELECT ContractStatus, COUNT_BIG(*)
+  FROM dbo.Contracts WITH (TABLOCK, HOLDLOCK)
+  WHERE ContractStatus IS NOT NULL
+  GROUP BY ContractStatus;
+END
+GO
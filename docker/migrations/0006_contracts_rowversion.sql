@@ -0,0 +1,8 @@
+-- =========================================
+-- 0006: RowVer on Contracts
+-- Bumped by SQL Server on every insert/update, so MIN_ACTIVE_ROWVERSION() works as a
+-- cheap "has anything changed" token for the backend's listing cache (ETag revalidation).
+-- =========================================
+IF COL_LENGTH('dbo.Contracts', 'RowVer') IS NULL
+  ALTER TABLE dbo.Contracts ADD RowVer ROWVERSION;
+GO
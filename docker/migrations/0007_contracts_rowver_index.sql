@@ -0,0 +1,8 @@
+-- =========================================
+-- 0007: Index on Contracts.RowVer
+-- The provider change feed (GET /api/providers/contracts/changes) reads
+-- WHERE RowVer > @since ORDER BY RowVer, so a poll costs O(changed rows), not O(table).
+-- =========================================
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_Contracts_RowVer' AND object_id = OBJECT_ID('dbo.Contracts'))
+  CREATE INDEX IX_Contracts_RowVer ON dbo.Contracts(RowVer);
+GO
@@ -0,0 +1,140 @@
+import queue
+import smtplib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+def is_disconnect(err: Exception) -> bool:
+    """
+    True if the server dropped the connection (SMTPException subclasses OSError, so check it
+    explicitly). Other SMTPExceptions, e.g. a refused recipient, leave the connection in a
+    clean state because smtplib sends RSET before raising.
+    """
+    if isinstance(err, smtplib.SMTPServerDisconnected):
+        return True
+    return isinstance(err, OSError) and not isinstance(err, smtplib.SMTPException)
+
+
+class PooledSmtp:
+    def __init__(self, smtp: smtplib.SMTP):
+        self.smtp = smtp
+        self.created = self.last_used = time.monotonic()
+
+
+class SmtpPool:
+    """
+    Persistent SMTP connections shared by a bounded set of sending threads.
+
+    - up to `size` connections, opened lazily and reused most-recently-used first
+    - a connection idle for more than `check_after` seconds is probed with NOOP before reuse
+    - connections older than `max_age` seconds are closed instead of reused
+    - a send that fails because the server dropped the connection is retried once on a new one
+
+    send_many() sends a batch concurrently on `size` threads and returns a list aligned with
+    the messages: None on success, the exception otherwise.
+    """
+
+    def __init__(self, host: str, port: int, size: int = 4, timeout: float = 10.0,
+                 check_after: float = 5.0, max_age: float = 300.0):
+        self.host = host
+        self.port = port
+        self.size = size
+        self.timeout = timeout
+        self.check_after = check_after
+        self.max_age = max_age
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self._executor = ThreadPoolExecutor(max_workers=size, thread_name_prefix="smtp")
+        self._lock = threading.Lock()
+        self._stats = {"opened": 0, "reused": 0, "failed_checks": 0, "recycled": 0, "sent": 0, "errors": 0}
+
+    def _count(self, name: str):
+        with self._lock:
+            self._stats[name] += 1
+
+    def _open(self) -> PooledSmtp:
+        pc = PooledSmtp(smtplib.SMTP(self.host, self.port, timeout=self.timeout))
+        self._count("opened")
+        return pc
+
+    @staticmethod
+    def _close(pc: PooledSmtp):
+        try:
+            pc.smtp.quit()
+        except Exception:
+            try:
+                pc.smtp.close()
+            except Exception:
+                pass
+
+    def _usable(self, pc: PooledSmtp) -> bool:
+        now = time.monotonic()
+        if now - pc.created > self.max_age:
+            self._count("recycled")
+            return False
+        if now - pc.last_used <= self.check_after:
+            return True
+        try:
+            if pc.smtp.noop()[0] == 250:
+                return True
+        except (smtplib.SMTPException, OSError):
+            pass
+        self._count("failed_checks")
+        return False
+
+    def acquire(self) -> PooledSmtp:
+        self._slots.acquire()
+        try:
+            while True:
+                try:
+                    pc = self._idle.get_nowait()
+                except queue.Empty:
+                    return self._open()
+                if self._usable(pc):
+                    self._count("reused")
+                    return pc
+                self._close(pc)
+        except Exception:
+            self._slots.release()
+            raise
+
+    def release(self, pc: PooledSmtp, broken: bool = False):
+        if broken:
+            self._close(pc)
+        else:
+            pc.last_used = time.monotonic()
+            self._idle.put(pc)
+        self._slots.release()
+
+    def send(self, msg):
+        for attempt in (1, 2):
+            pc = self.acquire()
+            try:
+                pc.smtp.send_message(msg)
+            except Exception as e:
+                dropped = is_disconnect(e)
+                self.release(pc, broken=dropped or not isinstance(e, smtplib.SMTPException))
+                if dropped and attempt == 1:
+                    continue
+                self._count("errors")
+                raise
+            self.release(pc)
+            self._count("sent")
+            return
+
+    def send_many(self, messages: list) -> list:
+        futures = [self._executor.submit(self.send, m) for m in messages]
+        return [f.exception() for f in futures]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"size": self.size, "idle": self._idle.qsize(), **self._stats}
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+        while True:
+            try:
+                self._close(self._idle.get_nowait())
+            except queue.Empty:
+                break
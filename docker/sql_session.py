@@ -0,0 +1,106 @@
+import time
+
+import pyodbc
+
+from metrics import SQL_SECONDS, operation_name
+
+# SQLSTATEs that mean the physical connection is gone (network drop, failover, idle kill)
+DISCONNECT_STATES = {"08S01", "08S02", "08001", "08003", "08004", "08007", "HYT00", "HYT01"}
+
+
+def is_disconnect(err: Exception) -> bool:
+    if isinstance(err, (pyodbc.OperationalError, pyodbc.InterfaceError)):
+        return True
+    state = err.args[0] if getattr(err, "args", None) else None
+    return isinstance(state, str) and state in DISCONNECT_STATES
+
+
+class CommitFailed(Exception):
+    """commit() raised: the server may or may not have applied the transaction."""
+
+
+class SqlSession:
+    """
+    Long-lived Azure SQL connection for a worker process.
+    The connection is opened lazily and transparently reopened after a disconnect.
+    """
+
+    def __init__(self, connect):
+        self._connect = connect
+        self._conn = None
+
+    def connection(self):
+        if self._conn is None:
+            self._conn = self._connect()
+        return self._conn
+
+    def reset(self):
+        if self._conn is not None:
+            try:
+                self._conn.close()
+            except Exception:
+                pass
+        self._conn = None
+
+    def run(self, fn, name: str = None):
+        """
+        Runs fn(cursor) in one transaction, reconnecting and retrying once if the connection dropped
+        before commit. A failed commit is never retried (raises CommitFailed), since repeating a
+        non-idempotent write such as the create INSERT could apply it twice.
+        Timed in sql_duration_seconds under `name` (default: fn's name).
+        """
+        t0 = time.perf_counter()
+        try:
+            return self._run(fn)
+        finally:
+            SQL_SECONDS.labels(name or operation_name(fn)).observe(time.perf_counter() - t0)
+
+    def _run(self, fn):
+        for attempt in (1, 2):
+            conn = self.connection()
+            try:
+                cur = conn.cursor()
+                result = fn(cur)
+            except Exception as e:
+                try:
+                    conn.rollback()
+                except Exception:
+                    self.reset()
+                if attempt == 1 and is_disconnect(e):
+                    self.reset()
+                    continue
+                raise
+            try:
+                conn.commit()
+            except Exception as e:
+                self.reset()
+                raise CommitFailed(str(e)) from e
+            return result
+
+    def run_batch(self, rows: list, batch_fn, row_fn) -> list:
+        """
+        Writes all rows in a single transaction via batch_fn(cursor, rows).
+        If the batch fails, each row is retried in its own transaction via row_fn(cursor, row)
+        so a bad row only affects its own task. A failed commit fails every row instead: the
+        batch may already be stored.
+        Returns a list aligned with rows: None on success, the exception otherwise.
+        """
+        if not rows:
+            return []
+        try:
+            self.run(lambda cur: batch_fn(cur, rows), operation_name(batch_fn))
+            return [None] * len(rows)
+        except CommitFailed as commit_err:
+            return [commit_err] * len(rows)
+        except Exception as batch_err:
+            if len(rows) == 1:
+                return [batch_err]
+
+        errors = []
+        for row in rows:
+            try:
+                self.run(lambda cur, row=row: row_fn(cur, row), operation_name(row_fn))
+                errors.append(None)
+            except Exception as e:
+                errors.append(e)
+        return errors
@@ -0,0 +1,333 @@
+import asyncio
+import logging
+import os
+import uuid
+
+import pyodbc
+
+from logs import fields, get_logger
+from sql_batch import chunks, values_placeholders
+from status_counts import STATUS_OUTPUT, record
+from worker_runtime import env, get_var, runtime_from_env
+
+log = get_logger("store-worker")
+
+
+def sql_conn():
+    server = env("AZURE_SQL_SERVER")
+    database = env("AZURE_SQL_DATABASE")
+    user = env("AZURE_SQL_USER")
+    password = env("AZURE_SQL_PASSWORD")
+
+    conn_str = (
+        "Driver={ODBC Driver 18 for SQL Server};"
+        f"Server=tcp:{server},{os.getenv('AZURE_SQL_PORT', '1433')};"
+        f"Database={database};"
+        f"Uid={user};"
+        f"Pwd={password};"
+        "Encrypt=yes;"
+        # yes only for a local SQL Server container with a self-signed certificate
+        f"TrustServerCertificate={os.getenv('AZURE_SQL_TRUST_SERVER_CERTIFICATE', 'no')};"
+        "Connection Timeout=30;"
+    )
+    return pyodbc.connect(conn_str)
+
+
+def contract_id_of(vars_dict: dict) -> str:
+    contract_id = get_var(vars_dict, "contractId")
+    if not contract_id:
+        # fallback (should not happen if create-worker sets it)
+        contract_id = str(uuid.uuid4())
+    return contract_id
+
+
+def check_updated(rows: list, outputs: list, status: str):
+    """
+    The UPDATEs OUTPUT one row per contract they changed, so fewer output rows than
+    contractIds means some contracts were not found; no extra query is needed.
+    Per-batch counts are logged with LOG_LEVEL=DEBUG.
+    """
+    expected = len({row[-1] for row in rows})
+    if len(outputs) < expected:
+        log.warning("Contracts not found on update", extra=fields(
+            status=status, expected=expected, updated=len(outputs), contractIds=[row[-1] for row in rows]))
+    elif log.isEnabledFor(logging.DEBUG):
+        log.debug("Contracts updated", extra=fields(status=status, updated=len(outputs),
+                                                    contractIds=[row[-1] for row in rows]))
+
+
+# ============================
+# store-create-contract
+# ============================
+
+# Process variables contract_row() reads; fetchAndLock returns only these
+CREATE_VARIABLES = ["contractId", "contractTitle", "contractType", "roles", "skills", "requestType",
+                    "budget", "contractStartDate", "contractEndDate", "description"]
+
+INSERT_SQL = """
+    INSERT INTO Contracts
+    (ContractId, ProcessInstanceId, BusinessKey,
+     ContractTitle, ContractType, Roles, Skills, RequestType,
+     Budget, ContractStartDate, ContractEndDate, Description,
+     ContractStatus, ProvidersBudget, ProvidersComment,
+     MeetRequirement, ProvidersName,
+     CreatedAt)
+    VALUES
+    (CONVERT(uniqueidentifier, ?), ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?,
+     'Submitted', NULL, '',
+     NULL, NULL,
+     SYSUTCDATETIME())
+"""
+
+
+def contract_row(t: dict) -> tuple:
+    """Builds the INSERT parameters for one locked task (contractId first)."""
+    vars_dict = t.get("variables", {})
+    process_instance_id = t.get("processInstanceId")
+    business_key = t.get("businessKey")  # may be None
+
+    # Generate contractId once (and push back to Camunda)
+    contract_id = get_var(vars_dict, "contractId")
+    if not contract_id:
+        contract_id = str(uuid.uuid4())
+
+    # From contractDraft.form (your fields)
+    contract_title = get_var(vars_dict, "contractTitle")
+    contract_type = get_var(vars_dict, "contractType")
+    roles = get_var(vars_dict, "roles")
+    skills = get_var(vars_dict, "skills")
+    request_type = get_var(vars_dict, "requestType")
+    budget = get_var(vars_dict, "budget")
+    contract_start = get_var(vars_dict, "contractStartDate")
+    contract_end = get_var(vars_dict, "contractEndDate")
+    description = get_var(vars_dict, "description")
+
+    # budget normalize
+    try:
+        budget_val = float(budget) if budget is not None and budget != "" else None
+    except Exception:
+        budget_val = None
+
+    return (
+        contract_id, process_instance_id, business_key,
+        contract_title, contract_type, roles, skills, request_type,
+        budget_val, contract_start, contract_end, description
+    )
+
+
+def insert_contracts(cur, rows: list):
+    """Inserts the whole batch with one parameter array round-trip."""
+    cur.fast_executemany = True
+    cur.executemany(INSERT_SQL, rows)
+    record(cur, [(None, "Submitted")] * len(rows))
+
+
+def insert_contract(cur, row: tuple):
+    cur.execute(INSERT_SQL, *row)
+    record(cur, [(None, "Submitted")])
+
+
+def store_create_contract(session, tasks: list) -> list:
+    rows = [contract_row(t) for t in tasks]
+    errors = session.run_batch(rows, insert_contracts, insert_contract)
+
+    results = []
+    for t, row, err in zip(tasks, rows, errors):
+        if err is not None:
+            results.append(err)
+            continue
+        # Push contractId back so next steps can use it
+        results.append({"contractId": row[0]})
+        log.info("Contract stored", extra=fields(status="Submitted", contractId=row[0], task=t["id"], sampled=True))
+    return results
+
+
+# ============================
+# store-contract (approved)
+# ============================
+
+APPROVE_VARIABLES = ["signeddate", "employeeName", "officeAddress", "finalPrice",
+                     "legalcomment", "approvaldecision", "contractId"]
+
+APPROVE_COLUMNS = "SignedDate, EmployeeName, OfficeAddress, FinalPrice, LegalComment, ApprovalDecision, ContractId"
+
+APPROVE_ROW_SQL = f"""
+    UPDATE Contracts
+    SET
+        SignedDate = ?,
+        EmployeeName = ?,
+        OfficeAddress = ?,
+        FinalPrice = ?,
+        LegalComment = ?,
+        ApprovalDecision = ?,
+        ApprovedAt = SYSUTCDATETIME(),
+        ContractStatus = 'Approved'
+    {STATUS_OUTPUT}
+    WHERE ContractId = ?
+"""
+
+
+def approve_row(t: dict) -> tuple:
+    """Builds the UPDATE parameters for one locked task (contractId last)."""
+    vars_dict = t.get("variables", {})
+
+    # From storeContract.form
+    signed_date = get_var(vars_dict, "signeddate")
+
+    # New fields from storeContract.form
+    employee_name = get_var(vars_dict, "employeeName")
+    office_address = get_var(vars_dict, "officeAddress")
+    final_price = get_var(vars_dict, "finalPrice")
+
+    # Legal items to persist from reviewContract.form
+    legal_comment = get_var(vars_dict, "legalcomment")
+    approval_decision = get_var(vars_dict, "approvaldecision")
+
+    return (
+        signed_date,
+        employee_name, office_address, final_price,
+        legal_comment, approval_decision,
+        contract_id_of(vars_dict)
+    )
+
+
+def approve_contracts(cur, rows: list):
+    """Set-based UPDATE joining Contracts against a VALUES list of the whole batch."""
+    for chunk in chunks(rows, 7):
+        cur.execute(
+            f"""
+            UPDATE c
+            SET
+                SignedDate = u.SignedDate,
+                EmployeeName = u.EmployeeName,
+                OfficeAddress = u.OfficeAddress,
+                FinalPrice = u.FinalPrice,
+                LegalComment = u.LegalComment,
+                ApprovalDecision = u.ApprovalDecision,
+                ApprovedAt = SYSUTCDATETIME(),
+                ContractStatus = 'Approved'
+            {STATUS_OUTPUT}
+            FROM Contracts c
+            JOIN (VALUES {values_placeholders(len(chunk), 7)}) AS u({APPROVE_COLUMNS})
+              ON c.ContractId = u.ContractId
+            """,
+            *[v for row in chunk for v in row]
+        )
+        outputs = cur.fetchall()
+        record(cur, outputs)
+        check_updated(chunk, outputs, "Approved")
+
+
+def approve_contract(cur, row: tuple):
+    cur.execute(APPROVE_ROW_SQL, *row)
+    outputs = cur.fetchall()
+    record(cur, outputs)
+    check_updated([row], outputs, "Approved")
+
+
+def store_contract(session, tasks: list) -> list:
+    rows = [approve_row(t) for t in tasks]
+    errors = session.run_batch(rows, approve_contracts, approve_contract)
+
+    results = []
+    for t, row, err in zip(tasks, rows, errors):
+        if err is not None:
+            results.append(err)
+            continue
+        results.append({})
+        log.info("Contract stored", extra=fields(status="Approved", contractId=row[-1], task=t["id"], sampled=True))
+    return results
+
+
+# ============================
+# store-reject-contract
+# ============================
+
+REJECT_VARIABLES = ["legalcomment", "approvaldecision", "contractId"]
+
+REJECT_COLUMNS = "LegalComment, ApprovalDecision, ContractId"
+
+REJECT_ROW_SQL = f"""
+    UPDATE Contracts
+    SET
+        LegalComment = ?,
+        ApprovalDecision = ?,
+        RejectedAt = SYSUTCDATETIME(),
+        ContractStatus = 'Rejected'
+    {STATUS_OUTPUT}
+    WHERE ContractId = ?
+"""
+
+
+def reject_row(t: dict) -> tuple:
+    """Builds the UPDATE parameters for one locked task (contractId last)."""
+    vars_dict = t.get("variables", {})
+
+    # From reviewContract.form
+    legal_comment = get_var(vars_dict, "legalcomment")
+    approval_decision = get_var(vars_dict, "approvaldecision")
+
+    return (legal_comment, approval_decision, contract_id_of(vars_dict))
+
+
+def reject_contracts(cur, rows: list):
+    """Set-based UPDATE joining Contracts against a VALUES list of the whole batch."""
+    for chunk in chunks(rows, 3):
+        cur.execute(
+            f"""
+            UPDATE c
+            SET
+                LegalComment = u.LegalComment,
+                ApprovalDecision = u.ApprovalDecision,
+                RejectedAt = SYSUTCDATETIME(),
+                ContractStatus = 'Rejected'
+            {STATUS_OUTPUT}
+            FROM Contracts c
+            JOIN (VALUES {values_placeholders(len(chunk), 3)}) AS u({REJECT_COLUMNS})
+              ON c.ContractId = u.ContractId
+            """,
+            *[v for row in chunk for v in row]
+        )
+        outputs = cur.fetchall()
+        record(cur, outputs)
+        check_updated(chunk, outputs, "Rejected")
+
+
+def reject_contract(cur, row: tuple):
+    cur.execute(REJECT_ROW_SQL, *row)
+    outputs = cur.fetchall()
+    record(cur, outputs)
+    check_updated([row], outputs, "Rejected")
+
+
+def store_reject_contract(session, tasks: list) -> list:
+    rows = [reject_row(t) for t in tasks]
+    errors = session.run_batch(rows, reject_contracts, reject_contract)
+
+    results = []
+    for t, row, err in zip(tasks, rows, errors):
+        if err is not None:
+            results.append(err)
+            continue
+        results.append({})
+        log.info("Contract stored", extra=fields(status="Rejected", contractId=row[-1], task=t["id"], sampled=True))
+    return results
+
+
+def register(runtime):
+    """Subscribes the three store handlers; concurrency is the number of batches per topic in flight."""
+    runtime.topic("store-create-contract", concurrency=int(os.getenv("CREATE_CONCURRENCY", "2")),
+                  error_message="Azure SQL insert failed (CreatedContracts)",
+                  variables=CREATE_VARIABLES)(store_create_contract)
+    runtime.topic("store-contract", concurrency=int(os.getenv("APPROVE_CONCURRENCY", "2")),
+                  error_message="Azure SQL insert failed (ApprovedContracts)",
+                  variables=APPROVE_VARIABLES)(store_contract)
+    runtime.topic("store-reject-contract", concurrency=int(os.getenv("REJECT_CONCURRENCY", "2")),
+                  error_message="Azure SQL insert failed (RejectedContracts)",
+                  variables=REJECT_VARIABLES)(store_reject_contract)
+    return runtime
+
+
+if __name__ == "__main__":
+    runtime = runtime_from_env(sql_conn, tag="store-worker", worker_id_prefix="worker-store")
+    asyncio.run(register(runtime).run())
@@ -0,0 +1,402 @@
+import asyncio
+import os
+import signal
+import socket
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from backoff import Backoff
+from camunda_client import AsyncCamundaClient
+from logs import fields, get_logger
+from metrics import (WORKER_BATCH_SIZE, WORKER_BATCHES_IN_FLIGHT, WORKER_FETCH_SECONDS, WORKER_HANDLER_SECONDS,
+                     WORKER_LOCK_EXPIRED, WORKER_LOCK_EXTENSIONS, WORKER_LOCK_NEAR_MISSES, WORKER_MAX_TASKS,
+                     WORKER_REPORT_ERRORS, WORKER_TASKS_COMPLETED, WORKER_TASKS_FAILED, WORKER_TASKS_FETCHED,
+                     WORKER_TASKS_UNLOCKED, serve)
+from sql_session import SqlSession
+from tracing import CONSUMER, TRACEPARENT_VARIABLE, start_span
+
+log = get_logger("worker-runtime")
+
+# Batches settled after this share of their lock duration count as lock near-misses
+LOCK_NEAR_MISS_RATIO = 0.8
+# A running batch's locks are extended (by lock_ms) each time this share of lock_ms has passed
+LOCK_EXTEND_RATIO = 0.5
+# Weight of the latest batch in a topic's average handler time per task
+TASK_TIME_ALPHA = 0.2
+
+
+def env(name: str, default: str = None) -> str:
+    v = os.getenv(name, default)
+    if v is None or v == "":
+        raise RuntimeError(f"Missing env var: {name}")
+    return v
+
+
+def unique_worker_id(prefix: str) -> str:
+    """<prefix>-<hostname>-<random>: replicas started from the same config still lock tasks under distinct ids."""
+    return f"{prefix}-{socket.gethostname()}-{uuid.uuid4().hex[:8]}"
+
+
+def get_var(vars_dict: dict, name: str, default=None):
+    """Camunda returns variables as {name: {value: ...}}"""
+    try:
+        return vars_dict.get(name, {}).get("value", default)
+    except Exception:
+        return default
+
+
+class Topic:
+    def __init__(self, name: str, handler, concurrency: int, error_message: str, variables: list = None,
+                 deserialize_values: bool = False):
+        self.name = name
+        self.handler = handler
+        self.concurrency = concurrency
+        self.error_message = error_message
+        self.variables = variables
+        self.deserialize_values = deserialize_values
+        self.in_flight = 0
+        self.task_seconds = None  # average handler time per task
+        self.batch_limit = None   # adaptive maxTasks; None until a batch was timed
+
+    @property
+    def saturated(self) -> bool:
+        return self.in_flight >= self.concurrency
+
+    def fetch_spec(self, lock_ms: int) -> dict:
+        """
+        fetchAndLock topic entry; variables=None fetches every process variable. A variables
+        list always includes `traceparent`, so task spans join the trace that started them.
+        """
+        spec = {"topicName": self.name, "lockDuration": lock_ms, "deserializeValues": self.deserialize_values}
+        if self.variables is not None:
+            spec["variables"] = sorted(set(self.variables) | {TRACEPARENT_VARIABLE})
+        return spec
+
+
+class WorkerRuntime:
+    """
+    Asyncio external-task runtime serving several topics from one process.
+
+    - one pooled keep-alive AsyncCamundaClient to engine-rest
+    - one fetchAndLock call (long polling) covering every topic with a free slot
+    - each fetched batch is grouped by topic and handed to that topic's handler
+    - at most `concurrency` batches per topic run at once, on a thread pool where
+      every thread owns its own long-lived session: a SqlSession over `sql_connect`,
+      or whatever `session_factory()` returns
+
+    Handlers are plain functions `handler(session, tasks) -> results` registered with
+    `@runtime.topic(...)`. `results` is aligned with `tasks`: a dict of variables to
+    complete the task with, or an Exception to fail it. A topic registered with
+    `variables=[...]` only fetches those process variables with its tasks.
+
+    Every task gets a consumer span (child of its `traceparent` process variable) ending
+    when it is reported; fetch, handler, outcome and lock-margin metrics are served on
+    `metrics_port` (0 = off).
+
+    Several replicas can serve the same topics (each needs its own `worker_id`):
+    - while a batch runs, its locks are extended every LOCK_EXTEND_RATIO x `lock_ms`, so
+      a slow SQL write does not let another replica take the same tasks
+    - `maxTasks` per fetch adapts to the topics' average handler time per task, so a
+      batch takes about `batch_target_ms` and a slow topic leaves work for the others
+    - SIGTERM stops fetching; batches still waiting for a thread are unlocked at once,
+      running ones get `shutdown_grace` seconds to finish and report. A batch whose
+      handler started is never unlocked (its SQL may commit regardless); if it outlives
+      the grace period its locks stop being extended and lapse after `lock_ms`
+    """
+
+    def __init__(self, engine_rest: str, auth, worker_id: str, sql_connect=None, max_tasks: int = 10,
+                 lock_ms: int = 60000, async_timeout_ms: int = 30000, poll_sleep: float = 2.0,
+                 saturated_poll_ms: int = 1000, http_retries: int = 3, backoff: Backoff = None,
+                 tag: str = "store-worker", session_factory=None, metrics_port: int = 0,
+                 batch_target_ms: int = 5000, shutdown_grace: float = 20.0):
+        self.engine_rest = engine_rest
+        self.auth = auth
+        self.worker_id = worker_id
+        self.sql_connect = sql_connect
+        self.session_factory = session_factory or (lambda: SqlSession(sql_connect))
+        self.max_tasks = max_tasks
+        self.lock_ms = lock_ms
+        self.async_timeout_ms = async_timeout_ms
+        self.poll_sleep = poll_sleep
+        self.saturated_poll_ms = saturated_poll_ms
+        self.http_retries = http_retries
+        self.backoff = backoff or Backoff()
+        self.tag = tag
+        self.metrics_port = metrics_port
+        self.batch_target_ms = batch_target_ms
+        self.shutdown_grace = shutdown_grace
+        self.topics = {}
+        self._local = threading.local()
+        self._executor = None
+        self._slot_freed = None
+        self._stopping = asyncio.Event()
+        self._draining = threading.Event()  # read by executor threads
+
+    def topic(self, name: str, concurrency: int = 2, error_message: str = None, variables: list = None,
+              deserialize_values: bool = False):
+        def register(handler):
+            self.topics[name] = Topic(name, handler, concurrency,
+                                      error_message or f"Handler failed ({name})", variables, deserialize_values)
+            return handler
+        return register
+
+    # --- sessions on executor threads ---
+
+    def _session(self):
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = self._local.session = self.session_factory()
+        return session
+
+    def _run_handler(self, topic: Topic, tasks: list):
+        """The handler's results, or None when shutdown began before the batch got a thread."""
+        if self._draining.is_set():
+            return None
+        return topic.handler(self._session(), tasks)
+
+    # --- shutdown ---
+
+    def stop(self):
+        """Stops fetching and lets run() drain; installed as the SIGTERM / SIGINT handler."""
+        self._stopping.set()
+
+    async def _until_stopped(self, aw):
+        """The result of aw, or None if stop() came first (aw is then cancelled)."""
+        job = asyncio.ensure_future(aw)
+        stopped = asyncio.ensure_future(self._stopping.wait())
+        try:
+            await asyncio.wait({job, stopped}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            stopped.cancel()
+        if job.done():
+            return job.result()
+        job.cancel()
+        return None
+
+    async def _drain(self, background: set):
+        self._draining.set()
+        if background:
+            log.info("Draining in-flight batches", extra=fields(worker=self.tag, batches=len(background),
+                                                                grace_sec=self.shutdown_grace))
+            _, pending = await asyncio.wait(background, timeout=self.shutdown_grace)
+            if pending:
+                # Not unlocked: the handler thread may still commit, and redelivering its tasks
+                # now would store them twice. Their locks lapse after lock_ms instead
+                log.warning("Batches still running at shutdown", extra=fields(worker=self.tag, batches=len(pending)))
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        log.info("Worker stopped", extra=fields(worker=self.tag, workerId=self.worker_id))
+
+    # --- processing ---
+
+    async def _settle(self, client: AsyncCamundaClient, topic: Topic, task: dict, result, span):
+        task_id = task["id"]
+        # complete / failure calls become children of the task span
+        with span:
+            try:
+                if isinstance(result, Exception):
+                    span.record_error(result)
+                    await client.failure(task_id, self.worker_id, topic.error_message, str(result))
+                    WORKER_TASKS_FAILED.labels(topic.name).inc()
+                    log.warning("Task failed: %s", result, extra=fields(worker=self.tag, topic=topic.name, task=task_id))
+                else:
+                    await client.complete(task_id, self.worker_id, result or {})
+                    WORKER_TASKS_COMPLETED.labels(topic.name).inc()
+            except Exception as e:
+                # The lock expires and Camunda hands the task out again
+                span.record_error(e)
+                WORKER_REPORT_ERRORS.labels(topic.name).inc()
+                log.error("Could not report task: %s", e, extra=fields(worker=self.tag, topic=topic.name, task=task_id))
+
+    async def _unlock(self, client: AsyncCamundaClient, topic: Topic, task: dict, span):
+        with span:
+            try:
+                await client.unlock(task["id"])
+                WORKER_TASKS_UNLOCKED.labels(topic.name).inc()
+            except Exception as e:
+                span.record_error(e)
+                WORKER_REPORT_ERRORS.labels(topic.name).inc()
+                log.error("Could not unlock task: %s", e, extra=fields(worker=self.tag, topic=topic.name, task=task["id"]))
+
+    async def _unlock_batch(self, client: AsyncCamundaClient, topic: Topic, tasks: list, spans: list):
+        await asyncio.gather(*(self._unlock(client, topic, t, s) for t, s in zip(tasks, spans)))
+
+    async def _keep_locked(self, client: AsyncCamundaClient, topic: Topic, tasks: list, lease: dict):
+        """Extends the batch's locks while its handler runs; lease["locked_at"] tracks the last extension."""
+        async def extend(task_id: str, extended_at: float):
+            await client.extend_lock(task_id, self.worker_id, self.lock_ms)
+            WORKER_LOCK_EXTENSIONS.labels(topic.name).inc()
+            # Set per call: the keeper may be cancelled before the whole round returns
+            lease["locked_at"] = max(lease["locked_at"], extended_at)
+
+        while True:
+            await asyncio.sleep(self.lock_ms / 1000 * LOCK_EXTEND_RATIO)
+            extended_at = time.monotonic()
+            outcomes = await asyncio.gather(*(extend(t["id"], extended_at) for t in tasks), return_exceptions=True)
+            errors = [o for o in outcomes if isinstance(o, Exception)]
+            if errors:
+                log.warning("Could not extend lock: %s", errors[0], extra=fields(
+                    worker=self.tag, topic=topic.name, failed=len(errors), batch=len(tasks)))
+
+    def _adapt_batch_limit(self, topic: Topic, elapsed: float, n: int):
+        """maxTasks for the topic so that one batch takes about batch_target_ms."""
+        per_task = elapsed / n
+        if topic.task_seconds is None:
+            topic.task_seconds = per_task
+        else:
+            topic.task_seconds += TASK_TIME_ALPHA * (per_task - topic.task_seconds)
+        target = self.batch_target_ms / 1000
+        fit = int(target / topic.task_seconds) if topic.task_seconds > 0 else self.max_tasks
+        topic.batch_limit = max(1, min(self.max_tasks, fit))
+        WORKER_MAX_TASKS.labels(topic.name).set(topic.batch_limit)
+
+    def _task_span(self, topic: Topic, task: dict):
+        return start_span(f"task {topic.name}", parent=get_var(task.get("variables") or {}, TRACEPARENT_VARIABLE),
+                          kind=CONSUMER, attributes={"camunda.topic": topic.name, "camunda.task_id": task["id"],
+                                                     "camunda.process_instance_id": task.get("processInstanceId")})
+
+    async def _process(self, client: AsyncCamundaClient, topic: Topic, tasks: list, locked_at: float):
+        loop = asyncio.get_running_loop()
+        spans = [self._task_span(topic, t) for t in tasks]
+        WORKER_BATCH_SIZE.labels(topic.name).observe(len(tasks))
+        WORKER_BATCHES_IN_FLIGHT.labels(topic.name).inc()
+        lease = {"locked_at": locked_at}
+        keeper = asyncio.create_task(self._keep_locked(client, topic, tasks, lease))
+        try:
+            t0 = time.perf_counter()
+            try:
+                results = await loop.run_in_executor(self._executor, self._run_handler, topic, tasks)
+            except Exception as e:
+                results = [e] * len(tasks)
+            finally:
+                keeper.cancel()
+            if results is None:
+                # Shutting down before the handler started: hand the tasks to another replica now
+                await self._unlock_batch(client, topic, tasks, spans)
+                return
+            elapsed = time.perf_counter() - t0
+            WORKER_HANDLER_SECONDS.labels(topic.name).observe(elapsed)
+            self._adapt_batch_limit(topic, elapsed, len(tasks))
+            await asyncio.gather(*(self._settle(client, topic, t, r, s) for t, r, s in zip(tasks, results, spans)))
+            self._observe_lock_margin(topic, lease["locked_at"])
+        finally:
+            WORKER_BATCHES_IN_FLIGHT.labels(topic.name).dec()
+            topic.in_flight -= 1
+            self._slot_freed.set()
+
+    def _observe_lock_margin(self, topic: Topic, locked_at: float):
+        """Counts batches that settled close to (or after) the end of their lock."""
+        held_ms = (time.monotonic() - locked_at) * 1000
+        if held_ms >= self.lock_ms:
+            WORKER_LOCK_EXPIRED.labels(topic.name).inc()
+            log.warning("Lock expired before settling", extra=fields(worker=self.tag, topic=topic.name,
+                                                                     held_ms=round(held_ms), lock_ms=self.lock_ms))
+        elif held_ms >= self.lock_ms * LOCK_NEAR_MISS_RATIO:
+            WORKER_LOCK_NEAR_MISSES.labels(topic.name).inc()
+
+    async def run(self):
+        if not self.topics:
+            raise RuntimeError("No topics registered")
+        self._executor = ThreadPoolExecutor(
+            max_workers=sum(t.concurrency for t in self.topics.values()),
+            thread_name_prefix=self.tag
+        )
+        self._slot_freed = asyncio.Event()
+        background = set()
+        if threading.current_thread() is threading.main_thread():
+            loop = asyncio.get_running_loop()
+            for sig in (signal.SIGTERM, signal.SIGINT):
+                loop.add_signal_handler(sig, self.stop)
+        for t in self.topics.values():
+            WORKER_MAX_TASKS.labels(t.name).set(self.max_tasks)
+        serve(self.metrics_port)
+        log.info("Worker started", extra=fields(worker=self.tag, engine=self.engine_rest, topics=list(self.topics),
+                                                workerId=self.worker_id))
+
+        # One connection for the long poll plus enough to report a full batch in parallel
+        client = AsyncCamundaClient(self.engine_rest, auth=self.auth, pool_size=self.max_tasks + 1,
+                                    retries=self.http_retries)
+        try:
+            while not self._stopping.is_set():
+                free = [t for t in self.topics.values() if not t.saturated]
+                if not free:
+                    self._slot_freed.clear()
+                    await self._until_stopped(self._slot_freed.wait())
+                    continue
+
+                # While a topic is saturated keep polls short so it rejoins soon after a slot frees
+                timeout_ms = self.async_timeout_ms
+                if len(free) < len(self.topics) and timeout_ms:
+                    timeout_ms = min(timeout_ms, self.saturated_poll_ms)
+
+                # Locks start counting when the engine answers; measuring from the request is conservative
+                locked_at = time.monotonic()
+                # One maxTasks per fetch: the smallest limit of the polled topics
+                max_tasks = min(t.batch_limit or self.max_tasks for t in free)
+                try:
+                    # On stop the long poll is abandoned; tasks the engine may still lock for
+                    # it are handed out again after lock_ms
+                    tasks = await self._until_stopped(client.fetch_and_lock(
+                        self.worker_id,
+                        [t.fetch_spec(self.lock_ms) for t in free],
+                        max_tasks,
+                        timeout_ms
+                    ))
+                    if tasks is None:
+                        break
+                    self.backoff.reset()
+                    WORKER_FETCH_SECONDS.labels("tasks" if tasks else "empty").observe(time.monotonic() - locked_at)
+                except Exception as e:
+                    WORKER_FETCH_SECONDS.labels("error").observe(time.monotonic() - locked_at)
+                    delay = self.backoff.next_delay()
+                    log.warning("Fetch failed: %s", e, extra=fields(worker=self.tag, retry_in=round(delay, 1)))
+                    await self._until_stopped(asyncio.sleep(delay))
+                    continue
+
+                if not tasks:
+                    # With long polling the engine already waited; only sleep when it is disabled
+                    if not timeout_ms:
+                        await self._until_stopped(asyncio.sleep(self.poll_sleep))
+                    continue
+
+                by_topic = {}
+                for t in tasks:
+                    by_topic.setdefault(t["topicName"], []).append(t)
+                for name, batch in by_topic.items():
+                    topic = self.topics[name]
+                    topic.in_flight += 1
+                    WORKER_TASKS_FETCHED.labels(name).inc(len(batch))
+                    job = asyncio.create_task(self._process(client, topic, batch, locked_at))
+                    background.add(job)
+                    job.add_done_callback(background.discard)
+            await self._drain(background)
+        finally:
+            await client.aclose()
+
+
+def runtime_from_env(sql_connect, tag: str, worker_id_prefix: str, session_factory=None) -> WorkerRuntime:
+    engine_rest = env("ENGINE_REST")               # e.g. http://camunda:8080/engine-rest
+    cam_user = env("CAMUNDA_USER", "demo")
+    cam_pass = env("CAMUNDA_PASS", "demo")
+
+    return WorkerRuntime(
+        engine_rest=engine_rest,
+        auth=(cam_user, cam_pass),
+        worker_id=unique_worker_id(os.getenv("WORKER_ID", worker_id_prefix)),
+        sql_connect=sql_connect,
+        max_tasks=int(os.getenv("MAX_TASKS", "10")),
+        lock_ms=int(os.getenv("LOCK_DURATION_MS", "60000")),
+        async_timeout_ms=int(os.getenv("ASYNC_RESPONSE_TIMEOUT_MS", "30000")),
+        poll_sleep=float(os.getenv("POLL_SLEEP_SEC", "2.0")),
+        http_retries=int(os.getenv("CAMUNDA_RETRIES", "3")),
+        backoff=Backoff(
+            base=float(os.getenv("ERROR_BACKOFF_BASE_SEC", "1.0")),
+            cap=float(os.getenv("ERROR_BACKOFF_MAX_SEC", "60.0"))
+        ),
+        tag=tag,
+        session_factory=session_factory,
+        metrics_port=int(os.getenv("METRICS_PORT", "0")),
+        batch_target_ms=int(os.getenv("BATCH_TARGET_MS", "5000")),
+        shutdown_grace=float(os.getenv("SHUTDOWN_GRACE_SEC", "20")),
+    )